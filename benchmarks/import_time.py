@@ -0,0 +1,47 @@
+"""
+Measures the time it takes to import blitzdb and its backends, using the
+`-X importtime` option of the Python interpreter (Python 3.7+). Every import
+runs in a fresh interpreter.
+
+Usage::
+
+    PYTHONPATH=. python benchmarks/import_time.py [number of repetitions]
+"""
+from __future__ import print_function
+
+import subprocess
+import sys
+
+MODULES = [
+    'blitzdb',
+    'blitzdb.backends.file',
+    'blitzdb.backends.mongo',
+    'blitzdb.backends.sql',
+]
+
+
+def get_import_time(module):
+    """
+    Returns the cumulative import time of the given module in microseconds.
+    """
+    output = subprocess.check_output([sys.executable,'-X','importtime','-c','import %s' % module],
+                                     stderr = subprocess.STDOUT).decode('utf-8')
+    for line in output.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative_time = int(fields[1])
+    return cumulative_time
+
+
+def run(n):
+    for module in MODULES:
+        try:
+            t = min(get_import_time(module) for i in range(n))
+        except subprocess.CalledProcessError:
+            print("{:<25} not available".format(module))
+            continue
+        print("{:<25} {:>8.1f} ms".format(module,t/1000.0))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,62 @@
+"""
+Measures loading and copying documents that carry many references to other
+documents.
+
+Usage::
+
+    PYTHONPATH=. python benchmarks/references.py [number of references]
+"""
+from __future__ import print_function
+
+import copy
+import shutil
+import sys
+import tempfile
+import timeit
+
+from blitzdb import Document
+from blitzdb.backends.file import Backend as FileBackend
+
+
+class Actor(Document):
+
+    class Meta(Document.Meta):
+        dbref_includes = ['name']
+
+
+class Movie(Document):
+    pass
+
+
+def run(n):
+    path = tempfile.mkdtemp()
+    try:
+        backend = FileBackend(path,autodiscover_classes = False,
+                              config = {'object_cache_size' : 0})
+        backend.register(Actor)
+        backend.register(Movie)
+        actors = [Actor({'pk' : 'actor-%d' % i,'name' : 'Actor %d' % i}) for i in range(n)]
+        for actor in actors:
+            backend.save(actor)
+        movies = [Movie({'pk' : 'movie-%d' % i,'title' : 'Movie %d' % i,'cast' : actors})
+                  for i in range(20)]
+        for movie in movies:
+            backend.save(movie)
+        backend.commit()
+
+        timings = [
+            ('load',lambda movies: None),
+            ('copy',lambda movies: [copy.copy(movie) for movie in movies]),
+            ('deepcopy',lambda movies: [copy.deepcopy(movie) for movie in movies]),
+        ]
+
+        print("20 documents with {} references each".format(n))
+        for name,f in timings:
+            t = min(timeit.repeat(lambda: f(list(backend.filter(Movie,{}))),number = 1,repeat = 5))
+            print("{:<16} {:>8.2f} ms".format(name if name == 'load' else 'load + '+name,t*1000))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,58 @@
+"""
+Measures the per-document overhead of the class registry lookups of a backend
+(collection and class name lookups, hooks and meta attributes) depending on
+the number of registered document classes.
+
+Usage::
+
+    PYTHONPATH=. python benchmarks/registry.py [number of lookups]
+"""
+from __future__ import print_function
+
+import shutil
+import sys
+import tempfile
+import timeit
+
+from blitzdb import Document
+from blitzdb.backends.file import Backend as FileBackend
+
+
+def generate_classes(n):
+    classes = []
+    for i in range(n):
+        meta = type('Meta',(Document.Meta,),{'autoregister' : False,'collection' : 'collection_%d' % i})
+        classes.append(type('Document%d' % i,(Document,),{'Meta' : meta}))
+    return classes
+
+
+def run(n):
+    for n_classes in (10,1000):
+        path = tempfile.mkdtemp()
+        try:
+            backend = FileBackend(path,autodiscover_classes = False)
+            classes = generate_classes(n_classes)
+            for cls in classes:
+                backend.register(cls)
+            cls = classes[-1]
+            collection = backend.get_collection_for_cls(cls)
+            obj = cls({'pk' : 1})
+
+            timings = [
+                ('get_cls_for_collection',lambda: backend.get_cls_for_collection(collection)),
+                ('get_collection_for_cls_name',lambda: backend.get_collection_for_cls_name(cls.__name__)),
+                ('call_hook',lambda: backend.call_hook('before_save',obj)),
+                ('get_meta_attributes',lambda: backend.get_meta_attributes(cls)),
+                ('create_instance',lambda: backend.create_instance(collection,{'pk' : 1},deserialize = False)),
+            ]
+
+            print("{} registered classes:".format(n_classes))
+            for name,f in timings:
+                t = min(timeit.repeat(f,number = n,repeat = 5))
+                print("  {:<30} {:>8.3f} us per call".format(name,t*1e6/n))
+        finally:
+            shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
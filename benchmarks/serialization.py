@@ -0,0 +1,87 @@
+"""
+Compares the compiled serializer/deserializer of the backends with the
+generic (recursive) implementation.
+
+Usage::
+
+    PYTHONPATH=. python benchmarks/serialization.py [number of documents]
+"""
+from __future__ import print_function
+
+import shutil
+import sys
+import tempfile
+import timeit
+
+from blitzdb import Document
+from blitzdb.backends.file import Backend as FileBackend
+
+
+class Author(Document):
+    pass
+
+
+class Book(Document):
+    pass
+
+
+def generate_books(backend, n):
+    authors = [Author({'pk' : 'author-%d' % i,'name' : 'Author %d' % i}) for i in range(10)]
+    for author in authors:
+        backend.save(author)
+    books = []
+    for i in range(n):
+        books.append({
+            'pk' : 'book-%d' % i,
+            'title' : u'Book number %d' % i,
+            'year' : 1900 + i % 100,
+            'rating' : i / 10.0,
+            'available' : i % 2 == 0,
+            'author' : authors[i % len(authors)],
+            'tags' : ['tag-%d' % j for j in range(5)],
+            'editions' : [{'year' : 1900 + j,'publisher' : {'name' : 'Publisher %d' % j,'city' : 'Berlin'}}
+                          for j in range(3)],
+        })
+    return books
+
+
+def run(n):
+    path = tempfile.mkdtemp()
+    try:
+        backend = FileBackend(path,autodiscover_classes = False)
+        backend.register(Author)
+        backend.register(Book)
+        books = generate_books(backend,n)
+        serialized_books = [backend.serialize(book) for book in books]
+
+        timings = [
+            ('serialize (generic)',lambda: [backend.serialize(book,path = []) for book in books]),
+            ('serialize (compiled)',lambda: [backend.serialize(book) for book in books]),
+            ('deserialize (generic)',lambda: [backend.deserialize(book,encoders = [NoopEncoder]) for book in serialized_books]),
+            ('deserialize (compiled)',lambda: [backend.deserialize(book) for book in serialized_books]),
+        ]
+
+        for name,f in timings:
+            t = min(timeit.repeat(f,number = 1,repeat = 5))
+            print("{:<25} {:>8.2f} ms ({:.1f} us per document)".format(name,t*1000,t*1e6/n))
+    finally:
+        shutil.rmtree(path)
+
+
+class NoopEncoder(object):
+
+    """
+    Passing an encoder that does not declare `needs_path = False` selects the generic code path.
+    """
+
+    @classmethod
+    def encode(cls,obj,path):
+        return obj
+
+    @classmethod
+    def decode(cls,obj):
+        return obj
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -1,14 +1,42 @@
-from .backends.file import Backend as FileBackend
+import importlib
+import sys
+
 from .document import Document
 
-try:
-    from .backends.mongo import Backend as MongoBackend
-except ImportError:
-    pass
+__version__ = '0.2.12'
 
-try:
-    from .backends.sql import Backend as SqlBackend
-except ImportError:
-    pass
+#the backends (and their dependencies, e.g. sqlalchemy or pymongo) get imported on first access
+_backend_modules = {
+    'FileBackend' : 'blitzdb.backends.file',
+    'MongoBackend' : 'blitzdb.backends.mongo',
+    'SqlBackend' : 'blitzdb.backends.sql',
+}
 
-__version__ = '0.2.12'
+
+def _import_backend(name):
+    try:
+        backend = importlib.import_module(_backend_modules[name]).Backend
+    except ImportError as e:
+        raise AttributeError("%s is not available: %s" % (name,e))
+    globals()[name] = backend
+    return backend
+
+
+if sys.version_info >= (3,7):
+
+    def __getattr__(name):
+        if name in _backend_modules:
+            return _import_backend(name)
+        raise AttributeError("module %r has no attribute %r" % (__name__,name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(_backend_modules))
+
+else:
+
+    #module-level __getattr__ is not supported, so we import the backends right away
+    for _name in _backend_modules:
+        try:
+            _import_backend(_name)
+        except AttributeError:
+            pass
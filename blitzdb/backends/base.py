@@ -1,11 +1,13 @@
 import abc
-import copy
 import inspect
 import logging
+import weakref
+from collections import OrderedDict
 
 import six
 
 from blitzdb.document import Document, document_classes
+from blitzdb.helpers import copy_containers
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +30,49 @@ class InTransaction(BaseException):
     gets called inside a transaction.
     """
 
+#maximum number of compiled serializers that are cached per backend
+MAX_COMPILED_CODECS = 64
+
+#attributes that every class has, which are not considered to be meta attributes
+_default_class_attributes = frozenset(dir(type('dummy', (object,), {})))
+
+
+def encode_as_str(obj):
+    if six.PY3:
+        return str(obj)
+    else:
+        if isinstance(obj,unicode):
+            return obj
+        elif isinstance(obj,str):
+            return unicode(obj)
+        else:
+            return unicode(str(obj),errors='replace')
+
+
+def get_passthrough_types(encoder_types):
+    """
+    Returns the set of (exact) scalar types that none of the given encoders acts on, and which
+    compiled serializers can therefore return unchanged.
+
+    :param encoder_types: A list with the `encode_types` (or `decode_types`) of the encoders,
+                          `None` meaning that an encoder acts on values of any type.
+    """
+    candidates = [bool,float,type(None)]+list(six.integer_types)
+    if six.PY3:
+        #str(obj) returns obj itself for an exact str instance
+        candidates.append(str)
+    if any(types is None for types in encoder_types):
+        return frozenset()
+    return frozenset([candidate for candidate in candidates
+                      if not any(issubclass(candidate,types) for types in encoder_types)])
+
+
 class ComplexEncoder(object):
 
+    needs_path = False
+    encode_types = (complex,)
+    decode_types = (dict,)
+
     @classmethod
     def encode(cls,obj,path):
         if isinstance(obj,complex):
@@ -44,6 +87,9 @@ class ComplexEncoder(object):
 
 class ComplexQueryEncoder(object):
 
+    needs_path = False
+    encode_types = (complex,)
+
     @classmethod
     def encode(cls,obj,path):
         if isinstance(obj,complex):
@@ -58,6 +104,8 @@ class Backend(object):
 
     :param autodiscover_classes: If set to `True`, document classes will be discovered automatically,
                                  using a global list of all classes generated by the Document metaclass.
+                                 The discovery takes place when the registered classes are needed for
+                                 the first time, not when the backend gets created.
 
     *The `Meta` attribute*
 
@@ -74,14 +122,45 @@ class Backend(object):
     standard_encoders = [ComplexEncoder]
     query_encoders = [ComplexQueryEncoder]
 
+    #maps (collection, pk) to document instances while a session is active
+    _identity_map = None
+
+    _autodiscover_pending = False
+
     def __init__(self, autodiscover_classes=True, autoload_embedded=True, allow_documents_in_query=True):
         self.classes = {}
         self.deprecated_classes = {}
         self.collections = {}
+        #lookup tables derived from the registered classes
+        self._collections_by_cls_name = None
+        self._hooks = {}
+        self._meta_attributes = {}
+        #compiled serializers and deserializer (see `get_serializer` and `get_deserializer`)
+        self._serializers = {}
+        self._deserializer = None
         self._autoload_embedded = autoload_embedded
         self._allow_documents_in_query = allow_documents_in_query
-        if autodiscover_classes:
+        self._autodiscover_pending = autodiscover_classes
+
+    @property
+    def classes(self):
+        if self._autodiscover_pending:
             self.autodiscover_classes()
+        return self._classes
+
+    @classes.setter
+    def classes(self, classes):
+        self._classes = classes
+
+    @property
+    def collections(self):
+        if self._autodiscover_pending:
+            self.autodiscover_classes()
+        return self._collections
+
+    @collections.setter
+    def collections(self, collections):
+        self._collections = collections
 
     def autodiscover_classes(self):
         """
@@ -89,6 +168,7 @@ class Backend(object):
         works by reading the value of `blitzdb.document.document_classes`, which is updated by the meta-class
         of the :py:class:`blitzdb.document.Document` class upon creation of a new subclass.
         """
+        self._autodiscover_pending = False
         for document_class in document_classes:
             self.register(document_class)
 
@@ -97,6 +177,14 @@ class Backend(object):
         if cls in self.classes:
             del self.collections[self.classes[cls]['collection']]
             del self.classes[cls]
+            self._clear_class_caches(cls)
+
+    def _clear_class_caches(self, cls):
+        self._collections_by_cls_name = None
+        self._hooks.pop(cls,None)
+        self._meta_attributes.pop(cls,None)
+        self._serializers = {}
+        self._deserializer = None
 
     def register(self, cls, parameters=None,overwrite = False):
         """
@@ -143,9 +231,12 @@ class Backend(object):
         delete_list = []
 
         def register_class(collection_name,cls):
+            if cls in self.classes and self.classes[cls]['collection'] != collection_name:
+                del self.collections[self.classes[cls]['collection']]
             self.collections[collection_name] = cls
             self.classes[cls] = parameters.copy()
             self.classes[cls]['collection'] = collection_name
+            self._clear_class_caches(cls)
 
         if collection_name in self.collections:
             old_cls = self.collections[collection_name]
@@ -153,6 +244,7 @@ class Backend(object):
                 logger.warning("Replacing class %s with %s for collection %s" % (old_cls,cls,collection_name))
                 self.deprecated_classes[old_cls] = self.classes[old_cls]
                 del self.classes[old_cls]
+                self._clear_class_caches(old_cls)
                 register_class(collection_name,cls)
                 return True
         else:
@@ -163,19 +255,24 @@ class Backend(object):
         return False
 
     def get_meta_attributes(self, cls):
-
-        def get_user_attributes(cls):
-            boring = dir(type('dummy', (object,), {}))
-            return dict([item
-                         for item in inspect.getmembers(cls)
-                         if item[0] not in boring])
+        """
+        Returns the attributes of the `Meta` class of the given document class as a dictionary.
+        The result is cached per class until the class gets (re-)registered.
+        """
+        try:
+            return dict(self._meta_attributes[cls])
+        except KeyError:
+            pass
 
         if hasattr(cls, 'Meta'):
-            params = get_user_attributes(cls.Meta)
+            params = dict([item
+                           for item in inspect.getmembers(cls.Meta)
+                           if item[0] not in _default_class_attributes])
         else:
             params = {}
 
-        return params
+        self._meta_attributes[cls] = params
+        return dict(params)
 
     def autoregister(self, cls):
         """
@@ -204,18 +301,22 @@ class Backend(object):
         :param for_query: If true, only the `pk` and `__collection__` attributes will be included in document references.
 
         :returns: The serialized object.
+
+        .. note::
+
+            If none of the encoders needs to know the path of the serialized values (see
+            :py:meth:`get_serializer`), a compiled serializer is used for the whole object.
         """
 
         if path is None:
+            serializer = self.get_serializer(encoders = encoders,
+                                             convert_keys_to_str = convert_keys_to_str,
+                                             autosave = autosave,
+                                             for_query = for_query)
+            if serializer is not None:
+                return serializer(obj,embed_level)
             path = []
 
-        def get_value(obj,key):
-            key_fragments = key.split(".")
-            current_dict = obj
-            for key_fragment in key_fragments:
-                current_dict = current_dict[key_fragment]
-            return current_dict
-
         serialize_with_opts = lambda value,*args,**kwargs : self.serialize(value,*args,
                                                                            encoders = encoders,
                                                                            convert_keys_to_str = convert_keys_to_str,
@@ -229,17 +330,6 @@ class Backend(object):
         for encoder in self.standard_encoders+encoders:
             obj = encoder.encode(obj,path = path)
 
-        def encode_as_str(obj):
-            if six.PY3:
-                return str(obj)
-            else:
-                if isinstance(obj,unicode):
-                    return obj
-                elif isinstance(obj,str):
-                    return unicode(obj)
-                else:
-                    return unicode(str(obj),errors='replace')
-
         if isinstance(obj, dict):
             output_obj = {}
             for key, value in obj.items():
@@ -256,49 +346,122 @@ class Backend(object):
             except DoNotSerialize:
                 pass
         elif isinstance(obj, Document):
-            collection = self.get_collection_for_obj(obj)
-            if embed_level > 0:
-                try:
-                    output_obj = self.serialize(obj, embed_level=embed_level-1)
-                except obj.DoesNotExist:#cannot load object, ignoring...
-                    output_obj = self.serialize(obj.lazy_attributes, embed_level=embed_level-1)
-                except DoNotSerialize:
-                    pass
-            elif obj.embed:
-                output_obj = self.serialize(obj)
-            else:
-                if obj.pk == None and autosave:
-                    obj.save(self)
-
-                if obj._lazy:
-                    # We make sure that all attributes that are already present get included in the reference
-                    output_obj = {}
-                    if obj.get_pk_name() in output_obj:
-                        del output_obj[obj.get_pk_name()]
-                    output_obj['pk'] = obj.pk
-                    output_obj['__collection__'] = self.classes[obj.__class__]['collection']
-                else:
-                    if for_query and not self._allow_documents_in_query:
-                        raise ValueError("Documents are not allowed in queries!")
-                    if for_query:
-                        output_obj = {'$elemMatch' : {'pk':obj.pk,'__collection__':self.classes[obj.__class__]['collection']}}
-                    else:
-                        ref = "%s:%s" % (self.classes[obj.__class__]['collection'],str(obj.pk))
-                        output_obj = {'__ref__' : ref,'pk':obj.pk,'__collection__':self.classes[obj.__class__]['collection']}
+            output_obj = self._serialize_document(obj,embed_level = embed_level,autosave = autosave,for_query = for_query)
+        else:
+            output_obj = obj
+        return output_obj
+
+    def _serialize_document(self, obj, embed_level=0, autosave=True, for_query=False):
+        """
+        Serializes a `Document` instance that is contained in a serialized object (usually as a reference).
+        """
+
+        def get_value(obj,key):
+            key_fragments = key.split(".")
+            current_dict = obj
+            for key_fragment in key_fragments:
+                current_dict = current_dict[key_fragment]
+            return current_dict
 
-                if hasattr(obj,'Meta') and hasattr(obj.Meta,'dbref_includes') and obj.Meta.dbref_includes:
-                    for include_key in obj.Meta.dbref_includes:
-                        try:
-                            value = get_value(obj,include_key)
-                            output_obj[include_key.replace(".","_")] = value
-                        except KeyError:
-                            continue
+        collection = self.get_collection_for_obj(obj)
 
+        if embed_level > 0:
+            try:
+                return self.serialize(obj, embed_level=embed_level-1)
+            except obj.DoesNotExist:#cannot load object, ignoring...
+                return self.serialize(obj.lazy_attributes, embed_level=embed_level-1)
+        elif obj.embed:
+            return self.serialize(obj)
+
+        if obj.pk == None and autosave:
+            obj.save(self)
 
+        if obj._lazy:
+            # We make sure that all attributes that are already present get included in the reference
+            output_obj = {}
+            output_obj['pk'] = obj.pk
+            output_obj['__collection__'] = collection
         else:
-            output_obj = obj
+            if for_query and not self._allow_documents_in_query:
+                raise ValueError("Documents are not allowed in queries!")
+            if for_query:
+                output_obj = {'$elemMatch' : {'pk':obj.pk,'__collection__':collection}}
+            else:
+                ref = "%s:%s" % (collection,str(obj.pk))
+                output_obj = {'__ref__' : ref,'pk':obj.pk,'__collection__':collection}
+
+        if hasattr(obj,'Meta') and hasattr(obj.Meta,'dbref_includes') and obj.Meta.dbref_includes:
+            for include_key in obj.Meta.dbref_includes:
+                try:
+                    value = get_value(obj,include_key)
+                    output_obj[include_key.replace(".","_")] = value
+                except KeyError:
+                    continue
+
         return output_obj
 
+    def get_serializer(self, encoders=None, convert_keys_to_str=False, autosave=True, for_query=False):
+        """
+        Returns a compiled serializer function for the given encoders and options, or `None` if
+        one of the encoders needs to know the path of the values that it encodes.
+
+        The serializer produces the same output as :py:meth:`serialize`, but does not keep track
+        of paths, and it only calls encoders on values whose type is listed in the `encode_types`
+        attribute of the encoder (encoders without that attribute are called on every value).
+        Encoders have to declare that they do not need paths by setting `needs_path = False`.
+
+        Compiled serializers are cached per backend, encoder set and options.
+
+        :returns: a function `serializer(obj,embed_level)`
+        """
+        all_encoders = tuple(self.standard_encoders)+tuple(encoders or ())
+        key = (all_encoders,convert_keys_to_str,autosave,for_query)
+        try:
+            return self._serializers[key]
+        except KeyError:
+            pass
+        except TypeError:#unhashable encoder
+            return self._compile_serializer(all_encoders,convert_keys_to_str,autosave,for_query)
+        serializer = self._compile_serializer(all_encoders,convert_keys_to_str,autosave,for_query)
+        if len(self._serializers) >= MAX_COMPILED_CODECS:
+            self._serializers = {}
+        self._serializers[key] = serializer
+        return serializer
+
+    def _compile_serializer(self, encoders, convert_keys_to_str, autosave, for_query):
+
+        if any(getattr(encoder,'needs_path',True) for encoder in encoders):
+            return None
+
+        typed_encoders = [(getattr(encoder,'encode_types',None),encoder.encode) for encoder in encoders]
+        passthrough_types = get_passthrough_types([types for types,_ in typed_encoders])
+        string_types = six.string_types
+        serialize_document = self._serialize_document
+
+        def serialize(obj,embed_level):
+            if type(obj) in passthrough_types:
+                return obj
+            for types,encode in typed_encoders:
+                if types is None or isinstance(obj,types):
+                    obj = encode(obj,path = None)
+            if isinstance(obj,dict):
+                output_obj = {}
+                for key,value in obj.items():
+                    try:
+                        output_obj[encode_as_str(key) if convert_keys_to_str else key] = serialize(value,embed_level)
+                    except DoNotSerialize:
+                        pass
+                return output_obj
+            elif isinstance(obj,string_types):
+                return encode_as_str(obj)
+            elif isinstance(obj,(list,tuple)):
+                return [serialize(x,embed_level) for x in obj]
+            elif isinstance(obj,Document):
+                return serialize_document(obj,embed_level = embed_level,autosave = autosave,for_query = for_query)
+            return obj
+
+        return serialize
+
     def deserialize(self, obj, encoders=None, embedded=False, create_instance=True):
         """
         Deserializes a given object, i.e. converts references to other (known) `Document` objects by lazy instances of the
@@ -310,24 +473,14 @@ class Backend(object):
         """
 
         if not encoders:
-            encoders = []
+            return self.get_deserializer()(obj,create_instance)
 
         for encoder in encoders + self.standard_encoders:
             obj = encoder.decode(obj)
 
         if isinstance(obj, dict):
             if create_instance and '__collection__' in obj and obj['__collection__'] in self.collections and 'pk' in obj:
-                #for backwards compatibility
-                attributes = copy.deepcopy(obj)
-                del attributes['__collection__']
-                if '__ref__' in attributes:
-                    del attributes['__ref__']
-                if '__lazy__' in attributes:
-                    lazy = attributes['__lazy__']
-                    del attributes['__lazy__']
-                else:
-                    lazy = True
-                output_obj = self.create_instance(obj['__collection__'], attributes, lazy=lazy)
+                output_obj = self._deserialize_reference(obj)
             else:
                 output_obj = {}
                 for key, value in obj.items():
@@ -339,6 +492,62 @@ class Backend(object):
 
         return output_obj
 
+    def _deserialize_reference(self, obj):
+        """
+        Creates a (usually lazy) document instance from a serialized reference.
+        """
+        #for backwards compatibility
+        #(a shallow copy suffices, as the attributes get deserialized into new containers)
+        attributes = dict(obj)
+        del attributes['__collection__']
+        if '__ref__' in attributes:
+            del attributes['__ref__']
+        if '__lazy__' in attributes:
+            lazy = attributes['__lazy__']
+            del attributes['__lazy__']
+        else:
+            lazy = True
+        return self.create_instance(obj['__collection__'], attributes, lazy=lazy)
+
+    def get_deserializer(self):
+        """
+        Returns a compiled deserializer function for the standard encoders of the backend, which
+        produces the same output as :py:meth:`deserialize` (without additional encoders).
+
+        :returns: a function `deserializer(obj,create_instance = True)`
+        """
+        key = tuple(self.standard_encoders)
+        if self._deserializer is not None:
+            deserializer, deserializer_key = self._deserializer
+            if deserializer_key == key:
+                return deserializer
+        deserializer = self._compile_deserializer(key)
+        self._deserializer = (deserializer,key)
+        return deserializer
+
+    def _compile_deserializer(self, encoders):
+
+        typed_decoders = [(getattr(encoder,'decode_types',None),encoder.decode)
+                          for encoder in encoders if hasattr(encoder,'decode')]
+        passthrough_types = get_passthrough_types([types for types,_ in typed_decoders])
+        deserialize_reference = self._deserialize_reference
+
+        def deserialize(obj,create_instance = True):
+            if type(obj) in passthrough_types:
+                return obj
+            for types,decode in typed_decoders:
+                if types is None or isinstance(obj,types):
+                    obj = decode(obj)
+            if isinstance(obj,dict):
+                if create_instance and '__collection__' in obj and 'pk' in obj and obj['__collection__'] in self.collections:
+                    return deserialize_reference(obj)
+                return {key : deserialize(value) for key,value in obj.items()}
+            elif isinstance(obj,(list,tuple)):
+                return [deserialize(x) for x in obj]
+            return obj
+
+        return deserialize
+
     def create_instance(self, collection_or_class, attributes, lazy=False, call_hook=True, deserialize=True, db_loader=None):
         """
         Creates an instance of a `Document` class corresponding to the given collection name or class.
@@ -369,48 +578,132 @@ class Backend(object):
         else:
             deserialized_attributes = attributes
 
-        if 'constructor' in self.classes[cls]:
-            obj = self.classes[cls]['constructor'](deserialized_attributes, **creation_args)
+        identity_key = self.get_identity_key(cls, attributes, db_loader = db_loader)
+        obj = self._identity_map.get(identity_key) if identity_key is not None else None
+
+        if obj is not None:
+            #the (shared) instance is only updated if we received the full data and it has no
+            #unsaved changes
+            if not lazy and not obj.has_pending_changes():
+                obj._attributes = deserialized_attributes
+                obj._lazy = False
+                obj.mark_clean()
+                obj.initialize()
         else:
-            obj = cls(deserialized_attributes, **creation_args)
+            if 'constructor' in self.classes[cls]:
+                obj = self.classes[cls]['constructor'](deserialized_attributes, **creation_args)
+            else:
+                obj = cls(deserialized_attributes, **creation_args)
+            if not lazy:
+                obj.mark_clean()
+            if identity_key is not None:
+                self._identity_map[identity_key] = obj
 
         if call_hook:
             self.call_hook('after_load',obj)
 
         return obj
 
+    def get_identity_key(self, cls, attributes, db_loader = None):
+        """
+        Returns the key of a document in the identity map of the current session, or `None` if
+        no session is active or the document can't be identified by its primary key.
+
+        :param cls: The class of the document.
+        :param attributes: The (serialized) attributes of the document.
+        """
+        if self._identity_map is None or db_loader is not None:
+            return None
+        pk = attributes.get(cls.get_pk_name())
+        if pk is None:
+            return None
+        try:
+            hash(pk)
+        except TypeError:
+            return None
+        return (self.classes[cls]['collection'], pk)
+
+    def session(self):
+        """
+        This returns a context guard within which each document (identified by its collection
+        and primary key) is materialized only once: all references to the same document
+        that get loaded within the session are represented by the same instance. When the
+        full data of a document is loaded, the shared instance gets updated with it, unless it
+        has unsaved changes. The `after_load` hook gets called each time a document is loaded,
+        also if the existing instance is returned as it is.
+
+        The instances are referenced weakly, so documents that are no longer used anywhere
+        else can still be garbage collected. Sessions can be nested, in which case the
+        outermost session determines the lifetime of the identity map.
+
+        example::
+
+            with backend.session():
+                movies = backend.filter(Movie,{'year' : 1979})
+                #movies with the same director share a single director instance
+        """
+
+        class SessionManager(object):
+
+            def __init__(self,backend):
+                self.backend = backend
+                self.owner = False
+
+            def __enter__(self):
+                if self.backend._identity_map is None:
+                    self.backend._identity_map = weakref.WeakValueDictionary()
+                    self.owner = True
+                return self.backend
+
+            def __exit__(self,exc_type,exc_value,traceback_obj):
+                if self.owner:
+                    self.backend._identity_map = None
+                return False
+
+        return SessionManager(self)
+
     @property
     @abc.abstractmethod
     def current_transaction(self):
         pass
 
-    def transaction(self,implicit = False):
+    def transaction(self,implicit = False,session = False):
         """
         This returns a context guard which will automatically open and close a transaction
+
+        If `session` is `True`, an identity map is active for the duration of the transaction
+        (see :py:meth:`session`).
         """
 
         class TransactionManager(object):
 
-            def __init__(self,backend,implicit = False):
+            def __init__(self,backend,implicit = False,session = None):
                 self.backend = backend
                 self.implicit =  implicit
+                self.session = session
 
             def __enter__(self):
                 self.within_transaction = True if self.backend.current_transaction else False
+                if self.session is not None:
+                    self.session.__enter__()
                 self.transaction = self.backend.begin()
 
             def __exit__(self,exc_type,exc_value,traceback_obj):
-                if exc_type:
-                    self.backend.rollback(self.transaction)
-                    return False
-                else:
-                    #if the transaction has been created implicitly and we are not within
-                    #another transaction, we leave it open (the user needs to call commit manually)
-                    #if self.implicit and not self.within_transaction:
-                    #    return
-                    self.backend.commit(self.transaction)
-
-        return TransactionManager(self,implicit = implicit)
+                try:
+                    if exc_type:
+                        self.backend.rollback(self.transaction)
+                        return False
+                    else:
+                        #if the transaction has been created implicitly and we are not within
+                        #another transaction, we leave it open (the user needs to call commit manually)
+                        #if self.implicit and not self.within_transaction:
+                        #    return
+                        self.backend.commit(self.transaction)
+                finally:
+                    if self.session is not None:
+                        self.session.__exit__(exc_type,exc_value,traceback_obj)
+
+        return TransactionManager(self,implicit = implicit,session = self.session() if session else None)
 
     def get_collection_for_obj(self, obj):
         """
@@ -446,10 +739,15 @@ class Backend(object):
 
         :returns: The collection name for the given class.
         """
-        for cls in self.classes:
-            if cls.__name__ == cls_name:
-                return self.classes[cls]['collection']
-        raise AttributeError("Unknown class name: %s" % cls_name)
+        if self._collections_by_cls_name is None:
+            collections_by_cls_name = {}
+            for cls,params in self.classes.items():
+                collections_by_cls_name.setdefault(cls.__name__,params['collection'])
+            self._collections_by_cls_name = collections_by_cls_name
+        try:
+            return self._collections_by_cls_name[cls_name]
+        except KeyError:
+            raise AttributeError("Unknown class name: %s" % cls_name)
 
     def get_cls_for_collection(self, collection):
         """
@@ -459,12 +757,23 @@ class Backend(object):
 
         :returns: A reference to the class for the given collection name.
         """
-        for cls, params in self.classes.items():
-            if params['collection'] == collection:
-                return cls
-        raise AttributeError("Unknown collection: %s" % collection)
+        try:
+            return self.collections[collection]
+        except (KeyError,TypeError):
+            raise AttributeError("Unknown collection: %s" % collection)
 
     def call_hook(self,name,obj,*args,**kwargs):
+        cls = obj.__class__
+        try:
+            hooks = self._hooks[cls]
+        except KeyError:
+            hooks = self._hooks[cls] = {}
+        try:
+            has_hook = hooks[name]
+        except KeyError:
+            has_hook = hooks[name] = hasattr(cls,name)
+        if not has_hook:
+            return
         try:
             hook = obj.get_lazy_attribute(name)
             return hook(*args,**kwargs)
@@ -498,6 +807,128 @@ class Backend(object):
 
         """
 
+    def get_by_pk(self, cls, pk):
+        """
+        Retrieve a single object from the database by its primary key.
+
+        Backends override this method with a direct lookup that does not go
+        through the query compiler.
+
+        :param cls: The class for which to return an object.
+        :param pk: The primary key of the object to be returned
+
+        :returns: An instance of the requested object.
+
+        .. admonition:: Exception Behavior
+
+            Raises a :py:class:`blitzdb.document.Document.DoesNotExist` exception if no object with the given
+            primary key exists in the database.
+
+        """
+        return self.get(cls, {cls.get_pk_name(): pk})
+
+    def get_many_by_pk(self, cls, pks):
+        """
+        Retrieve several objects from the database by their primary keys.
+
+        :param cls: The class for which to return objects.
+        :param pks: The primary keys of the objects to be returned
+
+        :returns: A list with the objects, in the order of the given primary keys. Primary keys
+                  for which no object exists in the database are skipped.
+
+        """
+        objs = []
+        seen_pks = set()
+        for pk in pks:
+            if pk in seen_pks:
+                continue
+            seen_pks.add(pk)
+            try:
+                objs.append(self.get_by_pk(cls, pk))
+            except cls.DoesNotExist:
+                pass
+        return objs
+
+    def load_lazy(self, documents, paths=None):
+        """
+        Loads lazy documents in batches, using one :py:meth:`get_many_by_pk` call per class
+        instead of one query per document.
+
+        The given documents are loaded first (if they are lazy). Then, for each of the given
+        `paths`, the documents referenced under that path get loaded, level by level (so
+        `director.movies` first loads the directors of all documents and then their movies).
+        If no paths are given, all lazy documents referenced by the given documents are loaded.
+
+        :param documents: The documents whose references should be loaded.
+        :param paths: A list of (dotted) paths of the references to be loaded.
+
+        :returns: The list of given documents.
+
+        example::
+
+            movies = backend.filter(Movie,{'year' : 1979})
+            backend.load_lazy(movies,paths = ['director','cast'])
+        """
+        documents = list(documents)
+        self._load_lazy_documents(documents)
+        if paths is None:
+            referenced_documents = []
+            for document in documents:
+                referenced_documents.extend(self._get_referenced_documents(document.lazy_attributes))
+            self._load_lazy_documents(referenced_documents)
+            return documents
+        for path in paths:
+            current_documents = documents
+            for key in path.split('.'):
+                referenced_documents = []
+                for document in current_documents:
+                    value = document.lazy_attributes.get(key)
+                    referenced_documents.extend(self._get_referenced_documents(value))
+                self._load_lazy_documents(referenced_documents)
+                current_documents = referenced_documents
+        return documents
+
+    def _get_referenced_documents(self, value):
+        if isinstance(value, Document):
+            return [value]
+        elif isinstance(value, dict):
+            values = value.values()
+        elif isinstance(value, (list, tuple)):
+            values = value
+        else:
+            return []
+        documents = []
+        for v in values:
+            documents.extend(self._get_referenced_documents(v))
+        return documents
+
+    def _load_lazy_documents(self, documents):
+        documents_by_cls = OrderedDict()
+        seen = set()
+        for document in documents:
+            if id(document) in seen:
+                continue
+            seen.add(id(document))
+            #documents with a custom loader (or without a primary key) can't be loaded in a batch
+            if (not document._lazy or document._db_loader is not None
+                    or document._backend not in (self, None) or document.pk is None):
+                continue
+            documents_by_cls.setdefault(document.__class__, []).append(document)
+
+        for cls, cls_documents in documents_by_cls.items():
+            loaded_attributes = {}
+            for obj in self.get_many_by_pk(cls, [document.pk for document in cls_documents]):
+                loaded_attributes[obj.pk] = obj.attributes
+            for document in cls_documents:
+                if document.pk not in loaded_attributes:
+                    continue
+                #documents referring to the same object must not share their attributes
+                document._attributes = copy_containers(loaded_attributes[document.pk])
+                document._lazy = False
+                document.mark_clean()
+                document.initialize()
+
     @abc.abstractmethod
     def delete(self, obj):
         """
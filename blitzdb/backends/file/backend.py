@@ -1,3 +1,4 @@
+import copy
 import os
 import os.path
 import uuid
@@ -13,8 +14,10 @@ from blitzdb.backends.file.queries import compile_query
 from blitzdb.backends.file.queryset import QuerySet
 from blitzdb.backends.file.serializers import JsonSerializer, PickleSerializer
 from blitzdb.backends.file.store import Store, TransactionalStore
+from blitzdb.backends.file.utils import get_store_key_for_pk
+from blitzdb.cache import LRUCache
 from blitzdb.document import Document
-from blitzdb.helpers import delete_value, get_value, set_value
+from blitzdb.helpers import copy_containers, delete_value, get_value, set_value
 
 store_classes = {
     'transactional': TransactionalStore,
@@ -63,6 +66,24 @@ class Backend(BaseBackend):
         it from disk.  If this fails, the default configuration will be used
         instead.
 
+    Pending documents of a transaction are kept in memory until the
+    transaction gets committed. For large transactions (e.g. bulk imports),
+    the `transaction_memory_limit` config value (in bytes) can be set, above
+    which pending documents are written to a temporary location on disk and
+    moved into place on commit.
+
+    Decoded documents are kept in a size-bounded LRU cache (see the
+    `object_cache_size` config value, given in bytes of encoded data), so that
+    repeatedly loading the same documents does not require reading and
+    decoding them from disk each time. Set it to `0` to disable the cache.
+
+    If the `pk_store_keys` config value is set, the store key of a document
+    is derived from its primary key instead of being generated randomly.
+    Documents can then be loaded by primary key with a single read, and the
+    primary key index no longer needs to be loaded at startup. Since the
+    configuration is stored with the database, this option has to be given
+    when the database is created.
+
     .. warning::
         It might seem tempting to use the `autocommit` config and not having to
         worry about calling `commit` by hand. Please be advised that this can
@@ -79,6 +100,9 @@ class Backend(BaseBackend):
         'index_store_class': 'basic',
         'serializer_class': 'json',
         'autocommit': False,
+        'object_cache_size': 16 * 1024 * 1024,
+        'transaction_memory_limit': None,
+        'pk_store_keys': False,
     }
 
     config_defaults = {}
@@ -95,6 +119,10 @@ class Backend(BaseBackend):
         self.indexes = defaultdict(lambda: {})
         self.index_stores = defaultdict(lambda: {})
         self.load_config(config, overwrite_config)
+        self._object_cache = LRUCache(self._config['object_cache_size'])
+        # (collection, store_key) pairs written in the current transaction,
+        # which must not be cached before they are committed.
+        self._uncommitted_cache_keys = set()
         self._auto_transaction = False
         self.begin()
 
@@ -140,10 +168,27 @@ class Backend(BaseBackend):
     def SerializerClass(self):
         return serializer_classes[self.config['serializer_class']]
 
+    @property
+    def object_cache(self):
+        return self._object_cache
+
+    @property
+    def object_cache_stats(self):
+        """Return hit/miss statistics of the object cache."""
+        return self._object_cache.get_stats()
+
+    def _invalidate_cached_object(self, collection, store_key):
+        cache_key = (collection, store_key)
+        self._object_cache.invalidate(cache_key)
+        self._uncommitted_cache_keys.add(cache_key)
+
     def rollback(self, transaction = None):
         """Roll back a transaction."""
         if not self.in_transaction:
             raise NotInTransaction
+        for cache_key in self._uncommitted_cache_keys:
+            self._object_cache.invalidate(cache_key)
+        self._uncommitted_cache_keys = set()
         for collection, store in self.stores.items():
             store.rollback()
             indexes = self.indexes[collection]
@@ -175,6 +220,7 @@ class Backend(BaseBackend):
             indexes = self.get_collection_indexes(collection)
             for index in indexes.values():
                 index.commit()
+        self._uncommitted_cache_keys = set()
         self.in_transaction = False
         self.begin()
 
@@ -249,9 +295,17 @@ class Backend(BaseBackend):
         else:
             raise AttributeError('You must either specify params or fields!')
 
+    @property
+    def pk_store_keys(self):
+        return bool(self.config.get('pk_store_keys'))
+
     def get_pk_index(self, collection):
         """Return the primary key index for a given collection.
 
+        If store keys are derived from primary keys, the index is not needed
+        for loading documents, so it gets created as an ephemeral index on
+        first use.
+
         :param collection: the collection for which to return the primary index
 
         :returns: the primary key index of the given collection
@@ -260,9 +314,45 @@ class Backend(BaseBackend):
         cls = self.collections[collection]
 
         if not cls.get_pk_name() in self.indexes[collection]:
-            self.create_index(cls.get_pk_name(), collection)
+            self.create_index(collection, {'key': cls.get_pk_name()},
+                              ephemeral=self.pk_store_keys)
         return self.indexes[collection][cls.get_pk_name()]
 
+    def get_store_keys_for_pk(self, collection, pk, include_uncommitted=False):
+        """Return the store keys of the document with the given primary key.
+
+        :param collection: The name of the collection
+        :param pk: The primary key of the document
+        :param include_uncommitted: Include documents that have not been
+            committed yet
+
+        :returns: A list with the store key of the document, or an empty
+            list if no such document exists
+
+        """
+        if self.pk_store_keys:
+            store = self.get_collection_store(collection)
+            store_key = get_store_key_for_pk(pk)
+            if store.has_blob(store_key,
+                              include_uncommitted=include_uncommitted):
+                return [store_key]
+            return []
+        pk_index = self.get_pk_index(collection)
+        if include_uncommitted:
+            return pk_index.get_keys_for(pk, include_uncommitted=True)
+        return pk_index.get_keys_for(pk)
+
+    def get_all_store_keys(self, collection):
+        """Return the store keys of all (committed) documents of a collection.
+
+        :param collection: The name of the collection
+
+        """
+        if self.pk_store_keys:
+            return self.get_collection_store(collection).get_keys(
+                include_uncommitted=False)
+        return self.get_pk_index(collection).get_all_keys()
+
     def load_config(self, config=None, overwrite_config=False):
         config_file = os.path.join(self._path, "config.json")
         if os.path.exists(config_file):
@@ -306,7 +396,8 @@ class Backend(BaseBackend):
         if collection not in self.stores:
             self.stores[collection] = self.StoreClass({
                 'path': os.path.join(self.path, collection, "objects"),
-                'version': self._config['version']
+                'version': self._config['version'],
+                'memory_limit': self._config['transaction_memory_limit'],
             })
         return self.stores[collection]
 
@@ -324,15 +415,19 @@ class Backend(BaseBackend):
 
     def get_storage_key_for(self, obj):
         collection = self.get_collection_for_obj(obj)
-        pk_index = self.get_pk_index(collection)
         try:
-            return pk_index.get_keys_for(obj.pk)[0]
+            return self.get_store_keys_for_pk(collection, obj.pk)[0]
         except (KeyError, IndexError):
             raise obj.DoesNotExist
 
     def init_indexes(self, collection):
         cls = self.collections[collection]
-        if collection in self._config['indexes']:
+        if self.pk_store_keys:
+            # documents are found by primary key without an index
+            for index_params in self._config['indexes'].get(collection, {}).values():
+                if index_params['key'] != cls.get_pk_name():
+                    self.create_index(collection, index_params)
+        elif collection in self._config['indexes']:
             # If not pk index is present, we create one on the fly...
             if not [idx for idx in self._config['indexes'][collection].values()
                     if idx['key'] == cls.get_pk_name()]:
@@ -413,20 +508,44 @@ class Backend(BaseBackend):
     def decode_attributes(self, data):
         return self.SerializerClass.deserialize(data)
 
-    def get_object(self, cls, key):
+    def get_object(self, cls, key, raw=False):
+        """Load the document with the given store key.
+
+        If `raw` is `True`, the stored (serialized) attributes are returned
+        as a dict instead of a document instance.
+        """
         collection = self.get_collection_for_cls(cls)
-        store = self.get_collection_store(collection)
+        cache_key = (collection, key)
         try:
-            data = self.deserialize(
-                self.decode_attributes(store.get_blob(key)))
-        except IOError:
-            raise cls.DoesNotExist
+            data = self._object_cache.get(cache_key)
+            cached = True
+        except KeyError:
+            store = self.get_collection_store(collection)
+            try:
+                blob = store.get_blob(key)
+            except IOError:
+                raise cls.DoesNotExist
+            data = self.decode_attributes(blob)
+            cached = (self._object_cache.enabled and
+                      cache_key not in self._uncommitted_cache_keys)
+            if cached:
+                self._object_cache.put(cache_key, data, len(blob))
+        if raw:
+            # the cached data is shared between all reads of the document,
+            # freshly decoded data that doesn't go into the cache is not.
+            return copy.deepcopy(data) if cached else data
+        # deserializing the attributes creates new containers, so the cached
+        # data is never shared with (and modified through) the created document.
         obj = self.create_instance(cls, data)
         return obj
 
     def update(self, obj, set_fields = None, unset_fields = None, update_obj = True):
-        """
-        We return the result of the save method (updates are not yet implemented here).
+        """Update the given fields of a document.
+
+        Only the given fields are written to the stored document, and only
+        the indexes whose keys overlap with these fields get updated. If the
+        document has not been stored yet, it is saved as a whole (including
+        the given changes) instead.
         """
         if set_fields:
             if isinstance(set_fields,(list,tuple)):
@@ -453,43 +572,140 @@ class Backend(BaseBackend):
             for key in unset_attributes:
                 delete_value(obj,key)
 
-        return self.save(obj,call_hook = False)
+        collection = self.get_collection_for_obj(obj)
+        store = self.get_collection_store(collection)
+
+        try:
+            store_key = self.get_store_keys_for_pk(
+                collection, obj.pk, include_uncommitted=True).pop()
+            stored_attributes = self._get_stored_attributes(collection, store_key)
+        except (IndexError, KeyError, IOError):
+            if update_obj:
+                return self.save(obj,call_hook = False)
+            #the changes are applied to a copy of the document, which gets saved instead
+            if obj.pk is None:
+                obj.autogenerate_pk()
+            saved_obj = copy.copy(obj)
+            saved_obj.attributes = copy_containers(obj.attributes)
+            for key,value in set_attributes.items():
+                set_value(saved_obj,key,value)
+            for key in unset_attributes:
+                delete_value(saved_obj,key)
+            self.save(saved_obj,call_hook = False)
+            return obj
+
+        for key,value in set_attributes.items():
+            set_value(stored_attributes,key,self.serialize(value))
+        for key in unset_attributes:
+            delete_value(stored_attributes,key)
+
+        store.store_blob(self.encode_attributes(stored_attributes), store_key)
+        self._invalidate_cached_object(collection, store_key)
+
+        updated_keys = list(set_attributes.keys())+list(unset_attributes)
+        for index in self.get_collection_indexes(collection).values():
+            if any(index.key == key or
+                   index.key.startswith(key+'.') or
+                   key.startswith(index.key+'.')
+                   for key in updated_keys):
+                index.add_key(stored_attributes, store_key)
+
+        if self.config['autocommit']:
+            self.commit()
+
+        return obj
+
+    def _get_stored_attributes(self, collection, store_key):
+        """Return a modifiable copy of the serialized attributes of a document."""
+        try:
+            return copy.deepcopy(self._object_cache.get((collection, store_key)))
+        except KeyError:
+            store = self.get_collection_store(collection)
+            if not store.has_blob(store_key):
+                raise KeyError(store_key)
+            return self.decode_attributes(store.get_blob(store_key))
 
     def save(self, obj,call_hook = True):
+        self.save_multiple([obj], call_hook=call_hook)
+        return obj
 
-        if call_hook:
-            self.call_hook('before_save',obj)
+    def save_multiple(self, objs, call_hook=True):
+        """Save a list of documents, committing at most once.
 
-        collection = self.get_collection_for_obj(obj)
+        Documents are grouped by collection. For each collection, the store
+        keys of all documents are looked up first, then all blobs are written
+        and finally each index is updated for the whole batch.
+
+        :param objs: The documents to be saved
+        :type objs: list(Document)
+        :param call_hook: Whether to call the `before_save` hook of the
+            documents
+        :type call_hook: bool
+        :return: The saved documents
+        :rtype: list(Document)
+
+        """
+        objs_by_collection = defaultdict(list)
+        for obj in objs:
+            if call_hook:
+                self.call_hook('before_save',obj)
+            objs_by_collection[self.get_collection_for_obj(obj)].append(obj)
+
+        for collection, collection_objs in objs_by_collection.items():
+            self._save_collection_objects(collection, collection_objs)
+
+        if self.config['autocommit']:
+            self.commit()
+
+        return objs
+
+    def _save_collection_objects(self, collection, objs):
         indexes = self.get_collection_indexes(collection)
         store = self.get_collection_store(collection)
 
-        if obj.pk is None:
-            obj.autogenerate_pk()
+        # store keys assigned within this batch, so that documents with the
+        # same primary key end up in the same blob.
+        batch_store_keys = {}
+        serialized_objects = []
 
-        serialized_attributes = self.serialize(obj.attributes)
-        data = self.encode_attributes(serialized_attributes)
+        for obj in objs:
+            if obj.pk is None:
+                obj.autogenerate_pk()
 
-        try:
-            store_key = (
-                self
-                .get_pk_index(collection)
-                .get_keys_for(obj.pk, include_uncommitted=True).pop()
-            )
-        except IndexError:
-            store_key = uuid.uuid4().hex
+            serialized_attributes = self.serialize(obj.attributes)
+            obj.mark_clean()
 
-        store.store_blob(data, store_key)
+            try:
+                store_key = batch_store_keys[obj.pk]
+            except KeyError:
+                if self.pk_store_keys:
+                    store_key = get_store_key_for_pk(obj.pk)
+                else:
+                    try:
+                        store_key = self.get_store_keys_for_pk(
+                            collection, obj.pk, include_uncommitted=True).pop()
+                    except IndexError:
+                        store_key = uuid.uuid4().hex
+                batch_store_keys[obj.pk] = store_key
 
-        for key, index in indexes.items():
-            index.add_key(serialized_attributes, store_key)
+            serialized_objects.append((serialized_attributes, store_key))
 
-        if self.config['autocommit']:
-            self.commit()
+        for serialized_attributes, store_key in serialized_objects:
+            store.store_blob(self.encode_attributes(serialized_attributes),
+                             store_key)
+            self._invalidate_cached_object(collection, store_key)
 
-        return obj
+        for index in indexes.values():
+            for serialized_attributes, store_key in serialized_objects:
+                index.add_key(serialized_attributes, store_key)
 
     def delete_by_store_keys(self, collection, store_keys):
+        self._delete_by_store_keys(collection, store_keys)
+
+        if self.config['autocommit']:
+            self.commit()
+
+    def _delete_by_store_keys(self, collection, store_keys):
 
         store = self.get_collection_store(collection)
         indexes = self.get_collection_indexes(collection)
@@ -499,23 +715,71 @@ class Backend(BaseBackend):
                 store.delete_blob(store_key)
             except (KeyError, IOError):
                 pass
-            for index in indexes.values():
+            self._invalidate_cached_object(collection, store_key)
+
+        for index in indexes.values():
+            for store_key in store_keys:
                 index.remove_key(store_key)
 
+    def delete_multiple(self, objs):
+        """Delete a list of documents, committing at most once.
+
+        :param objs: The documents to be deleted
+        :type objs: list(Document)
+
+        """
+        store_keys_by_collection = defaultdict(list)
+        for obj in objs:
+            self.call_hook('before_delete',obj)
+            collection = self.get_collection_for_obj(obj)
+            store_keys_by_collection[collection].extend(
+                self.get_store_keys_for_pk(collection, obj.pk))
+
+        for collection, store_keys in store_keys_by_collection.items():
+            self._delete_by_store_keys(collection, store_keys)
+
         if self.config['autocommit']:
             self.commit()
 
     def delete(self, obj):
 
-        self.call_hook('before_delete',obj)
+        return self.delete_multiple([obj])
 
-        collection = self.get_collection_for_obj(obj)
-        primary_index = self.get_pk_index(collection)
-        return self.delete_by_store_keys(
-            collection, primary_index.get_keys_for(obj.pk))
+    def get_by_pk(self, cls, pk, raw=False):
+        collection = self.get_collection_for_cls(cls)
+        store_keys = self.get_store_keys_for_pk(collection, pk)
+        if not store_keys:
+            raise cls.DoesNotExist
+        elif len(store_keys) > 1:
+            raise cls.MultipleDocumentsReturned
+        obj = self.get_object(cls, store_keys[0], raw=raw)
+        if not raw:
+            obj._store_key = store_keys[0]
+        return obj
 
-    def get(self, cls, query):
-        objects = self.filter(cls, query)
+    def get_many_by_pk(self, cls, pks, raw=False):
+        collection = self.get_collection_for_cls(cls)
+        objs = []
+        seen_pks = set()
+        for pk in pks:
+            if pk in seen_pks:
+                continue
+            seen_pks.add(pk)
+            for store_key in self.get_store_keys_for_pk(collection, pk):
+                obj = self.get_object(cls, store_key, raw=raw)
+                if not raw:
+                    obj._store_key = store_key
+                objs.append(obj)
+        return objs
+
+    def get(self, cls, query, raw=False):
+        if (self.pk_store_keys and isinstance(query, dict) and
+                list(query.keys()) == [cls.get_pk_name()]):
+            pk = query[cls.get_pk_name()]
+            if not isinstance(pk, (dict, list, tuple, QuerySet, Document)):
+                # direct read, no index required
+                return self.get_by_pk(cls, pk, raw=raw)
+        objects = self.filter(cls, query, raw=raw)
         if len(objects) == 0:
             raise cls.DoesNotExist
         elif len(objects) > 1:
@@ -588,7 +852,15 @@ class Backend(BaseBackend):
 
         return transform_query(query)
 
-    def filter(self, cls_or_collection, query, initial_keys=None):
+    def filter(self, cls_or_collection, query, initial_keys=None, raw=False):
+        """Filter objects from the database that correspond to a given query.
+
+        If `raw` is `True`, the returned query set yields the stored
+        (serialized) attributes of the documents as dicts, without creating
+        document instances. This is useful for bulk reads, e.g. when the
+        results only get serialized to JSON. Each dict belongs to the caller
+        and can be modified without affecting the object cache.
+        """
 
         if not isinstance(query, dict):
             raise AttributeError('Query parameters must be dict!')
@@ -612,13 +884,15 @@ class Backend(BaseBackend):
                     self,
                     cls,
                     store,
-                    self.get_pk_index(collection).get_all_keys()
+                    self.get_all_store_keys(collection),
+                    raw=raw
                 )
             qs = QuerySet(
                 self,
                 cls,
                 store,
-                indexes[key].get_keys_for(expression)
+                indexes[key].get_keys_for(expression),
+                raw=raw
             )
             return qs
 
@@ -627,7 +901,7 @@ class Backend(BaseBackend):
                     and key not in indexes_to_create
                     and key is not None):
                 indexes_to_create.append(key)
-            return QuerySet(self, cls, store, [])
+            return QuerySet(self, cls, store, [], raw=raw)
 
         # We collect all the indexes that we need to create
         compiled_query(index_collector)
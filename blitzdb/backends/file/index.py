@@ -290,7 +290,8 @@ class Index(object):
         :type store_key: object
 
         """
-        if self._unique and hash_value in self._index:
+        existing_keys = self._index.get(hash_value)
+        if self._unique and existing_keys and existing_keys != [store_key]:
             raise NonUnique('Hash value {} already in index'.format(hash_value))
         if store_key not in self._index[hash_value]:
             self._index[hash_value].append(store_key)
@@ -351,6 +352,8 @@ class Index(object):
         if store_key in self._reverse_index:
             for value in self._reverse_index[store_key]:
                 self._index[value].remove(store_key)
+                if not self._index[value]:
+                    del self._index[value]
             del self._reverse_index[store_key]
 
 
@@ -390,12 +393,14 @@ class TransactionalIndex(Index):
                 not self._undefined_cache):
             return
 
+        # Keys are removed before adding their new values, so that values
+        # replaced within the transaction do not remain in the index.
+        for store_key in self._remove_cache:
+            super(TransactionalIndex, self).remove_key(store_key)
         for store_key, hash_values in self._add_cache.items():
             for hash_value in hash_values:
                 super(TransactionalIndex, self).add_hashed_value(
                     hash_value, store_key)
-        for store_key in self._remove_cache:
-            super(TransactionalIndex, self).remove_key(store_key)
         for store_key in self._undefined_cache:
             super(TransactionalIndex, self).add_undefined(store_key)
         if not self.ephemeral:
@@ -434,8 +439,6 @@ class TransactionalIndex(Index):
             self._add_cache[store_key].append(hash_value)
         if store_key not in self._reverse_add_cache[hash_value]:
             self._reverse_add_cache[hash_value].append(store_key)
-        if store_key in self._remove_cache:
-            del self._remove_cache[store_key]
         if store_key in self._undefined_cache:
             del self._undefined_cache[store_key]
 
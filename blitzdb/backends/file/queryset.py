@@ -13,13 +13,16 @@ class QuerySet(BaseQuerySet):
         self.objects = {}
 
     def filter(self, *args, **kwargs):
+        kwargs.setdefault('raw', self.raw)
         return self.backend.filter(self.cls, *args, initial_keys=self.keys, **kwargs)
 
     def filter_by_key(self, key, expression):
         return self.backend.filter_by_key(self.cls, expression, initial_keys=self.keys)
 
     def _clone(self, keys):
-        return self.__class__(self.backend, self.cls, self.store, copy.copy(keys))
+        return self._copy_load_lazy(
+            self.__class__(self.backend, self.cls, self.store, copy.copy(keys),
+                           raw=self.raw))
 
     def next(self):
         if self._i >= len(self):
@@ -36,22 +39,41 @@ class QuerySet(BaseQuerySet):
         self.keys = self.backend.sort(self.cls, self.keys, key, order)
         return self
 
-    def __init__(self, backend, cls, store, keys):
+    def __init__(self, backend, cls, store, keys, raw=False):
         super(QuerySet, self).__init__(backend, cls)
         self.store = store
         self.keys = list(keys)
+        self.raw = raw
         self.objects = {}
         self.rewind()
 
     def __getitem__(self, i):
         if isinstance(i, slice):
-            return self.__class__(self.backend, self.cls, self.store, self.keys[i])
+            return self._clone(self.keys[i])
         key = self.keys[i]
         if key not in self.objects:
-            self.objects[key] = self.backend.get_object(self.cls, key)
-            self.objects[key]._store_key = key
+            if self._load_lazy and not self.raw:
+                self._load_batch(i if i >= 0 else len(self.keys) + i)
+            else:
+                self._load_object(key)
         return self.objects[key]
 
+    def _load_object(self, key):
+        obj = self.backend.get_object(self.cls, key, raw=self.raw)
+        if not self.raw:
+            obj._store_key = key
+        self.objects[key] = obj
+        return obj
+
+    def _load_batch(self, i):
+        # loads the whole batch containing the i-th document and resolves
+        # the lazy references of all its documents at once
+        start = i - i % self._load_lazy_batch_size
+        objs = [self._load_object(key)
+                for key in self.keys[start:start + self._load_lazy_batch_size]
+                if key not in self.objects]
+        self._resolve_lazy_references(objs)
+
     def __and__(self, other):
         return self._clone(set(self.keys) & set(other.keys))
 
@@ -66,8 +88,7 @@ class QuerySet(BaseQuerySet):
 
     def __invert__(self):
         collection = self.backend.get_collection_for_cls(self.cls)
-        pk_index = self.backend.get_pk_index(collection)
-        all_keys = pk_index.get_all_keys()
+        all_keys = self.backend.get_all_store_keys(collection)
         keys = [key for key in all_keys if key not in self.keys]
         return self._clone(keys)
 
@@ -1,6 +1,12 @@
 import copy
 import os
 import os.path
+import shutil
+import tempfile
+
+# os.replace is not available in Python 2, where os.rename overwrites
+# existing files on POSIX systems as well.
+replace_file = getattr(os, 'replace', os.rename)
 
 
 """
@@ -42,11 +48,16 @@ class Store(object):
         except IOError:
             raise KeyError("Key {} not found!".format(key))
 
-    def has_blob(self, key):
+    def has_blob(self, key, include_uncommitted=True):
         if os.path.exists(self._get_path_for_key(key)):
             return True
         return False
 
+    def get_keys(self, include_uncommitted=True):
+        # names starting with a dot are reserved for internal use
+        return [key for key in os.listdir(self._properties['path'])
+                if not key.startswith('.')]
+
     def begin(self):
         pass
 
@@ -61,16 +72,29 @@ class TransactionalStore(Store):
 
     """
     This class adds transaction support to the Store class.
+
+    Pending blobs are kept in memory until the transaction gets committed. If
+    the `memory_limit` property is given (in bytes), blobs that would exceed
+    this budget are instead spilled to a transaction-private directory within
+    the store path, from where they are moved into place on commit.
     """
 
     def __init__(self, properties):
         super(TransactionalStore, self).__init__(properties)
         self._enabled = True
+        self._spill_path = None
+        self._spilled_keys = set()
         self.begin()
 
+    @property
+    def memory_limit(self):
+        return self._properties.get('memory_limit')
+
     def begin(self):
+        self._remove_spilled_blobs()
         self._delete_cache = set()
         self._update_cache = {}
+        self._update_cache_size = 0
 
     def commit(self):
         try:
@@ -80,23 +104,59 @@ class TransactionalStore(Store):
                     super(TransactionalStore, self).delete_blob(store_key)
             for store_key, blob in self._update_cache.items():
                 super(TransactionalStore, self).store_blob(blob, store_key)
+            for store_key in self._spilled_keys:
+                replace_file(self._get_spill_path_for_key(store_key),
+                             self._get_path_for_key(store_key))
+            self._spilled_keys = set()
         finally:
             self._enabled = True
 
-    def has_blob(self, key):
-        if not self._enabled:
+    def _get_spill_path_for_key(self, key):
+        if self._spill_path is None:
+            self._spill_path = tempfile.mkdtemp(prefix='.transaction-',
+                                                dir=self._properties['path'])
+        return os.path.join(self._spill_path, key)
+
+    def _remove_spilled_blobs(self):
+        if self._spill_path is not None:
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            self._spill_path = None
+        self._spilled_keys = set()
+
+    def _drop_pending_blob(self, key):
+        if key in self._update_cache:
+            self._update_cache_size -= len(self._update_cache.pop(key))
+        elif key in self._spilled_keys:
+            self._spilled_keys.remove(key)
+            os.unlink(self._get_spill_path_for_key(key))
+
+    def has_blob(self, key, include_uncommitted=True):
+        if not self._enabled or not include_uncommitted:
             return super(TransactionalStore, self).has_blob(key)
         if key in self._delete_cache:
             return False
-        if key in self._update_cache:
+        if key in self._update_cache or key in self._spilled_keys:
             return True
         return super(TransactionalStore, self).has_blob(key)
 
+    def get_keys(self, include_uncommitted=True):
+        keys = super(TransactionalStore, self).get_keys()
+        if not self._enabled or not include_uncommitted:
+            return keys
+        keys = set(keys)
+        keys -= self._delete_cache
+        keys.update(self._update_cache.keys())
+        keys.update(self._spilled_keys)
+        return list(keys)
+
     def get_blob(self, key):
         if not self._enabled:
             return super(TransactionalStore, self).get_blob(key)
         if key in self._update_cache:
             return self._update_cache[key]
+        if key in self._spilled_keys:
+            with open(self._get_spill_path_for_key(key), "rb") as input_file:
+                return input_file.read()
         return super(TransactionalStore, self).get_blob(key)
 
     def store_blob(self, blob, key, *args, **kwargs):
@@ -104,7 +164,15 @@ class TransactionalStore(Store):
             return super(TransactionalStore, self).store_blob(blob, key, *args, **kwargs)
         if key in self._delete_cache:
             self._delete_cache.remove(key)
-        self._update_cache[key] = copy.copy(blob)
+        self._drop_pending_blob(key)
+        memory_limit = self.memory_limit
+        if memory_limit is not None and self._update_cache_size + len(blob) > memory_limit:
+            with open(self._get_spill_path_for_key(key), "wb") as output_file:
+                output_file.write(blob)
+            self._spilled_keys.add(key)
+        else:
+            self._update_cache[key] = copy.copy(blob)
+            self._update_cache_size += len(blob)
         return key
 
     def delete_blob(self, key, *args, **kwargs):
@@ -113,9 +181,10 @@ class TransactionalStore(Store):
         if not self.has_blob(key):
             raise KeyError("Key %s not found!" % key)
         self._delete_cache.add(key)
-        if key in self._update_cache:
-            del self._update_cache[key]
+        self._drop_pending_blob(key)
 
     def rollback(self):
+        self._remove_spilled_blobs()
         self._delete_cache = set()
         self._update_cache = {}
+        self._update_cache_size = 0
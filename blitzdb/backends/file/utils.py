@@ -1,5 +1,13 @@
 import datetime
+import hashlib
 import json
+import re
+
+import six
+
+# primary keys matching this pattern are used as store keys without changes (upper-case
+# letters are excluded, as keys that only differ in case collide on case-insensitive file systems)
+_safe_store_key = re.compile(r'[a-z0-9_\-]{1,64}\Z')
 
 
 class JsonEncoder(json.JSONEncoder):
@@ -10,3 +18,28 @@ class JsonEncoder(json.JSONEncoder):
         elif isinstance(obj, datetime.datetime):
             return obj.ctime()
         return json.JSONEncoder.default(self, obj)
+
+
+def get_store_key_for_pk(pk):
+    """Return a store key that is derived deterministically from a primary key.
+
+    Short string keys that only contain safe characters (lower-case letters,
+    digits, `_` and `-`) are used as they are, all other keys are hashed. Hashed keys start with a `%` character, so they
+    cannot collide with keys that are used directly.
+
+    :param pk: The primary key of a document
+    :type pk: object
+    :return: The store key
+    :rtype: str
+
+    """
+    if isinstance(pk, six.string_types):
+        if _safe_store_key.match(pk):
+            return str(pk)
+        type_name = 'str'
+    elif isinstance(pk, six.integer_types) and not isinstance(pk, bool):
+        type_name = 'int'
+    else:
+        type_name = type(pk).__name__
+    value = u'{}:{}'.format(type_name, pk).encode('utf-8')
+    return '%' + hashlib.sha1(value).hexdigest()
@@ -3,7 +3,6 @@ import traceback
 import uuid
 from collections import defaultdict
 
-import pymongo
 import six
 
 from blitzdb.backends.base import Backend as BaseBackend
@@ -18,6 +17,10 @@ class DotEncoder(object):
 
     DOT_MAGIC_VALUE = ":a5b8afc131:"
 
+    needs_path = False
+    encode_types = (dict,)
+    decode_types = (dict,)
+
     @classmethod
     def encode(cls,obj,path):
         def replace_key(key):
@@ -155,6 +158,7 @@ class Backend(BaseBackend):
             if obj.pk == None:
                 obj.pk = uuid.uuid4().hex
             serialized_attributes = self.serialize(obj.attributes)
+            obj.mark_clean()
             serialized_attributes['_id'] = obj.pk
             serialized_attributes_list.append(serialized_attributes)
         for attributes in serialized_attributes_list:
@@ -283,9 +287,11 @@ class Backend(BaseBackend):
             opts = kwargs['opts']
         else:
             opts = {}
+        from pymongo.errors import OperationFailure
+
         try:
             self.db[collection].ensure_index(list(kwargs['fields'].items()), **opts)
-        except pymongo.errors.OperationFailure as failure:
+        except OperationFailure as failure:
             traceback.print_exc()
             #The index already exists with different options, so we drop it and recreate it...
             self.db[collection].drop_index(list(kwargs['fields'].items()))
@@ -346,6 +352,54 @@ class Backend(BaseBackend):
             raise cls.MultipleDocumentsReturned
         return queryset[0]
 
+    def get_by_pk(self, cls_or_collection, pk, raw=False, only=None):
+        objs = self.get_many_by_pk(cls_or_collection, [pk], raw=raw, only=only)
+        if not objs:
+            if not isinstance(cls_or_collection, six.string_types):
+                raise cls_or_collection.DoesNotExist
+            raise self.get_cls_for_collection(cls_or_collection).DoesNotExist
+        return objs[0]
+
+    def get_many_by_pk(self, cls_or_collection, pks, raw=False, only=None):
+        """
+        Retrieve several objects by their primary keys, using a single `$in` query on `_id`.
+
+        See :py:meth:`blitzdb.backends.base.Backend.get_many_by_pk` for documentation of individual parameters
+        """
+        if not isinstance(cls_or_collection, six.string_types):
+            collection = self.get_collection_for_cls(cls_or_collection)
+            cls = cls_or_collection
+        else:
+            collection = cls_or_collection
+            cls = self.get_cls_for_collection(collection)
+
+        pks = list(pks)
+        if not pks:
+            return []
+
+        args = {}
+        if only:
+            if isinstance(only,tuple):
+                args['projection'] = list(only)
+            else:
+                args['projection'] = only
+
+        if len(pks) == 1:
+            query = {'_id': pks[0]}
+        else:
+            query = {'_id': {'$in': pks}}
+
+        objs_by_pk = {}
+        for obj in QuerySet(self, cls, self.db[collection].find(query, **args), raw=raw, only=only):
+            #raw documents always contain their primary key as `_id` (even with a projection)
+            objs_by_pk[obj['_id'] if raw else obj.pk] = obj
+
+        objs = []
+        for pk in pks:
+            if pk in objs_by_pk:
+                objs.append(objs_by_pk.pop(pk))
+        return objs
+
     def filter(self, cls_or_collection, query, raw=False, only=None):
         """
         Filter objects from the database that correspond to a given set of properties.
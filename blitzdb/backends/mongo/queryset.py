@@ -1,3 +1,5 @@
+from collections import deque
+
 from blitzdb.queryset import QuerySet as BaseQuerySet
 
 
@@ -11,6 +13,7 @@ class QuerySet(BaseQuerySet):
         self._cursor = cursor
         self._raw = raw
         self._only = only
+        self._buffer = deque()
 
     def __iter__(self):
         return self
@@ -27,9 +30,25 @@ class QuerySet(BaseQuerySet):
         return self.backend.create_instance(self.cls, deserialized_attributes)
 
     def as_list(self):
-        return [self._create_object_for(json) for json in list(self._cursor)]
+        objs = [self._create_object_for(json) for json in list(self._cursor)]
+        if not self._raw:
+            batch_size = self._load_lazy_batch_size
+            for i in range(0, len(objs), batch_size):
+                self._resolve_lazy_references(objs[i:i+batch_size])
+        return objs
 
     def next(self):
+        if self._load_lazy and not self._raw:
+            #we fetch a whole batch of documents and resolve their references at once
+            if not self._buffer:
+                for json_attributes in self._cursor:
+                    self._buffer.append(self._create_object_for(json_attributes))
+                    if len(self._buffer) >= self._load_lazy_batch_size:
+                        break
+                if not self._buffer:
+                    raise StopIteration
+                self._resolve_lazy_references(self._buffer)
+            return self._buffer.popleft()
         json_attributes = next(self._cursor)
         obj = self._create_object_for(json_attributes)
         return obj
@@ -50,11 +69,14 @@ class QuerySet(BaseQuerySet):
             if stop < 0:
                 stop = self._cursor.count() + stop
             key = slice(start, stop)
-            return self.__class__(self.backend, self.cls, self._cursor.__getitem__(key), raw=self._raw)
+            return self._copy_load_lazy(
+                self.__class__(self.backend, self.cls, self._cursor.__getitem__(key), raw=self._raw))
         if key < 0:
             key = self._cursor.count() + key
         json_attributes = self._cursor[key]
         obj = self._create_object_for(json_attributes)
+        if not self._raw:
+            self._resolve_lazy_references([obj])
         return obj
 
     def __contains__(self, obj):
@@ -70,6 +92,7 @@ class QuerySet(BaseQuerySet):
 
     def rewind(self):
         self._cursor.rewind()
+        self._buffer = deque()
 
     def delete(self):
         self.backend.delete_by_primary_keys(self.cls, self._cursor.distinct('_id'))
@@ -1 +1,2 @@
 from .backend import Backend
+from .queryset import SelectIn
@@ -1,18 +1,24 @@
+import datetime
+import hashlib
+import json
 import logging
 import re
 import uuid
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import sys
 from types import LambdaType
 
 import six
+from sqlalchemy.engine.reflection import Inspector
 from sqlalchemy.ext.compiler import compiles
-from sqlalchemy.schema import Column, ForeignKey, MetaData, Table, \
+from sqlalchemy.schema import Column, ForeignKey, Index, MetaData, Table, \
     UniqueConstraint
-from sqlalchemy.sql import and_, expression, func, not_, null, or_, select
+from sqlalchemy.sql import and_, bindparam, expression, func, not_, null, or_, select
+from sqlalchemy.sql.expression import BindParameter, Insert
 from sqlalchemy.types import Boolean, Date, DateTime, Enum, Float, Integer, \
     LargeBinary, String, Text
 
+from blitzdb.cache import LRUCache
 from blitzdb.fields import BaseField, BinaryField, BooleanField, CharField, \
     DateField, DateTimeField, EnumField, FloatField, ForeignKeyField, \
     IntegerField, ManyToManyField, OneToManyField, TextField
@@ -22,20 +28,64 @@ from ...document import Document
 from ..base import Backend as BaseBackend
 from ..base import DoNotSerialize
 from ..file.serializers import JsonSerializer
-from .queryset import QuerySet
+from .queryset import BULK_CHUNK_SIZE, QuerySet, SelectIn
 from .relations import ManyToManyProxy
 
 logger = logging.getLogger(__name__)
 
 PatternType = re.Pattern if sys.version_info >= (3,7) else re._pattern_type
 
+#values of these types are passed to cached queries as bind parameters
+PARAMETER_TYPES = six.string_types + six.integer_types + (float,datetime.date,datetime.datetime)
+
+#values of these types can be compared with values in the JSON data of a document
+JSON_VALUE_TYPES = six.string_types + six.integer_types + (float,)
+
+
+def get_sqlite_json_path(key):
+    """
+    Returns the SQLite JSON path for the given (dotted) key.
+    """
+    return '$'+''.join('."%s"' % key_fragment for key_fragment in key.split('.'))
+
+
+class QueryNotCacheable(Exception):
+    """
+    Gets raised if the compiled form of a query can't be reused for other queries with the same shape.
+    """
+
 
 @compiles(DateTime, "sqlite")
 def compile_binary_sqlite(type_, compiler, **kw):
     return "VARCHAR(64)"
 
+
+class SqliteUpsert(Insert):
+
+    """
+    An `INSERT ... ON CONFLICT ... DO UPDATE` statement for SQLite (>= 3.24), which updates the
+    given columns of an existing row with the values of the row that should have been inserted.
+    """
+
+    def __init__(self, table, index_columns, update_columns, **kwargs):
+        super(SqliteUpsert, self).__init__(table, **kwargs)
+        self.index_columns = index_columns
+        self.update_columns = update_columns
+
+
+@compiles(SqliteUpsert, "sqlite")
+def compile_sqlite_upsert(insert, compiler, **kw):
+    preparer = compiler.preparer
+    return "%s ON CONFLICT (%s) DO UPDATE SET %s" % (
+        compiler.visit_insert(insert, **kw),
+        ", ".join(preparer.quote(column) for column in insert.index_columns),
+        ", ".join("%s = excluded.%s" % (preparer.quote(column),preparer.quote(column))
+                  for column in insert.update_columns))
+
 class ExcludedFieldsEncoder(object):
 
+    needs_path = True
+
     def __init__(self,backend,collection):
         self.collection = collection
         self.backend = backend
@@ -67,19 +117,27 @@ class Backend(BaseBackend):
 
         #create a new BlitzDB backend using a SQLAlchemy engine
         backend = SQLBackend(my_engine)
+
+    Compiled queries are cached by their shape (i.e. the query with all values replaced by
+    parameters), so that repeated queries only need to bind new values. The number of cached
+    statements can be set through the `statement_cache_size` parameter (`0` disables the cache),
+    see :py:meth:`get_statement_cache_stats` for the hit rate of the cache.
     """
 
     class Meta(BaseBackend.Meta):
         pass
 
-    def __init__(self, engine, table_postfix = '',ondelete='CASCADE', create_schema = False,**kwargs):
+    def __init__(self, engine, table_postfix = '',ondelete='CASCADE', create_schema = False,
+                 statement_cache_size = 256,**kwargs):
         super(Backend, self).__init__(**kwargs)
 
+        self._statement_cache = LRUCache(statement_cache_size)
         self._engine_getter = engine
         self._engine = None
         self._ondelete = ondelete
         self._schema_initialized = False
         self._relationship_classes = []
+        self._indexes = defaultdict(list)
         self._transactions = []
         self.table_postfix = table_postfix
 
@@ -178,7 +236,19 @@ class Backend(BaseBackend):
     def metadata(self):
         return self._metadata
 
+    def get_statement_cache_stats(self):
+        """
+        Returns the statistics of the statement cache: the number of hits and misses (and the
+        resulting hit rate), evictions and the number of cached statements.
+        """
+        stats = self._statement_cache.get_stats()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = float(stats['hits']) / lookups if lookups else 0.0
+        return stats
+
     def init_schema(self):
+        #cached statements refer to the tables of the old schema
+        self._statement_cache.clear()
 
         self._collection_tables = {}
         self._index_tables = defaultdict(dict)
@@ -434,12 +504,20 @@ class Backend(BaseBackend):
                 name = 'unique_together_%s_%s' % (collection,'_'.join(columns))
                 extra_columns.append(UniqueConstraint(*columns,name = name))
 
-        if table is None:
+        new_table = table is None
+        if new_table:
             table = Table('%s%s' % (collection,self.table_postfix),self._metadata,
                             Column('data',LargeBinary),
                             *extra_columns
                         )
         self._collection_tables[collection] = table
+        if new_table:
+            #indexes can refer to the columns of the table (and to the collection in partial conditions)
+            for index_params in list(meta_attributes.get('indexes',[])) + self._indexes[collection]:
+                index = self.get_index(collection,table,index_params['fields'],**self._get_index_opts(index_params))
+                if index is None:
+                    logger.warning("Cannot create index over {} for collection {} with this database".format(
+                        ', '.join(index_params['fields']),collection))
 
     def get_collection_table(self,collection):
         return self._collection_tables[collection]
@@ -485,11 +563,13 @@ class Backend(BaseBackend):
             del self.connection
 
     def replace_engine(self,engine):
+        self._statement_cache.clear()
         self._engine = engine
         self._conn = None
         self._transactions = []
 
     def replace_engine_getter(self,engine_getter):
+        self._statement_cache.clear()
         self._engine_getter = engine_getter
         self._engine = None
         self._conn = None
@@ -617,36 +697,57 @@ class Backend(BaseBackend):
             if not 'pk' in set_fields or set_fields['pk'] is None:
                 del d['pk']
 
-            #if we have to update the JSON data
+            #if we have to update the JSON data, we do it within the database if we can
+            data_condition = None
             if data_set_keys or data_unset_keys:
-                result = self.connection.execute(select([table.c.data]).where(table.c.pk == expression.cast(obj.pk,pk_type)))
-                data_row = result.fetchone()
-                if data_row is None:
-                    raise obj.DoesNotExist("Object does not exist!")
-                data = self.deserialize_json(data_row[0])
-                for key,value in data_set_keys.items():
-                    set_value(data,key,value)
-                for key in data_unset_keys:
-                    delete_value(data,key)
-                self.connection.execute(table.update()\
-                                        .values({'data' : expression.cast(self.serialize_json(self.serialize(data)),LargeBinary)})\
-                                        .where(table.c.pk == expression.cast(obj.pk,pk_type)))
-
-            for delete in deletes:
-                self.connection.execute(delete)
-
-            for insert in inserts:
-                self.connection.execute(insert)
+                data_expression = self.get_json_update_expression(table,
+                    dict((key,self.serialize_json(self.serialize(value)).decode('utf-8'))
+                         for key,value in data_set_keys.items()),
+                    data_unset_keys)
+                if data_expression is not None:
+                    d['data'] = data_expression
+                    data_condition = self.get_json_update_condition(table,data_set_keys)
+                else:
+                    self._update_json_data(obj,table,data_set_keys,data_unset_keys)
+
+            self._execute_relation_changes(deletes,inserts)
 
             if d:
-                update = table.update().values(**d).where(table.c.pk == expression.cast(obj.pk,pk_type))
-                result = self.connection.execute(update)
+                condition = table.c.pk == expression.cast(obj.pk,pk_type)
+                if data_condition is not None:
+                    condition = and_(condition,data_condition)
+                result = self.connection.execute(table.update().values(**d).where(condition))
                 if not result.rowcount:
-                    raise obj.DoesNotExist("Object does not exist!")
+                    if data_condition is None:
+                        raise obj.DoesNotExist("Object does not exist!")
+                    #a nested key goes through a value that is not an object, which only Python can replace
+                    del d['data']
+                    self._update_json_data(obj,table,data_set_keys,data_unset_keys)
+                    if d:
+                        self.connection.execute(table.update().values(**d)\
+                                                .where(table.c.pk == expression.cast(obj.pk,pk_type)))
 
             return obj
 
 
+    def _update_json_data(self,obj,table,set_values,unset_keys):
+        """
+        Updates the JSON `data` column of the given document by reading, modifying and writing it.
+        """
+        pk_type = self._index_fields[self.get_collection_for_cls(obj.__class__)]['pk']['type']
+        result = self.connection.execute(select([table.c.data]).where(table.c.pk == expression.cast(obj.pk,pk_type)))
+        data_row = result.fetchone()
+        if data_row is None:
+            raise obj.DoesNotExist("Object does not exist!")
+        data = self.deserialize_json(data_row[0])
+        for key,value in set_values.items():
+            set_value(data,key,value)
+        for key in unset_keys:
+            delete_value(data,key)
+        self.connection.execute(table.update()\
+                                .values({'data' : expression.cast(self.serialize_json(self.serialize(data)),LargeBinary)})\
+                                .where(table.c.pk == expression.cast(obj.pk,pk_type)))
+
     def serialize_json(self,data):
         return JsonSerializer.serialize(data)
 
@@ -655,8 +756,9 @@ class Backend(BaseBackend):
             return JsonSerializer.deserialize(data)
         return {}
 
-    def _serialize_and_update_indexes(self,obj,collection,d,for_update = False):
+    def _serialize_and_update_indexes(self,obj,collection,d,for_update = False,plain = False):
 
+        #if `plain` is True, the values are not wrapped in SQL expressions (as required by executemany)
         pk_type = self._index_fields[collection]['pk']['type']
 
         for index_field,index_params in self._index_fields[collection].items():
@@ -668,9 +770,9 @@ class Backend(BaseBackend):
                 if value is None:
                     if not index_params['field'].nullable:
                         raise ValueError("Value for %s is `None`, but this is a mandatory field!" % index_field)
-                    d[index_params['column']] = null()
+                    d[index_params['column']] = None if plain else null()
                 else:
-                    d[index_params['column']] = expression.cast(value,index_params['type'])
+                    d[index_params['column']] = value if plain else expression.cast(value,index_params['type'])
             except KeyError:
                 if for_update:
                     continue
@@ -679,9 +781,9 @@ class Backend(BaseBackend):
                 elif not index_params['field'].nullable:
                     raise ValueError("No value for %s given, but this is a mandatory field!" % index_field)
                 else:
-                    d[index_params['column']] = null()
+                    d[index_params['column']] = None if plain else null()
 
-    def _serialize_and_update_relations(self,obj,collection,d,deletes,inserts,autosave_dependent = True,for_update = False, save_cache=None):
+    def _serialize_and_update_relations(self,obj,collection,d,deletes,inserts,autosave_dependent = True,for_update = False, save_cache=None, plain = False):
 
         pk_type = self._index_fields[collection]['pk']['type']
 
@@ -700,7 +802,8 @@ class Backend(BaseBackend):
                     if isinstance(value,ManyToManyProxy):
                         continue
                     relationship_table = self._relationship_tables[collection][related_field]
-                    deletes.append(relationship_table.delete().where(relationship_table.c[relation_params['pk_field_name']] == expression.cast(obj['pk'],pk_type)))
+                    deletes.append((relationship_table,relation_params['pk_field_name'],
+                                    relation_params['related_pk_field_name'],obj['pk']))
                     for element in value:
                         if not isinstance(element,Document):
                             raise AttributeError("ManyToMany field %s contains an invalid value!" % related_field)
@@ -712,12 +815,12 @@ class Backend(BaseBackend):
                             relation_params['pk_field_name'] : obj['pk'],
                             relation_params['related_pk_field_name'] : element.pk,
                         }
-                        inserts.append(relationship_table.insert().values(**ed))
+                        inserts.append((relationship_table,ed))
                 elif isinstance(relation_params['field'],ForeignKeyField):
                     if value is None:
                         if not relation_params['field'].nullable:
                             raise AttributeError("Field %s cannot be None!" % related_field)
-                        d[relation_params['column']] = null()
+                        d[relation_params['column']] = None if plain else null()
                     elif not isinstance(value,Document):
                         raise AttributeError("Field %s must be a document!" % related_field)
                     else:
@@ -725,7 +828,7 @@ class Backend(BaseBackend):
                             self.save(value, save_cache=save_cache)
                         if value.pk is None:
                             raise AttributeError("Related document in field %s has no primary key!" % related_field)
-                        d[relation_params['column']] = expression.cast(value.pk,relation_params['type'])
+                        d[relation_params['column']] = value.pk if plain else expression.cast(value.pk,relation_params['type'])
 
             except KeyError:
                 if for_update:
@@ -733,7 +836,359 @@ class Backend(BaseBackend):
                 if isinstance(relation_params['field'],ForeignKeyField):
                     if not relation_params['field'].nullable:
                         raise ValueError("No value for %s given, but this is a mandatory field!" % relation_params['key'])
-                    d[relation_params['column']] = null()
+                    d[relation_params['column']] = None if plain else null()
+
+    def _execute_relation_changes(self,deletes,inserts):
+        """
+        Executes the changes of many-to-many relationships collected by
+        `_serialize_and_update_relations`: `deletes` contains the documents whose relationship rows
+        get replaced by the rows in `inserts`. Only the difference between the existing and the new
+        rows gets written, using one batched `DELETE` and one `INSERT` per relationship table.
+        """
+        replaced = OrderedDict()
+        for relationship_table,pk_field_name,related_pk_field_name,pk in deletes:
+            replaced.setdefault(relationship_table,(pk_field_name,related_pk_field_name,OrderedDict()))[2][pk] = True
+
+        insert_rows = OrderedDict()
+        for relationship_table,row in inserts:
+            insert_rows.setdefault(relationship_table,[]).append(row)
+
+        for relationship_table,rows in insert_rows.items():
+            if not relationship_table in replaced:
+                self.connection.execute(relationship_table.insert(),rows)
+
+        for relationship_table,(pk_field_name,related_pk_field_name,pks) in replaced.items():
+            rows = insert_rows.get(relationship_table,[])
+            existing_rows = self._get_relation_rows(relationship_table,pk_field_name,
+                                                    related_pk_field_name,list(pks))
+            pk_column = relationship_table.c[pk_field_name]
+            related_pk_column = relationship_table.c[related_pk_field_name]
+            new_rows = OrderedDict()
+            for row in rows:
+                new_rows[(self._normalize_value(pk_column,row[pk_field_name]),
+                          self._normalize_value(related_pk_column,row[related_pk_field_name]))] = row
+
+            obsolete_rows = [{'_pk' : pk,'_related_pk' : related_pk}
+                             for pk,related_pk in existing_rows if not (pk,related_pk) in new_rows]
+            if obsolete_rows:
+                self.connection.execute(relationship_table.delete()\
+                    .where(and_(relationship_table.c[pk_field_name] == bindparam('_pk'),
+                                relationship_table.c[related_pk_field_name] == bindparam('_related_pk'))),
+                    obsolete_rows)
+
+            missing_rows = [row for key,row in new_rows.items() if not key in existing_rows]
+            if missing_rows:
+                self.connection.execute(relationship_table.insert(),missing_rows)
+
+    def _get_relation_rows(self,relationship_table,pk_field_name,related_pk_field_name,pks,related_pks = None):
+        """
+        Returns the `(pk, related_pk)` tuples of the rows in the given relationship table that
+        belong to the given documents (and, optionally, to the given related documents), with the
+        values normalized by `_normalize_value`.
+        """
+        pk_column = relationship_table.c[pk_field_name]
+        related_pk_column = relationship_table.c[related_pk_field_name]
+        rows = set()
+        for i in range(0,len(pks),BULK_CHUNK_SIZE):
+            condition = pk_column.in_(pks[i:i+BULK_CHUNK_SIZE])
+            if related_pks is None:
+                chunks = [condition]
+            else:
+                chunks = [and_(condition,related_pk_column.in_(related_pks[j:j+BULK_CHUNK_SIZE]))
+                          for j in range(0,len(related_pks),BULK_CHUNK_SIZE)]
+            for chunk_condition in chunks:
+                result = self.connection.execute(select([pk_column,related_pk_column]).where(chunk_condition))
+                rows.update((self._normalize_value(pk_column,row[0]),
+                             self._normalize_value(related_pk_column,row[1])) for row in result.fetchall())
+        return rows
+
+    def _normalize_value(self,column,value):
+        """
+        Converts the given value to the Python type of the given column, so that values given by
+        the user can be compared with the ones returned by the database (e.g. `1` and `'1'`).
+        """
+        if value is None:
+            return value
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return value
+        if isinstance(value,python_type):
+            return value
+        try:
+            return python_type(value)
+        except (TypeError,ValueError):
+            return value
+
+    def get_upsert_statement(self,table,update_columns):
+        """
+        Returns an `INSERT` statement for the given table that updates the given columns of the
+        existing row instead if a row with the same primary key exists already, or `None` if the
+        database does not support this.
+        """
+        dialect = self.engine.dialect
+        if dialect.name == 'sqlite':
+            sqlite_version = getattr(dialect.dbapi,'sqlite_version_info',(0,))
+            if sqlite_version < (3,24,0):
+                return None
+            return SqliteUpsert(table,['pk'],update_columns)
+        elif dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            statement = insert(table)
+            return statement.on_conflict_do_update(
+                index_elements = [table.c.pk],
+                set_ = dict((column,statement.excluded[column]) for column in update_columns))
+        elif dialect.name == 'mysql':
+            try:
+                from sqlalchemy.dialects.mysql import insert
+            except ImportError:
+                return None
+            statement = insert(table)
+            return statement.on_duplicate_key_update(
+                dict((column,statement.inserted[column]) for column in update_columns))
+        return None
+
+    def get_json_update_expression(self,table,set_values,unset_keys):
+        """
+        Returns an expression that sets the given (dotted) keys of the JSON `data` column of the
+        given table to the given (JSON-encoded) values and removes the given keys, or `None` if the
+        database does not support this. Like `set_value`, SQLite creates missing intermediate
+        objects; on PostgreSQL only top-level keys are supported.
+        """
+        for key in list(set_values)+list(unset_keys):
+            if not isinstance(key,six.string_types) or '"' in key:
+                return None
+        dialect = self.engine.dialect
+        if dialect.name == 'sqlite':
+            sqlite_version = getattr(dialect.dbapi,'sqlite_version_info',(0,))
+            if sqlite_version < (3,9,0):
+                return None
+            data = func.coalesce(func.nullif(expression.cast(table.c.data,Text),''),'{}')
+            if set_values:
+                arguments = []
+                for key,value in set_values.items():
+                    arguments.extend([get_sqlite_json_path(key),func.json(value)])
+                data = func.json_set(data,*arguments)
+            if unset_keys:
+                data = func.json_remove(data,*[get_sqlite_json_path(key) for key in unset_keys])
+            return expression.cast(data,LargeBinary)
+        elif dialect.name == 'postgresql':
+            if any('.' in key for key in list(set_values)+list(unset_keys)):
+                return None
+            from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array
+            data = expression.cast(func.coalesce(func.nullif(func.convert_from(table.c.data,'UTF8'),''),'{}'),JSONB)
+            for key,value in set_values.items():
+                data = func.jsonb_set(data,expression.cast(array([key]),ARRAY(Text)),expression.cast(value,JSONB))
+            for key in unset_keys:
+                data = data.op('-')(key)
+            return func.convert_to(expression.cast(data,Text),'UTF8')
+        return None
+
+    def get_json_update_condition(self,table,set_keys):
+        """
+        Returns a condition that holds if the expression of :py:meth:`get_json_update_expression`
+        can set the given (dotted) keys, or `None` if no condition is needed. SQLite's `json_set`
+        ignores paths that go through values that are not objects, whereas `set_value` replaces
+        these values with objects.
+        """
+        if self.engine.dialect.name != 'sqlite':
+            return None
+        data = func.coalesce(func.nullif(expression.cast(table.c.data,Text),''),'{}')
+        conditions = []
+        prefixes = set()
+        for key in set_keys:
+            key_fragments = key.split('.')
+            for i in range(1,len(key_fragments)):
+                prefixes.add('.'.join(key_fragments[:i]))
+        for prefix in sorted(prefixes):
+            json_type = func.json_type(data,get_sqlite_json_path(prefix))
+            conditions.append(or_(json_type == None,json_type == 'object'))
+        if not conditions:
+            return None
+        return and_(*conditions)
+
+    def get_json_expression(self,table,key,value = None,for_index = False):
+        """
+        Returns an expression that extracts the value with the given (dotted) key from the JSON
+        `data` column of the given table, or `None` if the database does not support this. If the
+        database returns the value as text, it is cast to the type of the given value so that the
+        two can be compared. If `for_index` is `True`, only expressions that can be indexed are
+        returned.
+        """
+        if '"' in key or "'" in key:
+            return None
+        if isinstance(value,BindParameter):
+            value = value.value
+        dialect = self.engine.dialect
+        if dialect.name == 'sqlite':
+            sqlite_version = getattr(dialect.dbapi,'sqlite_version_info',(0,))
+            if sqlite_version < (3,9,0):
+                return None
+            #the path is given as a literal so that the expression can match an index
+            return func.json_extract(expression.cast(table.c.data,Text),
+                                     expression.literal_column("'%s'" % get_sqlite_json_path(key)))
+        elif dialect.name == 'postgresql' and not for_index:
+            from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array
+            data = expression.cast(func.convert_from(table.c.data,'UTF8'),JSONB)
+            extracted = data.op('#>>')(expression.cast(array(key.split('.')),ARRAY(Text)))
+            if isinstance(value,bool):
+                return expression.cast(extracted,Boolean)
+            elif isinstance(value,six.integer_types+(float,)):
+                return expression.cast(extracted,Float)
+            return extracted
+        return None
+
+    def get_index(self,collection,table,fields,name = None,unique = False,where = None):
+        """
+        Returns an index over the given fields of the given collection table. Fields that are
+        not stored in a column of the table get indexed through their JSON path expression (see
+        :py:meth:`get_json_expression`), or `None` is returned if this is not supported.
+
+        `fields` is either a list of keys or a dictionary that maps the keys to their sort
+        direction (1 or -1). If `where` is given, the index only covers the rows that match this
+        query (partial index, see :py:meth:`get_index_condition`). The default name of the index
+        contains the collection, the fields and the options, and an `AttributeError` is raised if
+        an index with the same name but a different definition exists already.
+        """
+        if isinstance(fields,dict):
+            fields = list(fields.items())
+        else:
+            fields = [(key,1) for key in fields]
+        where_key = json.dumps(where,sort_keys = True,default = repr) if where is not None else None
+        definition = (tuple(fields),bool(unique),where_key)
+        if name is None:
+            name = 'ix_%s_%s' % (collection,'_'.join(re.sub(r'[^\w]+','_',key)+('_desc' if direction < 0 else '')
+                                                     for key,direction in fields))
+            if unique:
+                name += '_unique'
+            if where_key is not None:
+                name += '_'+hashlib.sha1(where_key.encode('utf-8')).hexdigest()[:8]
+        for index in table.indexes:
+            if index.name != name:
+                continue
+            if index.info.get('definition',self._get_column_index_definition(collection,index)) == definition:
+                return index
+            raise AttributeError("An index with the name %s but a different definition exists already!" % name)
+        columns = []
+        for key,direction in fields:
+            if key in self._table_columns[collection]:
+                column = table.c[self._table_columns[collection][key]['column']]
+            else:
+                column = self.get_json_expression(table,key,for_index = True)
+                if column is None:
+                    return None
+            columns.append(column.desc() if direction < 0 else column)
+        kwargs = {}
+        if where is not None:
+            dialect = self.engine.dialect
+            if not dialect.name in ('sqlite','postgresql'):
+                raise AttributeError("Partial indexes are not supported with %s!" % dialect.name)
+            kwargs['%s_where' % dialect.name] = self.get_index_condition(collection,table,where)
+        #indexes over expressions only are not attached to their table automatically
+        return Index(name,*columns,unique = unique,_table = table,info = {'definition' : definition},**kwargs)
+
+    def _get_column_index_definition(self,collection,index):
+        """
+        Returns the definition (as used by :py:meth:`get_index`) of the index of an indexed field.
+        """
+        columns = [column.name for column in index.columns]
+        for key,params in self._table_columns[collection].items():
+            if [params['column']] == columns:
+                return (((key,1),),bool(index.unique),None)
+        return None
+
+    def get_index_condition(self,collection,table,query):
+        """
+        Compiles the given query to the condition of a partial index over the given table. The
+        query uses the syntax of :py:meth:`filter`, but it can only refer to the keys of the
+        collection itself (stored in a column or in the JSON data), compare them with plain
+        values and use the `$and`, `$or`, `$not`, `$ne`, `$lt`, `$lte`, `$gt`, `$gte`, `$in`
+        and `$nin` operators.
+        """
+        comparisons = {
+            '$eq' : lambda column,value: column == value,
+            '$ne' : lambda column,value: column != value,
+            '$lt' : lambda column,value: column < value,
+            '$lte' : lambda column,value: column <= value,
+            '$gt' : lambda column,value: column > value,
+            '$gte' : lambda column,value: column >= value,
+            '$in' : lambda column,values: column.in_(values),
+            '$nin' : lambda column,values: not_(column.in_(values)),
+        }
+
+        def check_value(value):
+            if not (value is None or isinstance(value,PARAMETER_TYPES+(bool,))):
+                raise AttributeError("Invalid value in the condition of a partial index: %s" % repr(value))
+            return value
+
+        conditions = []
+        for key,value in query.items():
+            if key in ('$and','$or'):
+                subconditions = [self.get_index_condition(collection,table,subquery) for subquery in value]
+                conditions.append(and_(*subconditions) if key == '$and' else or_(*subconditions))
+                continue
+            elif key == '$not':
+                conditions.append(not_(self.get_index_condition(collection,table,value)))
+                continue
+            for related_key in self._related_fields[collection]:
+                if key == related_key or key.startswith(related_key+'.'):
+                    raise AttributeError("The condition of a partial index cannot refer to related documents!")
+            if isinstance(value,dict) and value and all(k.startswith('$') for k in value):
+                operators = value
+            else:
+                operators = {'$eq' : value}
+            for operator,operand in operators.items():
+                if not operator in comparisons:
+                    raise AttributeError("Unsupported operator in the condition of a partial index: %s" % operator)
+                if operator in ('$in','$nin'):
+                    operand = [check_value(v) for v in operand]
+                    sample = operand[0] if operand else None
+                else:
+                    sample = check_value(operand)
+                if key in self._table_columns[collection]:
+                    column = table.c[self._table_columns[collection][key]['column']]
+                else:
+                    column = self.get_json_expression(table,key,sample,for_index = True)
+                    if column is None:
+                        raise AttributeError("Cannot use %s in the condition of a partial index with this database" % key)
+                conditions.append(comparisons[operator](column,operand))
+        if len(conditions) == 1:
+            return conditions[0]
+        return and_(*conditions)
+
+    @staticmethod
+    def _get_index_opts(index_params):
+        opts = index_params.get('opts') or {}
+        return {'name' : opts.get('name'),
+                'unique' : opts.get('unique',False),
+                'where' : opts.get('where')}
+
+    def _upsert_rows(self,collection,rows):
+        """
+        Writes the given rows (with plain values) to the table of the given collection, replacing
+        existing rows with the same primary keys.
+        """
+        table = self._collection_tables[collection]
+        columns = [column for column in rows[0] if column != 'pk']
+        upsert = self.get_upsert_statement(table,columns)
+        if upsert is not None:
+            self.connection.execute(upsert,rows)
+            return
+
+        #we update the existing rows and insert the rest
+        pks = [row['pk'] for row in rows]
+        existing_pks = set()
+        for i in range(0,len(pks),BULK_CHUNK_SIZE):
+            result = self.connection.execute(select([table.c.pk])\
+                .where(table.c.pk.in_(pks[i:i+BULK_CHUNK_SIZE])))
+            existing_pks.update(row[0] for row in result)
+        updates = [dict(row,_pk = row['pk']) for row in rows if row['pk'] in existing_pks]
+        inserts = [row for row in rows if row['pk'] not in existing_pks]
+        if updates:
+            #the columns that get updated are given by the keys of the rows
+            self.connection.execute(table.update().where(table.c.pk == bindparam('_pk')),updates)
+        if inserts:
+            self.connection.execute(table.insert(),inserts)
 
 
     def save(self,obj,autosave_dependent = True,call_hook = True, save_cache=None):
@@ -771,27 +1226,32 @@ class Backend(BaseBackend):
                 self._serialize_and_update_indexes(obj,collection,d)
                 self._serialize_and_update_relations(obj,collection,d,deletes,inserts,autosave_dependent = autosave_dependent, save_cache=save_cache)
 
-                #if we got an object with a PK, we try to perform an UPDATE operation
+                #if we got an object with a PK, we insert or update it with a single statement
+                #if the database supports this, otherwise we try to perform an UPDATE operation
 
+                upsert = None
                 if not is_insert:
-                    update = self._collection_tables[collection].update().values(**d).where(table.c.pk == obj.pk)
-                    result = self.connection.execute(update)
+                    upsert = self.get_upsert_statement(table,[column for column in d if column != 'pk'])
 
-                #if we did not get a PK the UPDATE did not match any rows, we perform an INSERT instead
-                if is_insert or not result.rowcount:
-                    insert = self._collection_tables[collection].insert().values(**d)
-                    result = self.connection.execute(insert)
-                    is_insert = True
+                if upsert is not None:
+                    self.connection.execute(upsert.values(**d))
+                else:
+                    if not is_insert:
+                        update = self._collection_tables[collection].update().values(**d).where(table.c.pk == obj.pk)
+                        result = self.connection.execute(update)
 
-                for delete in deletes:
-                    self.connection.execute(delete)
+                    #if we did not get a PK the UPDATE did not match any rows, we perform an INSERT instead
+                    if is_insert or not result.rowcount:
+                        insert = self._collection_tables[collection].insert().values(**d)
+                        result = self.connection.execute(insert)
+                        is_insert = True
 
-                for insert in inserts:
-                    self.connection.execute(insert)
+                self._execute_relation_changes(deletes,inserts)
 
                 #after saving an object, we initialize the relations
                 obj.backend = self
                 self.initialize_relations(obj)
+                obj.mark_clean()
                 return obj
         except:
             #we restore all objects to the state they've been in before...
@@ -800,6 +1260,72 @@ class Backend(BaseBackend):
                 saved_obj.backend = backend
             raise
 
+    def save_multiple(self,objs,autosave_dependent = True,call_hook = True):
+        """
+        Saves several documents with a few batched statements: the rows of each collection are
+        written with a single `executemany` upsert (see :py:meth:`get_upsert_statement`), and the
+        rows of many-to-many relationships are deleted and inserted in bulk as well.
+
+        The collections are written in the order in which they first appear in `objs`, so documents
+        should come after the documents they refer to through foreign keys.
+
+        :param objs: The documents to be saved.
+        :param autosave_dependent: Whether to save related documents without a primary key.
+        :param call_hook: Whether to call the `before_save` hook of the documents.
+        """
+        #documents that are given several times get saved only once
+        objs = list(OrderedDict((id(obj),obj) for obj in objs).values())
+
+        save_cache = []
+        rows = OrderedDict()
+        deletes = []
+        inserts = []
+
+        try:
+            with self.transaction(implicit = True):
+
+                for obj in objs:
+
+                    if obj.lazy:
+                        raise AttributeError("Trying to save a lazy object!")
+
+                    if call_hook:
+                        self.call_hook('before_save',obj)
+
+                    collection = self.get_collection_for_cls(obj.__class__)
+
+                    save_cache.append((obj,obj.pk,obj.backend))
+
+                    if not obj.pk:
+                        obj.pk = uuid.uuid4().hex
+
+                    d = {'data' : self.serialize_json(self.serialize(obj.attributes,
+                            encoders = [ExcludedFieldsEncoder(self,collection)])),
+                         'pk' : obj.pk}
+
+                    self._serialize_and_update_indexes(obj,collection,d,plain = True)
+                    self._serialize_and_update_relations(obj,collection,d,deletes,inserts,
+                                                         autosave_dependent = autosave_dependent,
+                                                         save_cache = save_cache,plain = True)
+
+                    #if a document occurs several times, its last state gets saved
+                    rows.setdefault(collection,OrderedDict())[obj.pk] = d
+
+                for collection,collection_rows in rows.items():
+                    self._upsert_rows(collection,list(collection_rows.values()))
+
+                self._execute_relation_changes(deletes,inserts)
+
+                for obj in objs:
+                    obj.backend = self
+                    self.initialize_relations(obj)
+                    obj.mark_clean()
+        except:
+            for saved_obj,pk,backend in save_cache:
+                saved_obj.pk = pk
+                saved_obj.backend = backend
+            raise
+
     def initialize_relations(self,obj,data = None):
 
         if data is None:
@@ -885,6 +1411,120 @@ class Backend(BaseBackend):
 
         obj.attributes = data
 
+    def prefetch(self,documents,paths):
+        """
+        Loads the given relations for a list of documents that have been fetched already, using one
+        query per relation path instead of one query per document, and stores the related documents
+        in the foreign key fields, many-to-many proxies and one-to-many querysets of the documents.
+
+        :param documents: The documents whose relations should be loaded.
+        :param paths: A list of (dotted) paths of the relations to be loaded.
+
+        :returns: The list of given documents.
+
+        example::
+
+            actors = backend.filter(Actor,{'name' : {'$in' : ['Al Pacino','Robert de Niro']}})
+            backend.prefetch(actors,['movies','movies.director'])
+        """
+        documents = list(documents)
+        self._load_lazy_documents(documents)
+
+        path_tree = OrderedDict()
+        for path in paths:
+            d = path_tree
+            for key in path.split('.'):
+                d = d.setdefault(key,OrderedDict())
+
+        def prefetch_tree(documents,tree):
+            for key,subtree in tree.items():
+                related_documents = self._prefetch_relation(documents,key)
+                if subtree and related_documents:
+                    prefetch_tree(related_documents,subtree)
+
+        with self.transaction():
+            prefetch_tree(documents,path_tree)
+
+        return documents
+
+    def _prefetch_relation(self,documents,key):
+        """
+        Loads the relation with the given key for the given documents and returns the list of
+        related documents.
+        """
+        documents_by_collection = OrderedDict()
+        for document in documents:
+            collection = self.get_collection_for_obj(document)
+            documents_by_collection.setdefault(collection,OrderedDict())[id(document)] = document
+
+        related_documents = []
+        for collection,collection_documents in documents_by_collection.items():
+            collection_documents = list(collection_documents.values())
+            try:
+                params = self._related_fields[collection][key]
+            except KeyError:
+                raise AttributeError("%s is not a related field of %s" % (key,collection))
+
+            if isinstance(params['field'],ForeignKeyField):
+                foreign_documents = []
+                for document in collection_documents:
+                    try:
+                        value = get_value(document.lazy_attributes,key)
+                    except KeyError:
+                        continue
+                    if isinstance(value,Document):
+                        foreign_documents.append(value)
+                self._load_lazy_documents(foreign_documents)
+                related_documents.extend(foreign_documents)
+                continue
+
+            cls = self.get_cls_for_collection(collection)
+            join_params = self.get_include_joins(cls,includes = [SelectIn(key)],excludes = [],order_by_keys = [])['joins'][key]
+            qs = QuerySet(backend = self,table = self._collection_tables[collection],cls = cls)
+            unpacked_objects = qs._select_related([{'pk' : document.pk} for document in collection_documents
+                                                   if document.pk is not None],join_params)
+
+            #documents that are related to several of the given documents are only created once
+            related_by_pk = {}
+            related_objects = {}
+            for pk,objs in unpacked_objects.items():
+                related_objects[pk] = []
+                for obj in objs:
+                    if not obj['pk'] in related_by_pk:
+                        d,lazy = self.deserialize_db_data(obj)
+                        related_by_pk[obj['pk']] = self.create_instance(params['class'],d,lazy = lazy)
+                    related_objects[pk].append(related_by_pk[obj['pk']])
+            related_documents.extend(related_by_pk.values())
+
+            for document in collection_documents:
+                if document.pk is None:
+                    continue
+                objs = related_objects.get(document.pk,[])
+                #the attributes might be shared with a copy of the document
+                attributes = document._get_own_attributes()
+                if isinstance(params['field'],ManyToManyField):
+                    try:
+                        proxy = get_value(attributes,key)
+                    except KeyError:
+                        proxy = None
+                    if isinstance(proxy,ManyToManyProxy) and proxy.obj is document:
+                        proxy._objects = objs
+                        proxy._queryset = None
+                    else:
+                        set_value(attributes,key,ManyToManyProxy(document,key,params,objects = objs))
+                elif params['field'].unique:
+                    set_value(attributes,key,objs[0] if objs else None)
+                else:
+                    table = self._collection_tables[params['collection']]
+                    set_value(attributes,key,QuerySet(backend = self,
+                        table = table,
+                        cls = params['class'],
+                        condition = table.c[params['backref']['column']] == expression.cast(document.pk,params['type']),
+                        objects = objs,
+                        raw = False))
+
+        return related_documents
+
     def get_include_joins(self,cls,includes,excludes = None,order_by_keys = None):
 
         collection = self.get_collection_for_cls(cls)
@@ -914,6 +1554,9 @@ class Backend(BaseBackend):
         def resolve_include(include,collection,d,path = None):
             if path is None:
                 path = []
+            select_in = isinstance(include,SelectIn)
+            if select_in:
+                include = include.include
             if isinstance(include,(tuple,list)):
                 if len(include) >= 2:
                     main_include,sub_includes = include[0],include[1:]
@@ -937,12 +1580,16 @@ class Backend(BaseBackend):
                 for key,params in self._related_fields[collection].items():
                     if main_include == key:
                         include_related_field(d, key, params)
+                        if select_in:
+                            if not isinstance(params['field'],(ManyToManyField,OneToManyField)):
+                                raise AttributeError("Only many-to-many and one-to-many relations can be loaded with SelectIn!")
+                            d['joins'][key]['select_in'] = True
                         if sub_includes:
                             for sub_include in sub_includes:
                                 resolve_include(sub_include,params['collection'],d['joins'][key])
                         break
                 else:
-                    if sub_includes is not None:
+                    if sub_includes is not None or select_in:
                         raise AttributeError("Included field '{}' is not a related object!".format(main_include))
                     #if we ask for github_data and github_data.full_name is an index field, we
                     #need to fetch both the `data` field and the github_data_full_name index field.
@@ -1033,23 +1680,98 @@ class Backend(BaseBackend):
         else:
             collection = cls_or_collection
 
-        #first, we create an object without attributes
-        obj = super(Backend,self).create_instance(cls_or_collection, {}, call_hook=False, lazy=lazy, deserialize=False, db_loader=db_loader)
+        cls = self.get_cls_for_collection(collection)
+        identity_key = self.get_identity_key(cls, attributes, db_loader = db_loader)
+        obj = self._identity_map.get(identity_key) if identity_key is not None else None
+
+        if obj is not None:
+            #the document has already been materialized in this session
+            if lazy or obj.has_pending_changes():
+                self.call_hook('after_load',obj)
+                return obj
+            obj._lazy = False
+        else:
+            #first, we create an object without attributes
+            obj = super(Backend,self).create_instance(cls_or_collection, {}, call_hook=False, lazy=lazy, deserialize=False, db_loader=db_loader)
+            if identity_key is not None:
+                self._identity_map[identity_key] = obj
         #then, we initialize it with the relationship data
         self.initialize_relations(obj, attributes)
         #then, we deserialize the attributes and assign them to the object
         obj.attributes = self.deserialize(attributes)
+        if not lazy:
+            obj.mark_clean()
         #finally, we call the after_load hook
         self.call_hook('after_load',obj)
 
         return obj
 
-    def create_index(self, cls_or_collection, *args, **kwargs):
+    def create_index(self, cls_or_collection, fields = None, opts = None, **kwargs):
+        """
+        Creates an index over the given fields of a collection.
+
+        The index becomes part of the schema of the backend, so :py:meth:`create_schema` creates
+        it as well. If the table of the collection exists already, the index gets created in the
+        database right away. Indexes can also be declared in the `indexes` attribute of the `Meta`
+        class of a document, as a list of dictionaries with the `fields` and `opts` of each index.
+
+        :param fields: A dictionary that maps the (dotted) keys to index to their sort direction
+                       (1 or -1), or a list of keys. Keys that are not stored in a column of the
+                       table are indexed through their JSON path (SQLite only).
+        :param opts: A dictionary with the options of the index, which can also be given as keyword
+                     arguments: `name`, `unique` and `where`, a query (as for :py:meth:`filter`)
+                     that restricts the index to the matching documents (partial index, SQLite and
+                     PostgreSQL only). Other options are ignored.
+
+        example::
+
+            backend.create_index(Movie,fields = {'year' : -1,'title' : 1},where = {'year' : {'$gte' : 2000}})
+        """
         if not isinstance(cls_or_collection, six.string_types):
             collection = self.get_collection_for_cls(cls_or_collection)
         else:
             collection = cls_or_collection
-        self.db[collection].ensure_index(*args, **kwargs)
+        if not fields:
+            raise AttributeError("You must specify the fields of the index!")
+        index_params = {'fields' : fields,'opts' : dict(opts or {},**kwargs)}
+        if not self._schema_initialized or not collection in self._collection_tables:
+            if not index_params in self._indexes[collection]:
+                self._indexes[collection].append(index_params)
+            return
+        table = self._collection_tables[collection]
+        index = self.get_index(collection,table,fields,**self._get_index_opts(index_params))
+        if index is None:
+            raise AttributeError("Cannot create index over %s for collection %s with this database" % (
+                ', '.join(fields),collection))
+        if not index_params in self._indexes[collection]:
+            self._indexes[collection].append(index_params)
+        with self.transaction(implicit = True):
+            if not self._has_table(table):
+                #the index gets created together with the table
+                return
+            if not self._has_index(table,index.name):
+                index.create(bind = self.connection)
+
+    def _has_table(self,table):
+        return self.engine.dialect.has_table(self.connection,table.name)
+
+    def _has_index(self,table,name):
+        dialect = self.engine.dialect
+        #the SQLAlchemy inspector skips indexes over expressions, so we look them up directly
+        if dialect.name == 'sqlite':
+            result = self.connection.execute(
+                select([expression.literal_column('name')])\
+                .select_from(expression.table('sqlite_master'))\
+                .where(and_(expression.literal_column('type') == 'index',
+                            expression.literal_column('name') == name)))
+            return result.first() is not None
+        elif dialect.name == 'postgresql':
+            result = self.connection.execute(
+                select([expression.literal_column('indexname')])\
+                .select_from(expression.table('pg_indexes'))\
+                .where(expression.literal_column('indexname') == name))
+            return result.first() is not None
+        return name in [index['name'] for index in Inspector.from_engine(self.connection).get_indexes(table.name)]
 
     def get(self, cls_or_collection, query,raw=False, only=None,include = None):
 
@@ -1070,6 +1792,65 @@ class Backend(BaseBackend):
             raise cls.DoesNotExist
 
 
+    def get_by_pk(self, cls_or_collection, pk, raw = False, only = None, include = None):
+
+        objs = self.get_many_by_pk(cls_or_collection,[pk],raw = raw,only = only,include = include)
+        if not objs:
+            if not isinstance(cls_or_collection, six.string_types):
+                raise cls_or_collection.DoesNotExist
+            raise self.get_cls_for_collection(cls_or_collection).DoesNotExist
+        return objs[0]
+
+    def get_many_by_pk(self, cls_or_collection, pks, raw = False, only = None, include = None):
+        """
+        Retrieve several objects by their primary keys, using one `pk IN (...)` query per
+        `BULK_CHUNK_SIZE` keys.
+
+        See :py:meth:`blitzdb.backends.base.Backend.get_many_by_pk` for documentation of individual parameters
+        """
+
+        if not isinstance(cls_or_collection, six.string_types):
+            collection = self.get_collection_for_cls(cls_or_collection)
+            cls = cls_or_collection
+        else:
+            collection = cls_or_collection
+            cls = self.get_cls_for_collection(collection)
+
+        pks = list(pks)
+        if not pks:
+            return []
+
+        table = self._collection_tables[collection]
+
+        #the given primary keys are compared with the ones from the database in the type of the column
+        unique_pks = list(OrderedDict((self._normalize_value(table.c.pk,pk),pk) for pk in pks).values())
+
+        objs_by_pk = {}
+        for i in range(0,len(unique_pks),BULK_CHUNK_SIZE):
+            chunk = unique_pks[i:i+BULK_CHUNK_SIZE]
+            if len(chunk) == 1:
+                condition = table.c.pk == chunk[0]
+            else:
+                condition = table.c.pk.in_(chunk)
+
+            qs = QuerySet(backend = self, table = table,
+                          joins = [],
+                          cls = cls,
+                          condition = condition,
+                          raw = raw,
+                          only = only,
+                          include = include)
+
+            for obj in qs:
+                objs_by_pk[self._normalize_value(table.c.pk,obj['pk'] if raw else obj.pk)] = obj
+
+        objs = []
+        for pk in pks:
+            pk = self._normalize_value(table.c.pk,pk)
+            if pk in objs_by_pk:
+                objs.append(objs_by_pk.pop(pk))
+        return objs
+
     def filter(self, cls_or_collection, query, raw = False,only = None,include = None):
         """
         Filter objects from the database that correspond to a given set of properties.
@@ -1092,6 +1873,35 @@ class Backend(BaseBackend):
 
         table = self._collection_tables[collection]
 
+        query_key = None
+        params = None
+        if self._statement_cache.enabled:
+            params = {}
+            try:
+                shape,parametrized_query = self._parametrize_query(collection,query,params)
+            except QueryNotCacheable:
+                params = None
+            else:
+                query_key = ('filter',collection,shape)
+                try:
+                    condition,joins_list,group_bys,havings = self._statement_cache.get(query_key)
+                except KeyError:
+                    #we compile the query with the parameters instead of the values
+                    query = parametrized_query
+                else:
+                    return QuerySet(backend = self, table = table,
+                                    joins = joins_list,
+                                    cls = cls,
+                                    condition = condition,
+                                    raw = raw,
+                                    group_bys = group_bys,
+                                    only = only,
+                                    include = include,
+                                    havings = havings,
+                                    params = params,
+                                    cache_key = query_key
+                                    )
+
         joins = defaultdict(dict)
         joins_list = []
         group_bys = []
@@ -1236,51 +2046,72 @@ class Backend(BaseBackend):
 
                 return compile_one_to_many_query(key,value,field_name,related_table_alias,relationship_table_alias.c[params['pk_field_name']],new_path)
 
-            def prepare_special_query(field_name,params,query):
+            def prepare_special_query(column,query):
+                #`column` returns the expression that is compared with a given value
                 def sanitize(value):
                     if isinstance(value,(list,tuple)):
                         return [v.pk if isinstance(v,Document) else v for v in value]
                     return value
-                column_name = params['column']
                 if '$not' in query:
-                    return [not_(*prepare_special_query(column_name,params,sanitize(query['$not'])))]
+                    return [not_(*prepare_special_query(column,sanitize(query['$not'])))]
                 elif '$in' in query:
-                    if not query['$in']:
+                    if not isinstance(query['$in'],BindParameter) and not query['$in']:
                         #we return an impossible condition since the $in query does not contain any values
                         return [expression.cast(True,Boolean) == expression.cast(False,Boolean)]
-                    return [table.c[column_name].in_(sanitize(query['$in']))]
+                    return [column(query['$in']).in_(sanitize(query['$in']))]
                 elif '$nin' in query:
-                    if not query['$nin']:
+                    if not isinstance(query['$nin'],BindParameter) and not query['$nin']:
                         return [expression.cast(True,Boolean) == expression.cast(False,Boolean)]
-                    return [~table.c[column_name].in_(sanitize(query['$nin']))]
+                    return [~column(query['$nin']).in_(sanitize(query['$nin']))]
                 elif '$eq' in query:
-                    return [table.c[column_name] == sanitize(query['$eq'])]
+                    return [column(query['$eq']) == sanitize(query['$eq'])]
                 elif '$ne' in query:
-                    return [table.c[column_name] != sanitize(query['$ne'])]
+                    return [column(query['$ne']) != sanitize(query['$ne'])]
                 elif '$gt' in query:
-                    return [table.c[column_name] > sanitize(query['$gt'])]
+                    return [column(query['$gt']) > sanitize(query['$gt'])]
                 elif '$gte' in query:
-                    return [table.c[column_name] >= sanitize(query['$gte'])]
+                    return [column(query['$gte']) >= sanitize(query['$gte'])]
                 elif '$lt' in query:
-                    return [table.c[column_name] < sanitize(query['$lt'])]
+                    return [column(query['$lt']) < sanitize(query['$lt'])]
                 elif '$lte' in query:
-                    return [table.c[column_name] <= sanitize(query['$lte'])]
+                    return [column(query['$lte']) <= sanitize(query['$lte'])]
                 elif '$exists' in query:
                     if query['$exists']:
-                        return [table.c[column_name] != None]
+                        return [column(None) != None]
                     else:
-                        return [table.c[column_name] == None]
+                        return [column(None) == None]
                 elif '$like' in query:
-                    return [table.c[column_name].like(expression.cast(query['$like'],String))]
+                    return [column(query['$like']).like(expression.cast(query['$like'],String))]
                 elif '$ilike' in query:
-                    return [table.c[column_name].ilike(expression.cast(query['$ilike'],String))]
+                    return [column(query['$ilike']).ilike(expression.cast(query['$ilike'],String))]
                 elif '$regex' in query:
                     if not self.engine.url.drivername in ('postgres','mysql','sqlite'):
                         raise AttributeError("Regex queries not supported with %s engine!" % self.engine.url.drivername)
-                    return [table.c[column_name].op('REGEXP')(expression.cast(query['$regex'],String))]
+                    return [column(query['$regex']).op('REGEXP')(expression.cast(query['$regex'],String))]
                 else:
                     raise AttributeError("Invalid query!")
 
+            def compile_json_query(key,value):
+                """
+                Compiles a query over a key that is only stored in the JSON data of the documents.
+                """
+                def column(value):
+                    if isinstance(value,(list,tuple)):
+                        value = value[0] if value else None
+                    if not (value is None or isinstance(value,JSON_VALUE_TYPES+(BindParameter,))):
+                        raise AttributeError("Invalid value in query over non-indexed field %s in collection %s!" % (key,collection))
+                    json_expression = self.get_json_expression(table,key,value)
+                    if json_expression is None:
+                        raise AttributeError("Query over non-indexed field %s in collection %s!" % (key,collection))
+                    return json_expression
+                if isinstance(value,PatternType):
+                    value = {'$regex' : value.pattern}
+                if isinstance(value,dict):
+                    return prepare_special_query(column,value)
+                if isinstance(value,(list,tuple)):
+                    raise AttributeError("Invalid value in query over non-indexed field %s in collection %s!" % (key,collection))
+                return [column(value) == value]
+
             #this is a normal, field-base query
             for key,value in query.items():
                 for field_name,params in self._index_fields[collection].items():
@@ -1289,7 +2120,7 @@ class Backend(BaseBackend):
                             value = {'$regex' : value.pattern}
                         if isinstance(value,dict):
                             #this is a special query
-                            where_statements.extend(prepare_special_query(field_name,params,value))
+                            where_statements.extend(prepare_special_query(lambda value,params = params: table.c[params['column']],value))
                         else:
                             #this is a normal value query
                             where_statements.append(table.c[params['column']] == expression.cast(value,params['type']))
@@ -1383,7 +2214,7 @@ class Backend(BaseBackend):
                                 where_statements.extend(compile_one_to_many_query(key,value,field_name,related_table_alias,table.c.pk,new_path))
                             break
                     else:
-                        raise AttributeError("Query over non-indexed field %s in collection %s!" % (key,collection))
+                        where_statements.extend(compile_json_query(key,value))
             return where_statements
 
         compiled_query = compile_query(collection,query)
@@ -1395,6 +2226,9 @@ class Backend(BaseBackend):
         else:
             compiled_query = None
 
+        if query_key is not None:
+            self._statement_cache.put(query_key,(compiled_query,joins_list,group_bys,havings),1)
+
         return QuerySet(backend = self, table = table,
                         joins = joins_list,
                         cls = cls,
@@ -1403,5 +2237,78 @@ class Backend(BaseBackend):
                         group_bys = group_bys,
                         only = only,
                         include = include,
-                        havings = havings
+                        havings = havings,
+                        params = params,
+                        cache_key = query_key
                         )
+
+    def _parametrize_query(self,collection,query,params):
+        """
+        Replaces the values of a query by bind parameters, so that the compiled query can be reused
+        for other values. Returns the shape of the query (a hashable representation of the query
+        without these values) and the parametrized query, and stores the values in `params`.
+
+        Values are only replaced where the compiled query does not depend on them: `None` and
+        Boolean values, `$exists` arguments and lists (except for `$in`/`$nin` lists of indexed
+        fields, which become expanding parameters) are part of the shape. Queries that contain
+        documents or querysets raise a `QueryNotCacheable` exception.
+        """
+
+        index_fields = self._index_fields[collection]
+
+        def is_parameter(value):
+            return isinstance(value,PARAMETER_TYPES) and not isinstance(value,bool)
+
+        def parameter(value,expanding = False):
+            name = 'qp_%d' % len(params)
+            params[name] = value
+            return ('?',type(value)),bindparam(name,value,required = True,expanding = expanding)
+
+        def literal_shape(value):
+            if isinstance(value,dict):
+                return ('{}',)+tuple((key,literal_shape(v)) for key,v in value.items())
+            elif isinstance(value,(list,tuple)):
+                return ('[]',)+tuple(literal_shape(v) for v in value)
+            elif value is None or isinstance(value,PARAMETER_TYPES+(bool,PatternType)):
+                return (type(value),value)
+            raise QueryNotCacheable
+
+        def parametrize_value(value,indexed,operator = None):
+            if isinstance(value,dict):
+                shape = ['{}']
+                parametrized_value = {}
+                for key,v in value.items():
+                    s,parametrized_value[key] = parametrize_value(v,indexed,operator = key)
+                    shape.append((key,s))
+                return tuple(shape),parametrized_value
+            elif operator == '$exists':
+                return literal_shape(value),value
+            elif isinstance(value,(list,tuple)):
+                if indexed and operator in ('$in','$nin') and value and all(is_parameter(v) for v in value):
+                    return parameter(list(value),expanding = True)
+                return literal_shape(value),value
+            elif is_parameter(value):
+                return parameter(value)
+            return literal_shape(value),value
+
+        def parametrize_query(query):
+            if not isinstance(query,dict):
+                raise QueryNotCacheable
+            shape = ['query']
+            parametrized_query = {}
+            for key,value in query.items():
+                if key in ('$and','$or'):
+                    if not isinstance(value,(list,tuple)):
+                        raise QueryNotCacheable
+                    subqueries = [parametrize_query(subquery) for subquery in value]
+                    s = ('[]',)+tuple(s for s,q in subqueries)
+                    parametrized_value = [q for s,q in subqueries]
+                elif key == '$not':
+                    s,parametrized_value = parametrize_query(value)
+                else:
+                    s,parametrized_value = parametrize_value(value,key in index_fields)
+                shape.append((key,s))
+                parametrized_query[key] = parametrized_value
+            return tuple(shape),parametrized_query
+
+        return parametrize_query(query)
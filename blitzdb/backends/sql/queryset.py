@@ -13,9 +13,81 @@ from blitzdb.fields import ForeignKeyField, ManyToManyField, OneToManyField
 from blitzdb.helpers import get_value
 from blitzdb.queryset import QuerySet as BaseQuerySet
 
+#maximum number of values that get passed to a single `IN` clause
+BULK_CHUNK_SIZE = 500
+
+
+def asc_nullsfirst(*args,**kwargs):
+    return nullsfirst(asc(*args,**kwargs))
+
+
+def desc_nullslast(*args,**kwargs):
+    return nullslast(desc(*args,**kwargs))
+
+
+def replace_ordered_dicts(d):
+    for key,value in d.items():
+        if isinstance(value,OrderedDict):
+            replace_ordered_dicts(value)
+            d[key] = list(value.values())
+        elif isinstance(value,dict):
+            d[key] = replace_ordered_dicts(value)
+    return d
+
+
+class SelectIn(object):
+
+    """
+    Marks an included many-to-many or one-to-many relation that should be loaded with a separate
+    `SELECT ... WHERE ... IN (...)` query after the documents have been fetched, instead of
+    being joined into the main query. Takes the same arguments as a tuple in `include`::
+
+        backend.filter(Actor,{},include = (SelectIn('movies',('director',)),'name'))
+
+    Joining several relations multiplies the number of rows that the database returns, whereas
+    loading them separately keeps it proportional to the number of related documents.
+    """
+
+    def __init__(self,*include):
+        self.include = include
+
+    def __eq__(self,other):
+        return isinstance(other,SelectIn) and freeze(self.include) == freeze(other.include)
+
+    def __ne__(self,other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(freeze(self.include))
+
+    def __repr__(self):
+        return 'SelectIn%r' % (self.include,)
+
+
+def freeze(obj):
+    """
+    Returns a hashable representation of the given (JSON-like) object.
+    """
+    if isinstance(obj,dict):
+        return ('{}',)+tuple(sorted((key,freeze(value)) for key,value in obj.items()))
+    elif isinstance(obj,(list,tuple)):
+        return ('[]',)+tuple(freeze(value) for value in obj)
+    elif isinstance(obj,set):
+        return ('set',frozenset(freeze(value) for value in obj))
+    hash(obj)
+    return obj
+
 
 class QuerySet(BaseQuerySet):
 
+    """
+    A set of documents that match a given condition.
+
+    Querysets that were created from a cached query (see :py:meth:`Backend.filter`) have a
+    condition with bind parameters, whose values are given by `params`. Their statements get
+    compiled only once and are cached under `cache_key` (and the other properties of the queryset).
+    """
+
     def __init__(self, backend, table, cls,
                  condition = None,
                  intersects = None,
@@ -28,10 +100,15 @@ class QuerySet(BaseQuerySet):
                  objects = None,
                  havings = None,
                  limit = None,
-                 offset = None
+                 offset = None,
+                 params = None,
+                 cache_key = None
                  ):
         super(QuerySet,self).__init__(backend = backend,cls = cls)
 
+        self._params = params
+        self._cache_key = cache_key
+
         self.joins = joins
         self.backend = backend
         self.condition = condition
@@ -84,13 +161,13 @@ class QuerySet(BaseQuerySet):
             if direction > 0:
                 #when sorting in ascending direction, NULL values should come first
                 if explicit_nullsfirst:
-                    direction = lambda *args,**kwargs: nullsfirst(asc(*args,**kwargs))
+                    direction = asc_nullsfirst
                 else:
                     direction = asc
             else:
                 #when sorting in descending direction, NULL values should come last
                 if explicit_nullsfirst:
-                    direction = lambda *args,**kwargs: nullslast(desc(*args,**kwargs))
+                    direction = desc_nullslast
                 else:
                     direction = desc
             order_bys.append((key,direction))
@@ -129,13 +206,55 @@ class QuerySet(BaseQuerySet):
         if self.objects is None:
             self.get_objects()
 
-        self.deserialized_objects = [self.deserialize(obj) for obj in self.objects]
+        self.deserialized_objects = self._deserialize_batch(self.objects)
         self.deserialized_pop_objects = self.deserialized_objects[:]
 
     def as_table(self):
         return self.get_select(with_joins = True).cte()
 
+    def _bind_params(self,s):
+        #statements that get combined with other statements carry the values of their parameters
+        if self._params:
+            return s.unique_params(self._params)
+        return s
+
+    def _execute(self,s):
+        if self._params:
+            return self.backend.connection.execute(s,self._params)
+        return self.backend.connection.execute(s)
+
+    def _get_cached_statement(self,kind,build):
+        """
+        Returns the compiled statement of the given kind, along with the additional data returned
+        by `build` (which builds the statement). For querysets that were not created from a cached
+        query, the statement gets built every time.
+        """
+        if self._cache_key is None:
+            return build()
+        cache = self.backend._statement_cache
+        try:
+            key = (kind,self._cache_key,freeze(self.include),freeze(self.only),
+                   freeze(self.order_bys),self._limit,self._offset)
+        except TypeError:
+            return build()
+        try:
+            return cache.get(key)
+        except KeyError:
+            pass
+        s,data = build()
+        compiled = (s.compile(dialect = self.backend.engine.dialect),data)
+        cache.put(key,compiled,1)
+        return compiled
+
     def get_select(self,columns = None,with_joins = True):
+        return self._bind_params(self._get_select(columns = columns,with_joins = with_joins))
+
+    def _get_columns_and_joins(self,params,table):
+        """
+        Returns the columns and the joins that are required to fetch the documents described
+        by the given include parameters (as returned by `get_include_joins`) from the given table,
+        as well as a map from field names to the corresponding columns.
+        """
 
         all_columns = []
         column_map = {}
@@ -168,6 +287,9 @@ class QuerySet(BaseQuerySet):
                     column_map[".".join(key_path+[field])] = column
 
             for subkey,subparams in sorted(params['joins'].items(),key = lambda i : i[0]):
+                #relations that are loaded with separate queries are not joined
+                if subparams.get('select_in'):
+                    continue
                 join_table(params['collection'],related_table,subkey,subparams,key_path = key_path+[subkey])
 
         def join_one_to_many(collection,table,key,params,key_path):
@@ -194,6 +316,12 @@ class QuerySet(BaseQuerySet):
             joins.append((related_table,right_condition))
             process_fields_and_subkeys(related_collection,related_table,params,key_path)
 
+        process_fields_and_subkeys(params['collection'],table,params,[])
+
+        return all_columns,column_map,joins
+
+    def _get_select(self,columns = None,with_joins = True):
+
         if self.include:
             include = copy.deepcopy(self.include)
             if isinstance(include,tuple):
@@ -235,7 +363,7 @@ class QuerySet(BaseQuerySet):
                      [params['relation']['column'] for params in self.include_joins['joins'].values()
                       if isinstance(params['relation']['field'],ForeignKeyField)]
 
-        process_fields_and_subkeys(self.include_joins['collection'],self.table,self.include_joins,[])
+        all_columns,column_map,joins = self._get_columns_and_joins(self.include_joins,self.table)
 
         select_table = self.table
 
@@ -243,7 +371,7 @@ class QuerySet(BaseQuerySet):
             for i,j in enumerate(joins):
                 select_table = select_table.outerjoin(*j)
 
-        bare_select = self.get_bare_select(columns = [self.table.c.pk])
+        bare_select = self._get_bare_select(columns = [self.table.c.pk])
 
         s = select([column_map[key] for key in columns] if columns is not None else all_columns).select_from(select_table).where(column_map['pk'].in_(bare_select))
 
@@ -253,81 +381,164 @@ class QuerySet(BaseQuerySet):
 
         return s
 
-    def get_objects(self):
+    def _get_field_map(self,params,path = None,current_map = None):
+        """
+        Returns a map from the selected columns to their path in the unpacked documents.
+        """
 
-        def build_field_map(params,path = None,current_map = None):
-
-            def m2m_o2m_getter(join_params,name,pk_key):
-
-                def f(d,obj):
-                    pk_value = obj[pk_key]
-                    try:
-                        v = d[name]
-                    except KeyError:
-                        v = d[name] = OrderedDict()
-                    if pk_value is None:
-                        return None
-                    if not pk_value in v:
-                        v[pk_value] = {}
-                    if not '__lazy__' in v[pk_value]:
-                        v[pk_value]['__lazy__'] = join_params['lazy']
-                    if not '__collection__' in v[pk_value]:
-                        v[pk_value]['__collection__'] = join_params['collection']
-                    return v[pk_value]
-
-                return f
-
-            def fk_getter(join_params,key):
-
-                def f(d,obj):
-                    pk_value = obj[join_params['table_fields']['pk']]
-                    if pk_value is None:
-                        d[key] = None #we set the key value to "None", to indicate that the FK is None
-                        return None
-                    if not key in d:
-                        d[key] = {}
-                    v = d[key]
-                    if not '__lazy__' in v:
-                        v['__lazy__'] = join_params['lazy']
-                    if not '__collection__' in v:
-                        v['__collection__'] = join_params['collection']
-                    return v
-
-                return f
-
-            if current_map is None:
-                current_map = {}
-            if path is None:
-                path = []
-            for key,field in params['table_fields'].items():
-                if key in params['joins']:
-                    continue
-                current_map[field] = path+[key]
-            for name,join_params in params['joins'].items():
-                if name in current_map:
-                    del current_map[name]
-                if isinstance(join_params['relation']['field'],(ManyToManyField,OneToManyField)):
-                    build_field_map(join_params,path+[m2m_o2m_getter(join_params,name,
-                                                                 join_params['table_fields']['pk'])],current_map)
+        def m2m_o2m_getter(join_params,name,pk_key):
+
+            def f(d,obj):
+                pk_value = obj[pk_key]
+                try:
+                    v = d[name]
+                except KeyError:
+                    v = d[name] = OrderedDict()
+                if pk_value is None:
+                    return None
+                if not pk_value in v:
+                    v[pk_value] = {}
+                if not '__lazy__' in v[pk_value]:
+                    v[pk_value]['__lazy__'] = join_params['lazy']
+                if not '__collection__' in v[pk_value]:
+                    v[pk_value]['__collection__'] = join_params['collection']
+                return v[pk_value]
+
+            return f
+
+        def fk_getter(join_params,key):
+
+            def f(d,obj):
+                pk_value = obj[join_params['table_fields']['pk']]
+                if pk_value is None:
+                    d[key] = None #we set the key value to "None", to indicate that the FK is None
+                    return None
+                if not key in d:
+                    d[key] = {}
+                v = d[key]
+                if not '__lazy__' in v:
+                    v['__lazy__'] = join_params['lazy']
+                if not '__collection__' in v:
+                    v['__collection__'] = join_params['collection']
+                return v
+
+            return f
+
+        if current_map is None:
+            current_map = {}
+        if path is None:
+            path = []
+        for key,field in params['table_fields'].items():
+            if key in params['joins']:
+                continue
+            current_map[field] = path+[key]
+        for name,join_params in params['joins'].items():
+            if name in current_map:
+                del current_map[name]
+            if join_params.get('select_in'):
+                continue
+            if isinstance(join_params['relation']['field'],(ManyToManyField,OneToManyField)):
+                self._get_field_map(join_params,path+[m2m_o2m_getter(join_params,name,
+                                                      join_params['table_fields']['pk'])],current_map)
+            else:
+                self._get_field_map(join_params,path+[fk_getter(join_params,name),],current_map)
+        return current_map
+
+    def _new_unpacked_object(self,params = None):
+        if params is None:
+            params = self.include_joins
+        return {'__lazy__' : params['lazy'],
+                '__collection__' : params['collection']}
+
+    def _load_select_in(self,unpacked_objects,params):
+        """
+        Loads the relations of the given (unpacked) documents that are included with the
+        `SelectIn` strategy, using one query per relation and chunk of documents.
+        """
+        for name,join_params in params['joins'].items():
+            if join_params.get('select_in'):
+                related_objects = self._select_related(unpacked_objects,join_params)
+                for unpacked_obj in unpacked_objects:
+                    unpacked_obj[name] = related_objects.get(unpacked_obj['pk'],[])
+                self._load_select_in([related_obj for related_objs in related_objects.values()
+                                      for related_obj in related_objs],join_params)
+            else:
+                #we look for relations loaded with separate queries within joined relations
+                joined_objects = []
+                for unpacked_obj in unpacked_objects:
+                    value = unpacked_obj.get(name)
+                    if isinstance(value,list):
+                        joined_objects.extend(value)
+                    elif isinstance(value,dict):
+                        joined_objects.append(value)
+                if joined_objects:
+                    self._load_select_in(joined_objects,join_params)
+
+    def _select_related(self,unpacked_objects,params):
+        """
+        Fetches the documents of a many-to-many or one-to-many relation of the given documents and
+        returns a dictionary that maps the primary keys of the documents to the related documents.
+        """
+        relation = params['relation']
+        related_table = self.backend.get_collection_table(params['collection'])
+        columns,column_map,joins = self._get_columns_and_joins(params,related_table)
+        if isinstance(relation['field'],ManyToManyField):
+            relationship_table = relation['relationship_table']
+            parent_column = relationship_table.c[relation['pk_field_name']]
+            select_table = related_table.join(relationship_table,
+                relationship_table.c[relation['related_pk_field_name']] == related_table.c.pk)
+        else:
+            parent_column = related_table.c[relation['backref']['column']]
+            select_table = related_table
+        for j in joins:
+            select_table = select_table.outerjoin(*j)
+        field_map = self._get_field_map(params)
+
+        pks = list(OrderedDict((unpacked_obj['pk'],True) for unpacked_obj in unpacked_objects
+                               if unpacked_obj.get('pk') is not None))
+        related_objects = OrderedDict()
+        for i in range(0,len(pks),BULK_CHUNK_SIZE):
+            s = select([parent_column.label('__parent_pk__')]+columns)\
+                .select_from(select_table)\
+                .where(parent_column.in_(pks[i:i+BULK_CHUNK_SIZE]))\
+                .order_by(parent_column,related_table.c.pk)
+            with self.backend.transaction():
+                result = self.backend.connection.execute(s)
+                rows = result.fetchall()
+            for row in rows:
+                objs = related_objects.setdefault(row['__parent_pk__'],OrderedDict())
+                if not row['pk'] in objs:
+                    objs[row['pk']] = self._new_unpacked_object(params)
+                self._fold_row(objs[row['pk']],row,field_map)
+
+        return OrderedDict((pk,[replace_ordered_dicts(obj) for obj in objs.values()])
+                           for pk,objs in related_objects.items())
+
+    def _fold_row(self,unpacked_obj,obj,field_map):
+        """
+        Folds a row of the result into the given (unpacked) document.
+        """
+        for key,path in field_map.items():
+            d = unpacked_obj
+            for element in path[:-1]:
+                if callable(element):
+                    d = element(d,obj)
+                    if d is None:
+                        break
                 else:
-                    build_field_map(join_params,path+[fk_getter(join_params,name),],current_map)
-            return current_map
-
-        def replace_ordered_dicts(d):
-            for key,value in d.items():
-                if isinstance(value,OrderedDict):
-                    replace_ordered_dicts(value)
-                    d[key] = list(value.values())
-                elif isinstance(value,dict):
-                    d[key] = replace_ordered_dicts(value)
-            return d
+                    d = get_value(d,element,create=True)
+            else:
+                d[path[-1]] = obj[key]
+
+    def get_objects(self):
 
-        s = self.get_select()
-        field_map = build_field_map(self.include_joins)
+        s,self.include_joins = self._get_cached_statement('select',
+            lambda: (self._get_select(),self.include_joins))
+        field_map = self._get_field_map(self.include_joins)
 
         with self.backend.transaction():
             try:
-                result = self.backend.connection.execute(s)
+                result = self._execute(s)
                 if result.returns_rows:
                     objects = list(result.fetchall())
                 else:
@@ -343,24 +554,86 @@ class QuerySet(BaseQuerySet):
         unpacked_objects = OrderedDict()
         for obj in objects:
             if not obj['pk'] in unpacked_objects:
-                unpacked_objects[obj['pk']] = {'__lazy__' : self.include_joins['lazy'],
-                                               '__collection__' : self.include_joins['collection']}
-            unpacked_obj = unpacked_objects[obj['pk']]
-            for key,path in field_map.items():
-                d = unpacked_obj
-                for element in path[:-1]:
-                    if callable(element):
-                        d = element(d,obj)
-                        if d is None:
-                            break
-                    else:
-                        d = get_value(d,element,create=True)
-                else:
-                    d[path[-1]] = obj[key]
+                unpacked_objects[obj['pk']] = self._new_unpacked_object()
+            self._fold_row(unpacked_objects[obj['pk']],obj,field_map)
 
         self.objects = [replace_ordered_dicts(unpacked_obj) for unpacked_obj in unpacked_objects.values()]
+        self._load_select_in(self.objects,self.include_joins)
         self.pop_objects = self.objects[:]
 
+    def stream(self,batch_size = 1000):
+        """
+        Iterates over the documents in the queryset without loading all of them into memory.
+
+        The rows are fetched through a server-side cursor (if the database supports it) and are
+        ordered by primary key within the sort order of the queryset, so that the rows of each
+        document (which can be several if relations are included) can be folded as they arrive.
+        The documents are deserialized and yielded in batches of `batch_size` and are not stored
+        in the queryset.
+
+        Sorting by fields of included many-to-many or one-to-many relations is not supported.
+
+        :param batch_size: The number of rows to fetch and documents to deserialize at once.
+        """
+
+        def build():
+            s = self._get_select()
+            for key,direction in self.order_bys or []:
+                join_params = self.include_joins['joins'].get(key.split('.')[0])
+                if join_params is not None and isinstance(join_params['relation']['field'],
+                                                          (ManyToManyField,OneToManyField)):
+                    raise AttributeError("Cannot stream a queryset that is sorted by %s" % key)
+            return s.order_by(self.table.c.pk),self.include_joins
+
+        s,self.include_joins = self._get_cached_statement('stream',build)
+        field_map = self._get_field_map(self.include_joins)
+
+        with self.backend.transaction():
+            connection = self.backend.connection.execution_options(stream_results = True)
+            if self._params:
+                result = connection.execute(s,self._params)
+            else:
+                result = connection.execute(s)
+            try:
+                unpacked_objects = []
+                unpacked_obj = None
+                pk = None
+                while True:
+                    rows = result.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        if unpacked_obj is None or row['pk'] != pk:
+                            unpacked_obj = self._new_unpacked_object()
+                            unpacked_objects.append(unpacked_obj)
+                            pk = row['pk']
+                        self._fold_row(unpacked_obj,row,field_map)
+                    #the last document might still receive rows from the next batch
+                    if len(unpacked_objects) > batch_size:
+                        for obj in self._deserialize_unpacked_batch(unpacked_objects[:-1]):
+                            yield obj
+                        unpacked_objects = unpacked_objects[-1:]
+                for obj in self._deserialize_unpacked_batch(unpacked_objects):
+                    yield obj
+            except GeneratorExit:
+                #the iteration was stopped before the end, which is not an error
+                return
+            finally:
+                result.close()
+
+    def _deserialize_unpacked_batch(self,unpacked_objects):
+        objects = [replace_ordered_dicts(unpacked_obj) for unpacked_obj in unpacked_objects]
+        self._load_select_in(objects,self.include_joins)
+        return self._deserialize_batch(objects)
+
+    def _deserialize_batch(self,objects):
+        objs = [self.deserialize(obj) for obj in objects]
+        if not self.raw:
+            batch_size = self._load_lazy_batch_size
+            for i in range(0, len(objs), batch_size):
+                self._resolve_lazy_references(objs[i:i+batch_size])
+        return objs
+
     def as_list(self):
         if self.deserialized_objects is None:
             self.get_deserialized_objects()
@@ -427,14 +700,17 @@ class QuerySet(BaseQuerySet):
 
     def delete(self):
         with self.backend.transaction(implicit = True):
-            s = self.get_bare_select(columns = [self.table.c.pk])
+            s = self._get_bare_select(columns = [self.table.c.pk])
             delete_stmt = self.table.delete().where(self.table.c.pk.in_(s))
-            self.backend.connection.execute(delete_stmt)
+            self._execute(delete_stmt)
 
     def get_fields(self):
         columns = [column for column in self.table.columns]
 
     def get_bare_select(self,columns = None):
+        return self._bind_params(self._get_bare_select(columns = columns))
+
+    def _get_bare_select(self,columns = None):
 
         if columns is None:
             columns = self.get_fields()
@@ -489,7 +765,10 @@ class QuerySet(BaseQuerySet):
         return s
 
     def get_count_select(self):
-        s = self.get_bare_select(columns = [self.table.c.pk])
+        return self._bind_params(self._get_count_select())
+
+    def _get_count_select(self):
+        s = self._get_bare_select(columns = [self.table.c.pk])
         count_select = select([func.count()]).select_from(s.alias())
         return count_select
 
@@ -499,16 +778,18 @@ class QuerySet(BaseQuerySet):
                 self.count = len(self.objects)
             else:
                 with self.backend.transaction():
-                    count_select = self.get_count_select()
-                    result = self.backend.connection.execute(count_select)
+                    count_select,_ = self._get_cached_statement('count',
+                        lambda: (self._get_count_select(),None))
+                    result = self._execute(count_select)
                     self.count = result.first()[0]
                     result.close()
         return self.count
 
     def distinct_pks(self):
         with self.backend.transaction():
-            s = self.get_bare_select(columns = [self.table.c.pk])
-            result = self.backend.connection.execute(s)
+            s,_ = self._get_cached_statement('pks',
+                lambda: (self._get_bare_select(columns = [self.table.c.pk]),None))
+            result = self._execute(s)
             return {r[0] for r in result.fetchall()}
 
     def __ne__(self, other):
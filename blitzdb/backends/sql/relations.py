@@ -1,7 +1,9 @@
-from sqlalchemy.sql import delete, expression, func, select
-from sqlalchemy.sql.expression import and_, text
+from collections import OrderedDict
 
-from .queryset import QuerySet
+from sqlalchemy.sql import delete, expression
+from sqlalchemy.sql.expression import and_
+
+from .queryset import BULK_CHUNK_SIZE, QuerySet
 
 
 class ManyToManyProxy(object):
@@ -84,33 +86,40 @@ class ManyToManyProxy(object):
         return self._queryset
 
     def append(self,obj):
-        with self.obj.backend.transaction(implicit = True):
-
-            #if the object is not yet in a DB, we save it first.
+        self.extend([obj])
 
-            if obj.pk is None:
-                self.obj.backend.save(obj)
+    def extend(self,objects):
+        """
+        Adds the given objects to the relation, using a single query to find the objects that
+        are already related and a single `INSERT` for the remaining ones.
+        """
+        backend = self.obj.backend
+        with backend.transaction(implicit = True):
 
             relationship_table = self.params['relationship_table']
-            condition = and_(relationship_table.c[self.params['related_pk_field_name']] == obj.pk,
-                             relationship_table.c[self.params['pk_field_name']] == self.obj.pk)
-            s = select([func.count(text('*'))]).where(condition)
-            result = self.obj.backend.connection.execute(s)
-            cnt = result.first()[0]
-            if cnt:
-                return #the object is already inside
-            values = {
-                self.params['pk_field_name'] : self.obj.pk,
-                self.params['related_pk_field_name'] : obj.pk
-            }
-            insert = relationship_table.insert().values(**values)
-            self.obj.backend.connection.execute(insert)
+            pk_field_name = self.params['pk_field_name']
+            related_pk_field_name = self.params['related_pk_field_name']
+            related_pk_column = relationship_table.c[related_pk_field_name]
+
+            related_pks = OrderedDict()
+            for obj in objects:
+                #if the object is not yet in a DB, we save it first.
+                if obj.pk is None:
+                    backend.save(obj)
+                related_pks.setdefault(backend._normalize_value(related_pk_column,obj.pk),obj.pk)
+            if not related_pks:
+                return
+
+            existing_rows = backend._get_relation_rows(relationship_table,pk_field_name,
+                                                       related_pk_field_name,[self.obj.pk],
+                                                       related_pks = list(related_pks.values()))
+            existing_pks = set(related_pk for pk,related_pk in existing_rows)
+            rows = [{pk_field_name : self.obj.pk,related_pk_field_name : related_pk}
+                    for key,related_pk in related_pks.items() if not key in existing_pks]
+            if rows:
+                backend.connection.execute(relationship_table.insert(),rows)
             self._queryset = None
 
-    def extend(self,objects):
-        for obj in objects:
-            self.append(obj)
-
     def insert(self,i,obj):
         raise NotImplementedError
 
@@ -120,15 +129,17 @@ class ManyToManyProxy(object):
             condition = relationship_table.c[self.params['pk_field_name']] == self.obj.pk
             self.obj.backend.connection.execute(delete(relationship_table).where(condition))
 
-    def remove(self,obj):
+    def remove(self,*objects):
         """
-        Remove an object from the relation
+        Remove one or more objects from the relation
         """
         relationship_table = self.params['relationship_table']
+        related_pks = [obj.pk for obj in objects]
         with self.obj.backend.transaction(implicit = True):
-            condition = and_(relationship_table.c[self.params['related_pk_field_name']] == obj.pk,
-                             relationship_table.c[self.params['pk_field_name']] == self.obj.pk)
-            self.obj.backend.connection.execute(delete(relationship_table).where(condition))
+            for i in range(0,len(related_pks),BULK_CHUNK_SIZE):
+                condition = and_(relationship_table.c[self.params['related_pk_field_name']].in_(related_pks[i:i+BULK_CHUNK_SIZE]),
+                                 relationship_table.c[self.params['pk_field_name']] == self.obj.pk)
+                self.obj.backend.connection.execute(delete(relationship_table).where(condition))
             self._queryset = None
 
     def pop(self,i = None):
@@ -0,0 +1,126 @@
+"""Size-bounded caches shared by the backends."""
+from collections import OrderedDict
+
+
+class LRUCache(object):
+
+    """Size-bounded least-recently-used cache.
+
+    Entries are evicted in least-recently-used order as soon as the summed
+    size of all cached values exceeds `max_size`. The size of a value has to
+    be given explicitly when storing it (the file backend uses the length of
+    the encoded blob, the SQL backend counts its compiled statements).
+
+    :param max_size: Maximum summed size of all cached values. A value of
+        `0` or `None` disables the cache.
+    :type max_size: int
+
+    """
+
+    def __init__(self, max_size):
+        """Initialize internal state."""
+        self.max_size = max_size or 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        """Return whether the cache stores any values at all."""
+        return self.max_size > 0
+
+    @property
+    def size(self):
+        """Return the summed size of all cached values."""
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Get a value from the cache and mark it as recently used.
+
+        :param key: The key of the value
+        :type key: object
+        :return: The cached value
+        :rtype: object
+        :raise KeyError: If no value is cached for the given key
+
+        """
+        try:
+            value, size = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            raise
+        self._entries[key] = (value, size)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, size):
+        """Store a value in the cache, evicting old values if necessary.
+
+        Values that are larger than the whole cache are not stored.
+
+        :param key: The key of the value
+        :type key: object
+        :param value: The value to be cached
+        :type value: object
+        :param size: The size of the value
+        :type size: int
+
+        """
+        self.invalidate(key)
+        if size > self.max_size:
+            return
+        self._entries[key] = (value, size)
+        self._size += size
+        while self._size > self.max_size:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
+
+    def invalidate(self, key):
+        """Remove a value from the cache (if present).
+
+        :param key: The key of the value
+        :type key: object
+
+        """
+        try:
+            _, size = self._entries.pop(key)
+        except KeyError:
+            return
+        self._size -= size
+
+    def clear(self):
+        """Remove all values from the cache."""
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def get_stats(self):
+        """Return hit/miss statistics of the cache.
+
+        :return: Number of hits, misses and evictions, as well as the current
+            number of entries and their summed size
+        :rtype: dict
+
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'size': self._size,
+            'max_size': self.max_size,
+        }
+
+    def reset_stats(self):
+        """Reset the hit/miss statistics of the cache."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
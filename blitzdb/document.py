@@ -25,6 +25,52 @@ class MultipleDocumentsReturned(BaseException):
         message = BaseException.__str__(self)
         return u"MultipleDocumentsReturned({}): {}".format(self.__class__.__name__, message)
 
+class FieldDescriptor(object):
+
+    """
+    Provides direct access to the value of a declared field in the attributes of a document.
+
+    Reading the attribute behaves like `Document.__getattr__`: properties take precedence, and
+    lazy documents get loaded if the value is not present yet. `Document.__setattr__` and
+    `Document.__delattr__` pass writes and deletions of the attribute on to the descriptor.
+    """
+
+    def __init__(self, key, field):
+        self.key = key
+        self.field = field
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        key = self.key
+        if key in obj._properties:
+            return obj._properties[key]
+        try:
+            value = obj._attributes[key]
+        except KeyError:
+            if not obj._lazy:
+                raise AttributeError(key)
+            obj.revert(implicit=True)
+            try:
+                value = obj._attributes[key]
+            except KeyError:
+                raise AttributeError(key)
+        if isinstance(value,(dict,list)):
+            obj._mark_dirty(key)
+        return value
+
+    def __set__(self, obj, value):
+        obj._get_loaded_attributes()[self.key] = value
+        obj._mark_dirty(self.key)
+
+    def __delete__(self, obj):
+        try:
+            del obj._get_loaded_attributes()[self.key]
+        except KeyError:
+            raise AttributeError(self.key)
+        obj._mark_dirty(self.key,unset = True)
+
+
 class MetaDocument(type):
 
     """
@@ -51,6 +97,11 @@ class MetaDocument(type):
                     field_key = key
                 fields[field_key] = value
                 delattr(class_type,key)
+                #fields stored under their attribute name can be accessed directly,
+                #unless they would shadow an existing attribute of the class
+                if field_key == key and (not hasattr(class_type,key) or
+                                         isinstance(getattr(class_type,key),FieldDescriptor)):
+                    setattr(class_type,key,FieldDescriptor(key,value))
 
         class_type.fields = fields
 
@@ -126,6 +177,14 @@ class Document(object):
 
       print(fail.attributes['delete']) #will print 'False'
 
+    **Tracking modified attributes**
+
+    Documents loaded from (or saved to) the database keep track of the attributes that got
+    assigned or deleted afterwards, which allows :py:meth:`save` to update only those
+    (see :py:meth:`get_changes`). Reading a mutable value (a `dict` or `list`) counts as a
+    modification, since it can be changed in place, and accessing the :py:meth:`attributes`
+    dictionary directly makes the changes of the document unknown.
+
     **Defining "non-database" attributes**
 
     Attributes that begin with an underscore (_) will not be stored in the :py:meth:`attributes`
@@ -135,6 +194,9 @@ class Document(object):
 
     abstract = True
 
+    _shared_attributes = None
+    _dirty = None
+
     class Meta:
 
         PkType = CharField(length = 32,primary_key = True,indexed = True,nullable = False)
@@ -160,18 +222,17 @@ class Document(object):
         if not attributes:
             attributes = {}
 
-        self._attributes = attributes
-        self._autoload = autoload
-        self._backend = backend
-        self._properties = {}
-        self._db_loader = db_loader
-
-        if not lazy:
-            self._lazy = False
-        else:
-            self._lazy = True
-
-        self._embed = False
+        #we bypass __setattr__ here, as documents get created in large numbers when loading references
+        self.__dict__.update({
+            '_attributes' : attributes,
+            '_autoload' : autoload,
+            '_backend' : backend,
+            '_properties' : {},
+            '_db_loader' : db_loader,
+            '_lazy' : True if lazy else False,
+            '_embed' : False,
+            '_dirty' : None,
+        })
         self.initialize()
 
     def __getitem__(self,key):
@@ -183,7 +244,10 @@ class Document(object):
             if key in self.lazy_attributes:
                 return self.lazy_attributes[key]
             self.revert(implicit=True)
-        return self.attributes[key]
+        value = self._attributes[key]
+        if isinstance(value,(dict,list)):
+            self._mark_dirty(key)
+        return value
 
     @property
     def lazy(self):
@@ -199,13 +263,75 @@ class Document(object):
 
     @property
     def attributes(self):
+        attributes = self._get_loaded_attributes()
+        #the attributes can be modified without our knowledge from here on
+        self._dirty = None
+        return attributes
+
+    def _get_loaded_attributes(self):
         if self._lazy:
             self.revert(implicit=True)
+        return self._get_own_attributes()
+
+    def _get_own_attributes(self):
+        #attributes shared with a copy of the document get copied before they can be modified
+        if self._attributes is self._shared_attributes:
+            self._attributes = self._attributes.copy()
+            self._shared_attributes = None
         return self._attributes
 
     @attributes.setter
     def attributes(self,value):
         self._attributes = value
+        self._dirty = None
+
+    def _mark_dirty(self, key, unset=False):
+        if self._dirty is None:
+            return
+        set_keys,unset_keys = self._dirty
+        if unset:
+            set_keys.discard(key)
+            unset_keys.add(key)
+        else:
+            unset_keys.discard(key)
+            set_keys.add(key)
+
+    def get_changes(self):
+        """
+        Returns the attributes that were modified since the document was loaded from or saved
+        to the database, as a tuple `(set_keys, unset_keys)` of sets. Returns `None` if the
+        changes are not known, e.g. because the document was never saved or its `attributes`
+        dictionary was accessed directly.
+
+        Dict and list values can be modified in place without the document noticing, so reading
+        such an attribute marks it as changed, even if it isn't modified afterwards.
+        """
+        if self._dirty is None:
+            return None
+        set_keys,unset_keys = self._dirty
+        return set(set_keys),set(unset_keys)
+
+    def has_pending_changes(self):
+        """
+        Returns `True` if the (loaded) document might have been modified since it was loaded from
+        or saved to the database. The backends don't replace the attributes of such documents when
+        they load them again within a session.
+        """
+        if self._lazy:
+            return False
+        return self.get_changes() != (set(),set())
+
+    def mark_clean(self, keys=None):
+        """
+        Marks the given attributes (or, if `keys` is `None`, all attributes) as being in sync
+        with the database. Gets called by the backends after loading or saving the document.
+        """
+        if keys is None or self._dirty is None:
+            self._dirty = (set(),set())
+            return
+        set_keys,unset_keys = self._dirty
+        set_keys.difference_update(keys)
+        unset_keys.difference_update(keys)
 
     def get(self,key,default = None):
         return self[key] if key in self else default
@@ -214,7 +340,7 @@ class Document(object):
         return True if key in self else False
 
     def keys(self):
-        return self.attributes.keys()
+        return self._get_loaded_attributes().keys()
 
     def clear(self):
         self.attributes.clear()
@@ -234,7 +360,7 @@ class Document(object):
         self._properties = value
 
     def __contains__(self, key):
-        return True if (key in self.lazy_attributes or key in self.attributes) else False
+        return True if (key in self.lazy_attributes or key in self._get_loaded_attributes()) else False
 
     def __iter__(self):
         for key in self.keys():
@@ -254,26 +380,37 @@ class Document(object):
             if key in self._properties:
                 return self._properties[key]
             if key in self._attributes:
-                return self._attributes[key]
-            if self._lazy:
-                self.revert(implicit=True)
-            return self._attributes[key]
+                value = self._attributes[key]
+            else:
+                if self._lazy:
+                    self.revert(implicit=True)
+                value = self._attributes[key]
         except KeyError:
             raise AttributeError(key)
+        if isinstance(value,(dict,list)):
+            self._mark_dirty(key)
+        return value
 
     def __setattr__(self, key, value):
         if key.startswith('_') or key in ('attributes','pk','lazy','backend'):
             return super(Document, self).__setattr__(key, value)
-        else:
-            self.attributes[key] = value
+        descriptor = getattr(self.__class__,key,None)
+        if isinstance(descriptor,FieldDescriptor):
+            return descriptor.__set__(self,value)
+        self._get_loaded_attributes()[key] = value
+        self._mark_dirty(key)
 
     def __delattr__(self, key):
         if key.startswith('_'):
             return super(Document, self).__delattr__(key)
+        descriptor = getattr(self.__class__,key,None)
+        if isinstance(descriptor,FieldDescriptor):
+            return descriptor.__delete__(self)
         try:
-            del self.attributes[key]
+            del self._get_loaded_attributes()[key]
         except KeyError:
             raise AttributeError(key)
+        self._mark_dirty(key,unset = True)
 
     __setitem__ = __setattr__
 
@@ -284,13 +421,23 @@ class Document(object):
             raise KeyError(key)
 
     def __copy__(self):
-        d = self.__class__(self.attributes.copy(), lazy=self._lazy, backend = self._backend)
+        #the copy shares the attributes with this document until one of them modifies them
+        self._shared_attributes = self._attributes
+        d = self.__class__.__new__(self.__class__)
+        d._shared_attributes = self._attributes
+        d.__init__(self._attributes, lazy=self._lazy, backend=self._backend,
+                   autoload=self._autoload, db_loader=self._db_loader)
         return d
 
     def __deepcopy__(self, memo):
-        d = self.__class__(copy.deepcopy(self.attributes, memo),
-                           lazy=self._lazy,
-                           backend =self._backend)
+        d = self.__class__.__new__(self.__class__)
+        #registering the copy first allows copying documents that (indirectly) refer to themselves
+        memo[id(self)] = d
+        d.__init__(copy.deepcopy(self._attributes, memo),
+                   lazy=self._lazy,
+                   backend=self._backend,
+                   autoload=self._autoload,
+                   db_loader=self._db_loader)
         return d
 
     def __hash__(self):
@@ -321,7 +468,7 @@ class Document(object):
         if self.pk != None or other.pk != None:
             if self.pk == other.pk:
                 return True
-        if self.attributes == other.attributes:
+        if self._get_loaded_attributes() == other._get_loaded_attributes():
             return True
         return False
 
@@ -427,7 +574,9 @@ class Document(object):
 
     @pk.setter
     def pk(self, value):
-        self._attributes[self.get_pk_name()] = value
+        self._get_own_attributes()[self.get_pk_name()] = value
+        #a document with a new primary key has to be saved as a whole
+        self._dirty = None
 
     @property
     def backend(self):
@@ -437,21 +586,37 @@ class Document(object):
     def backend(self,backend):
         self._backend = backend
 
-    def save(self, backend=None):
+    def save(self, backend=None, only_dirty=False):
         """
         Saves a document to the database. If the `backend` argument is not specified,
         the function resorts to the *default backend* as defined during object instantiation.
         If no such backend is defined, an `AttributeError` exception will be thrown.
 
         :param backend: the backend in which to store the document.
-
+        :param only_dirty: if `True`, only the attributes that were modified since the document
+                           was loaded or saved get written (using the `update` function of the
+                           backend). If these changes are not known, the whole document is saved.
+                           Like `get_changes`, this includes all dict and list attributes that
+                           were read, as they might have been modified in place.
+
+        :returns: the result of saving (or updating) the document with the backend, which is
+                  the document itself for most backends.
         """
         if not backend:
             if not self._backend:
                 raise AttributeError("No default backend defined!")
-            return self._backend.save(self)
-        self._backend = backend
-        return backend.save(self)
+            backend = self._backend
+        else:
+            self._backend = backend
+        changes = self.get_changes() if only_dirty else None
+        if changes is None or self.pk is None:
+            return backend.save(self)
+        set_keys,unset_keys = changes
+        if not set_keys and not unset_keys:
+            return self
+        result = backend.update(self,sorted(set_keys),unset_fields = sorted(unset_keys))
+        self.mark_clean(set_keys | unset_keys)
+        return result
 
     def delete(self, backend=None):
         """
@@ -488,6 +653,8 @@ class Document(object):
             logger.debug("Autoloading is disabled, not reverting the document implicitly...")
             return
         self._lazy = False
+        #we discard our changes, so that the backend replaces our attributes if it returns this instance
+        self.mark_clean()
         logger.debug("Reverting to database state (%s, %s)" % (self.__class__.__name__, str(self.pk)))
         if self._db_loader:
             obj = self._db_loader()
@@ -497,8 +664,9 @@ class Document(object):
                 raise AttributeError("No backend given!")
             if self.pk is None:
                 return
-            obj = backend.get(self.__class__, {self.get_pk_name(): self.pk})
+            obj = backend.get_by_pk(self.__class__, self.pk)
         self._attributes = obj.attributes
+        self.mark_clean()
         self.initialize()
 
     def load_if_lazy(self, implicit=False):
@@ -63,3 +63,15 @@ def delete_value(obj, key):
 
     if key_fragments[-1] in last_dict:
         del last_dict[key_fragments[-1]]
+
+
+def copy_containers(value):
+    """
+    Copies the (nested) dicts and lists of the given value, leaving all other values (e.g.
+    documents) as they are.
+    """
+    if isinstance(value, dict):
+        return value.__class__((key, copy_containers(v)) for key, v in value.items())
+    if isinstance(value, list):
+        return [copy_containers(v) for v in value]
+    return value
@@ -16,6 +16,10 @@ class QuerySet(object):
     ASCENDING = 1
     DESCENDING = -1
 
+    _load_lazy = False
+    _load_lazy_paths = None
+    _load_lazy_batch_size = 100
+
     def __init__(self, backend, cls):
         """
         Initializes a query set.
@@ -23,6 +27,31 @@ class QuerySet(object):
         self.cls = cls
         self.backend = backend
 
+    def load_lazy(self, paths=None, batch_size=100):
+        """
+        Resolves the lazy references of the documents in this query set automatically, in
+        batches of `batch_size` documents. See :py:meth:`blitzdb.backends.base.Backend.load_lazy`
+        for the meaning of `paths`.
+
+        :param paths: A list of (dotted) paths of the references to be loaded.
+        :param batch_size: The number of documents for which references are loaded at once.
+        :returns: this queryset
+        """
+        self._load_lazy = True
+        self._load_lazy_paths = paths
+        self._load_lazy_batch_size = batch_size
+        return self
+
+    def _copy_load_lazy(self, qs):
+        qs._load_lazy = self._load_lazy
+        qs._load_lazy_paths = self._load_lazy_paths
+        qs._load_lazy_batch_size = self._load_lazy_batch_size
+        return qs
+
+    def _resolve_lazy_references(self, objs):
+        if self._load_lazy and objs:
+            self.backend.load_lazy(objs, self._load_lazy_paths)
+
     @abc.abstractmethod
     def __getitem__(self, i):
         """
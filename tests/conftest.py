@@ -126,7 +126,8 @@ except ImportError:
     test_sql = False
 
 
-@pytest.fixture(scope="function", params=["file_json", "file_pickle"]
+@pytest.fixture(scope="function", params=["file_json", "file_pickle",
+                                          "file_pk_store_keys"]
                                          + (["mongo"] if test_mongo else [])
                                          + (["sql"] if test_sql else []))
 def backend(request, temporary_path):
@@ -145,7 +146,8 @@ def no_autoload_mongodb_backend(request, temporary_path):
     return _backend(request, temporary_path, autoload_embedded=False)
 
 
-@pytest.fixture(scope="function", params=["file_json", "file_pickle"]
+@pytest.fixture(scope="function", params=["file_json", "file_pickle",
+                                          "file_pk_store_keys"]
                                          + (["mongo"] if test_mongo else [])
                                          + (["sql"] if test_sql else []))
 def transactional_backend(request, temporary_path):
@@ -182,6 +184,9 @@ def _backend(request, temporary_path, autoload_embedded=True):
     elif request.param == 'file_pickle':
         return _file_backend(request, temporary_path, {'serializer_class': 'pickle'},
                              autoload_embedded=autoload_embedded)
+    elif request.param == 'file_pk_store_keys':
+        return _file_backend(request, temporary_path, {'pk_store_keys': True},
+                             autoload_embedded=autoload_embedded)
     elif request.param == 'mongo':
         return _mongodb_backend(request, {}, autoload_embedded=autoload_embedded)
     elif request.param == 'sql':
@@ -0,0 +1,48 @@
+from __future__ import absolute_import
+
+from ..helpers.movie_data import Actor, Movie
+
+
+def test_save_multiple(file_backend):
+    actors = [Actor({'name': 'Actor %d' % i, 'movies': []}) for i in range(10)]
+    movie = Movie({'title': 'The Godfather', 'year': 1972})
+
+    file_backend.save_multiple(actors + [movie])
+    file_backend.commit()
+
+    assert len(file_backend.filter(Actor, {})) == 10
+    assert file_backend.get(Actor, {'name': 'Actor 5'}) == actors[5]
+    assert file_backend.get(Movie, {'year': 1972}) == movie
+
+    for actor in actors:
+        actor.name = actor.name.upper()
+    file_backend.save_multiple(actors)
+    file_backend.commit()
+
+    assert len(file_backend.filter(Actor, {})) == 10
+    assert file_backend.get(Actor, {'name': 'ACTOR 5'}) == actors[5]
+    assert len(file_backend.filter(Actor, {'name': 'Actor 5'})) == 0
+
+
+def test_save_multiple_with_duplicate_pks(file_backend):
+    actor = Actor({'pk': 'chaplin', 'name': 'Charlie Chaplin'})
+    updated_actor = Actor({'pk': 'chaplin', 'name': 'Sir Charles Chaplin'})
+
+    file_backend.save_multiple([actor, updated_actor])
+    file_backend.commit()
+
+    assert len(file_backend.filter(Actor, {})) == 1
+    assert file_backend.get(Actor, {'pk': 'chaplin'}).name == 'Sir Charles Chaplin'
+
+
+def test_delete_multiple(file_backend):
+    actors = [Actor({'name': 'Actor %d' % i, 'movies': []}) for i in range(10)]
+    file_backend.save_multiple(actors)
+    file_backend.commit()
+
+    file_backend.delete_multiple(actors[:5])
+    file_backend.commit()
+
+    assert len(file_backend.filter(Actor, {})) == 5
+    assert actors[0] not in file_backend.filter(Actor, {})
+    assert actors[5] in file_backend.filter(Actor, {})
@@ -0,0 +1,96 @@
+from __future__ import absolute_import
+
+import copy
+
+from blitzdb.cache import LRUCache
+
+from ..helpers.movie_data import Actor
+
+
+def test_lru_cache_eviction():
+    cache = LRUCache(10)
+    cache.put('a', 1, 4)
+    cache.put('b', 2, 4)
+    assert cache.get('a') == 1
+    cache.put('c', 3, 4)
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+    assert cache.size == 8
+    cache.put('d', 4, 20)
+    assert 'd' not in cache
+    stats = cache.get_stats()
+    assert stats['hits'] == 1
+    assert stats['evictions'] == 1
+
+
+def test_object_cache_hits(file_backend):
+    actor = Actor({'name': 'Charlie Chaplin', 'movies': []})
+    file_backend.save(actor)
+    file_backend.commit()
+
+    file_backend.object_cache.reset_stats()
+    for i in range(3):
+        loaded_actor = file_backend.get(Actor, {'pk': actor.pk})
+        assert loaded_actor.name == 'Charlie Chaplin'
+        # modifications of a loaded document must not leak into the cache
+        loaded_actor.name = 'Buster Keaton'
+
+    stats = file_backend.object_cache_stats
+    assert stats['misses'] == 1
+    assert stats['hits'] == 2
+
+
+def test_object_cache_invalidation(file_backend):
+    actor = Actor({'name': 'Charlie Chaplin', 'movies': []})
+    file_backend.save(actor)
+    file_backend.commit()
+
+    assert file_backend.get(Actor, {'pk': actor.pk}).name == 'Charlie Chaplin'
+
+    actor.name = 'Buster Keaton'
+    file_backend.save(actor)
+    assert file_backend.get(Actor, {'pk': actor.pk}).name == 'Buster Keaton'
+
+    file_backend.rollback()
+    assert file_backend.get(Actor, {'pk': actor.pk}).name == 'Charlie Chaplin'
+
+    actor.name = 'Buster Keaton'
+    file_backend.save(actor)
+    file_backend.commit()
+    assert file_backend.get(Actor, {'pk': actor.pk}).name == 'Buster Keaton'
+
+
+def test_disabled_object_cache(temporary_path, monkeypatch):
+    from blitzdb.backends.file import Backend as FileBackend
+    backend = FileBackend(temporary_path, config={'object_cache_size': 0},
+                          overwrite_config=True)
+    actor = Actor({'name': 'Charlie Chaplin', 'movies': []})
+    backend.save(actor)
+    backend.commit()
+
+    assert backend.get(Actor, {'pk': actor.pk}).name == 'Charlie Chaplin'
+    assert backend.get(Actor, {'pk': actor.pk}).name == 'Charlie Chaplin'
+    assert backend.object_cache_stats['entries'] == 0
+
+    # raw data that doesn't go into the cache is returned without a copy
+    def deepcopy(value, memo=None):
+        raise AssertionError("the raw data should not be copied")
+    monkeypatch.setattr(copy, 'deepcopy', deepcopy)
+    assert backend.get_by_pk(Actor, actor.pk, raw=True)['name'] == 'Charlie Chaplin'
+
+
+def test_object_cache_with_raw_reads(file_backend):
+    actor = Actor({'name': 'Charlie Chaplin', 'movies': [], 'awards': {'oscar': 1}})
+    file_backend.save(actor)
+    file_backend.commit()
+
+    for i in range(3):
+        raw_actor = file_backend.get_by_pk(Actor, actor.pk, raw=True)
+        assert raw_actor['name'] == 'Charlie Chaplin'
+        assert raw_actor['awards'] == {'oscar': 1}
+        # modifications of raw results must not leak into the cache
+        raw_actor['name'] = 'Buster Keaton'
+        raw_actor['awards']['oscar'] = 2
+
+    assert file_backend.get(Actor, {'pk': actor.pk}).awards == {'oscar': 1}
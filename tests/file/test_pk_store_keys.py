@@ -0,0 +1,77 @@
+from __future__ import absolute_import
+
+import pytest
+
+from blitzdb.backends.file import Backend as FileBackend
+from blitzdb.backends.file.utils import get_store_key_for_pk
+
+from ..helpers.movie_data import Actor
+
+
+def test_store_key_for_pk():
+    assert get_store_key_for_pk('abc-123_x') == 'abc-123_x'
+    assert get_store_key_for_pk(u'abc') == 'abc'
+    # keys with a trailing newline are not safe
+    assert get_store_key_for_pk('abc\n').startswith('%')
+    # keys that only differ in case must not map to the same file name
+    assert get_store_key_for_pk('Abc').startswith('%')
+    assert get_store_key_for_pk('Abc').lower() != get_store_key_for_pk('abc').lower()
+    hashed_key = get_store_key_for_pk('../etc/passwd')
+    assert hashed_key.startswith('%')
+    assert '/' not in hashed_key
+    # the type of the key is part of the hash
+    assert get_store_key_for_pk(1) != get_store_key_for_pk('1')
+    assert get_store_key_for_pk(1) == get_store_key_for_pk(1)
+
+
+@pytest.fixture
+def pk_backend(temporary_path):
+    return FileBackend(temporary_path, config={'pk_store_keys': True},
+                       overwrite_config=True)
+
+
+def test_get_by_pk_without_index(pk_backend, temporary_path):
+    actor = Actor({'pk': 'charlie', 'name': 'Charlie Chaplin'})
+    other_actor = Actor({'pk': 42, 'name': 'Buster Keaton'})
+    pk_backend.save(actor)
+    pk_backend.save(other_actor)
+    pk_backend.commit()
+
+    backend = FileBackend(temporary_path)
+    assert backend.pk_store_keys
+    assert backend.get(Actor, {'pk': 'charlie'}).name == 'Charlie Chaplin'
+    assert backend.get(Actor, {'pk': 42}).name == 'Buster Keaton'
+    # no primary key index was needed for this
+    assert 'pk' not in backend.get_collection_indexes(
+        backend.get_collection_for_cls(Actor))
+
+    with pytest.raises(Actor.DoesNotExist):
+        backend.get(Actor, {'pk': 'keaton'})
+
+    assert len(backend.filter(Actor, {})) == 2
+    assert len(backend.filter(Actor, {'pk': {'$in': ['charlie', 42]}})) == 2
+
+
+def test_save_and_delete(pk_backend):
+    actor = Actor({'pk': 'charlie', 'name': 'Charlie Chaplin'})
+    pk_backend.save(actor)
+
+    # uncommitted documents are not visible yet
+    with pytest.raises(Actor.DoesNotExist):
+        pk_backend.get(Actor, {'pk': 'charlie'})
+
+    pk_backend.commit()
+
+    actor.name = 'Buster Keaton'
+    pk_backend.save(actor)
+    pk_backend.commit()
+
+    assert len(pk_backend.filter(Actor, {})) == 1
+    assert pk_backend.get(Actor, {'pk': 'charlie'}).name == 'Buster Keaton'
+
+    pk_backend.delete(actor)
+    pk_backend.commit()
+
+    with pytest.raises(Actor.DoesNotExist):
+        pk_backend.get(Actor, {'pk': 'charlie'})
+    assert len(pk_backend.filter(Actor, {})) == 0
@@ -0,0 +1,34 @@
+from __future__ import absolute_import
+
+import json
+
+from ..helpers.movie_data import Actor, Movie
+
+
+def test_raw_filter(file_backend):
+    actor = Actor({'name': 'Charlie Chaplin', 'birth_year': 1889})
+    movie = Movie({'title': 'The Kid', 'year': 1921, 'best_actor': actor})
+    file_backend.save(actor)
+    file_backend.save(movie)
+    file_backend.commit()
+
+    actors = file_backend.filter(Actor, {'name': 'Charlie Chaplin'}, raw=True)
+    assert len(actors) == 1
+    assert actors[0] == {'pk': actor.pk, 'name': 'Charlie Chaplin',
+                         'birth_year': 1889}
+
+    raw_movie = file_backend.get(Movie, {'title': 'The Kid'}, raw=True)
+    assert isinstance(raw_movie, dict)
+    # references are returned in their serialized form
+    assert raw_movie['best_actor']['pk'] == actor.pk
+    assert json.loads(json.dumps(raw_movie)) == raw_movie
+
+    # raw query sets can be combined and filtered further
+    movies = file_backend.filter(Movie, {}, raw=True).filter({'year': 1921})
+    assert [m['title'] for m in movies] == ['The Kid']
+
+    assert file_backend.get_by_pk(Actor, actor.pk, raw=True)['name'] == \
+        'Charlie Chaplin'
+
+    # the documents themselves are not affected by raw reads
+    assert file_backend.get(Actor, {'pk': actor.pk}).name == 'Charlie Chaplin'
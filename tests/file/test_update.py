@@ -0,0 +1,48 @@
+from __future__ import absolute_import
+
+from ..helpers.movie_data import Actor
+
+
+def test_update_only_writes_given_fields(file_backend):
+    file_backend.create_index(Actor, fields={'birth_year': 1})
+    actor = Actor({'name': 'Charlie Chaplin', 'birth_year': 1889, 'movies': []})
+    file_backend.save(actor)
+    file_backend.commit()
+
+    actor.birth_year = 1890
+    file_backend.update(actor, {'name': 'Sir Charles Chaplin'})
+    file_backend.commit()
+
+    assert len(file_backend.filter(Actor, {'name': 'Charlie Chaplin'})) == 0
+    loaded_actor = file_backend.get(Actor, {'name': 'Sir Charles Chaplin'})
+    assert loaded_actor.birth_year == 1889
+    assert file_backend.get(Actor, {'birth_year': 1889}) == actor
+
+    file_backend.update(actor, ['birth_year'])
+    file_backend.commit()
+
+    assert len(file_backend.filter(Actor, {'birth_year': 1889})) == 0
+    assert file_backend.get(Actor, {'birth_year': 1890}).name == 'Sir Charles Chaplin'
+
+
+def test_update_of_unsaved_document(file_backend):
+    actor = Actor({'name': 'Charlie Chaplin'})
+    file_backend.update(actor, {'birth_year': 1889})
+    file_backend.commit()
+
+    assert file_backend.get(Actor, {'name': 'Charlie Chaplin'}).birth_year == 1889
+
+    actor = Actor({'name': 'Buster Keaton', 'movies': [], 'address': {'city': 'Piqua'}})
+    file_backend.update(actor, {'birth_year': 1895, 'address.city': 'Hollywood'},
+                        unset_fields=['movies'], update_obj=False)
+    file_backend.commit()
+
+    loaded_actor = file_backend.get(Actor, {'name': 'Buster Keaton'})
+    assert loaded_actor.pk == actor.pk
+    assert loaded_actor.birth_year == 1895
+    assert loaded_actor.address == {'city': 'Hollywood'}
+    assert 'movies' not in loaded_actor.attributes
+
+    # the document itself is left as it is
+    assert actor.attributes == {'pk': actor.pk, 'name': 'Buster Keaton', 'movies': [],
+                                'address': {'city': 'Piqua'}}
@@ -0,0 +1,40 @@
+from blitzdb.backends.mongo import Backend as MongoBackend
+
+from ..helpers.movie_data import Actor
+
+
+class FakeCollection(object):
+
+    """
+    Answers the `_id` queries of `get_many_by_pk` from a list of raw documents, so that no
+    MongoDB server is needed.
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection=None):
+        if isinstance(query['_id'], dict):
+            pks = query['_id']['$in']
+        else:
+            pks = [query['_id']]
+        documents = [document for document in self.documents if document['_id'] in pks]
+        if projection:
+            documents = [dict((key, value) for key, value in document.items()
+                              if key == '_id' or key in projection)
+                         for document in documents]
+        return iter(documents)
+
+
+def test_raw_get_many_by_pk():
+
+    documents = [{'_id': 'actor-%d' % i, 'pk': 'actor-%d' % i, 'name': 'Actor %d' % i}
+                 for i in range(3)]
+    backend = MongoBackend({'actor': FakeCollection(documents)}, autodiscover_classes=False)
+    backend.register(Actor, {'collection': 'actor'})
+
+    actors = backend.get_many_by_pk(Actor, ['actor-2', 'actor-0', 'missing'], raw=True)
+    assert [actor['name'] for actor in actors] == ['Actor 2', 'Actor 0']
+
+    actors = backend.get_many_by_pk(Actor, ['actor-1'], raw=True, only=['name'])
+    assert actors == [{'_id': 'actor-1', 'name': 'Actor 1'}]
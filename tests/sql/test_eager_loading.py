@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
 
+import copy
+
+import pytest
+
+from blitzdb.backends.sql import SelectIn
 from blitzdb.backends.sql.relations import ManyToManyProxy
 
 from ..helpers.movie_data import Actor, Director, Movie
@@ -160,3 +165,99 @@ def test_only(backend):
                                                      'gross_income_m', 'pk', 'related_movie_cast'}
     assert isinstance(actors[0]['movies'],ManyToManyProxy)
     assert actors[0]['movies']._objects is None
+
+
+def test_select_in(backend, statements):
+
+    prepare_data(backend)
+
+    include = (('movies',('director',),'title'),('best_movies','title'),'name')
+    select_in_include = (SelectIn('movies',('director',),'title'),SelectIn('best_movies','title'),'name')
+
+    def summary(actors):
+        return sorted((actor['name'],
+                       sorted((movie['title'],movie['director']['pk'] if movie['director'] else None) for movie in actor['movies']),
+                       sorted(movie['title'] for movie in actor['best_movies']))
+                      for actor in actors)
+
+    actors = backend.filter(Actor,{},include = include,raw = True)
+    select_in_actors = backend.filter(Actor,{},include = select_in_include,raw = True)
+    assert summary(select_in_actors) == summary(actors)
+
+    del statements[:]
+    actors = [actor for actor in backend.filter(Actor,{},include = select_in_include)]
+
+    #one query for the actors and one for each relation
+    assert len(statements) == 3
+    al_pacino = [actor for actor in actors if actor.name == 'Al Pacino'][0]
+    assert isinstance(al_pacino.movies,ManyToManyProxy)
+    assert sorted(movie.title for movie in al_pacino.movies) == ['Scarface','The Godfather']
+    assert sorted(movie.title for movie in al_pacino.best_movies) == ['Scarface','The Godfather']
+
+
+def test_select_in_nested(backend):
+
+    prepare_data(backend)
+
+    directors = backend.filter(Director,{},include = (SelectIn('movies',SelectIn('actors','name')),'name'))
+    directors = dict((director.name,director) for director in directors)
+
+    the_godfather = directors['Francis Coppola'].movies[0]
+    assert the_godfather.title == 'The Godfather'
+    assert sorted(actor.name for actor in the_godfather.actors) == ['Al Pacino','Robert de Niro']
+    assert directors['Stanley Kubrick'].movies[0].actors._objects == []
+
+    movies = backend.filter(Movie,{'title' : 'The Godfather'},include = (('director',SelectIn('movies','title')),))
+    assert [movie.title for movie in movies[0].director.movies] == ['The Godfather']
+
+    with pytest.raises(AttributeError):
+        len(list(backend.filter(Movie,{},include = (SelectIn('director'),))))
+
+
+def test_prefetch(backend, statements):
+
+    prepare_data(backend)
+
+    actors = [actor for actor in backend.filter(Actor,{})]
+    movies = [movie for movie in backend.filter(Movie,{})]
+
+    del statements[:]
+    backend.prefetch(actors,['movies','movies.director','best_movies'])
+    #one query per relation path
+    assert len(statements) == 3
+
+    backend.prefetch(movies,['director'])
+    assert len(statements) == 4
+
+    del statements[:]
+    al_pacino = [actor for actor in actors if actor.name == 'Al Pacino'][0]
+    assert sorted(movie.title for movie in al_pacino.movies) == ['Scarface','The Godfather']
+    assert sorted(movie.director.name for movie in al_pacino.movies) == ['Brian de Palma','Francis Coppola']
+    assert sorted(movie.title for movie in al_pacino.best_movies) == ['Scarface','The Godfather']
+    directors = dict((movie.title,movie.director.name if movie.director else None) for movie in movies)
+    assert directors['A Clockwork Orange'] == 'Stanley Kubrick'
+    assert statements == []
+
+    andreas_dewes = [actor for actor in actors if actor.name == 'Andreas Dewes'][0]
+    assert len(andreas_dewes.movies) == 0
+
+    with pytest.raises(AttributeError):
+        backend.prefetch(actors,['name'])
+
+
+def test_prefetch_copied_documents(backend):
+
+    prepare_data(backend)
+
+    al_pacino = backend.get(Actor,{'name' : 'Al Pacino'})
+    movies_proxy = al_pacino.lazy_attributes['movies']
+    al_pacino_copy = copy.copy(al_pacino)
+
+    backend.prefetch([al_pacino_copy],['movies','best_movies'])
+    assert al_pacino_copy.lazy_attributes['movies'].obj is al_pacino_copy
+    assert sorted(movie.title for movie in al_pacino_copy.movies) == ['Scarface','The Godfather']
+
+    #the original document is left untouched
+    assert al_pacino.lazy_attributes['movies'] is movies_proxy
+    assert movies_proxy._objects is None
+    assert sorted(movie.title for movie in al_pacino.movies) == ['Scarface','The Godfather']
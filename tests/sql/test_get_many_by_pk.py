@@ -0,0 +1,34 @@
+import blitzdb.backends.sql.backend
+
+from ..helpers.movie_data import Director, Movie
+
+
+def test_get_many_by_pk_in_chunks(backend, statements, monkeypatch):
+
+    monkeypatch.setattr(blitzdb.backends.sql.backend, 'BULK_CHUNK_SIZE', 3)
+
+    movies = [Movie({'pk' : 'movie-%d' % i,'title' : 'Movie %d' % i}) for i in range(10)]
+    with backend.transaction():
+        backend.save_multiple(movies)
+
+    pks = ['movie-%d' % i for i in (9,2,5,0,7,1,8)] + ['missing','movie-2']
+    del statements[:]
+    assert [movie.pk for movie in backend.get_many_by_pk(Movie,pks)] == pks[:7]
+    #one query for each chunk of distinct primary keys
+    assert len([statement for statement in statements if statement.startswith('SELECT')]) == 3
+    assert [movie['pk'] for movie in backend.get_many_by_pk(Movie,pks,raw = True)] == pks[:7]
+
+
+def test_get_many_by_pk_with_other_pk_types(backend):
+
+    #the primary keys are stored as strings
+    director = Director({'pk' : 1,'name' : 'Stanley Kubrick'})
+    with backend.transaction():
+        backend.save(director)
+
+    assert [d.name for d in backend.get_many_by_pk(Director,[1,'1'])] == ['Stanley Kubrick']
+    assert backend.get_by_pk(Director,1).name == 'Stanley Kubrick'
+
+    lazy_director = Director({'pk' : 1},lazy = True,backend = backend)
+    lazy_director.revert()
+    assert lazy_director.name == 'Stanley Kubrick'
@@ -0,0 +1,145 @@
+import pytest
+
+from blitzdb import Document
+
+from ..conftest import _sql_backend, get_sql_engine
+from ..helpers.movie_data import Movie
+
+
+class Book(Document):
+
+    class Meta(Document.Meta):
+        autoregister = False
+        indexes = [{'fields' : {'author' : 1,'year' : -1}},
+                   {'fields' : {'isbn' : 1},'opts' : {'unique' : True,'name' : 'ix_book_isbn_unique'}},
+                   {'fields' : ['year'],'opts' : {'where' : {'status' : 'available'},'name' : 'ix_book_available'}}]
+
+
+def get_indexes(backend, table):
+    with backend.transaction():
+        result = backend.connection.execute("SELECT name,sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ?",
+                                            (table.name,))
+        return dict((name,sql) for name,sql in result)
+
+
+def get_query_plan(backend, qs):
+    s = qs.get_bare_select(columns = [qs.table.c.pk])
+    with backend.transaction():
+        plan = backend.connection.execute('EXPLAIN QUERY PLAN %s' % s.compile(compile_kwargs = {'literal_binds' : True}))
+        return ' '.join(str(row[-1]) for row in plan)
+
+
+@pytest.fixture
+def book_backend(request):
+    backend = _sql_backend(request, get_sql_engine(), autodiscover_classes = False)
+    backend.register(Book)
+    backend.init_schema()
+    backend.create_schema()
+    return backend
+
+
+def test_meta_indexes(book_backend):
+
+    backend = book_backend
+    table = backend.get_collection_table('book')
+    indexes = get_indexes(backend, table)
+
+    assert 'DESC' in indexes['ix_book_author_year_desc']
+    assert indexes['ix_book_isbn_unique'].startswith('CREATE UNIQUE INDEX')
+    assert 'WHERE' in indexes['ix_book_available']
+
+    with backend.transaction():
+        backend.save_multiple([Book({'pk' : str(i),'author' : 'a%d' % (i % 3),'year' : 2000+i,'isbn' : 'isbn-%d' % i,
+                                     'status' : 'available' if i % 2 == 0 else 'sold'})
+                               for i in range(10)])
+
+    with pytest.raises(Exception):
+        with backend.transaction():
+            backend.save(Book({'pk' : 'duplicate','author' : 'a0','year' : 1999,'isbn' : 'isbn-0'}))
+        backend.commit()
+
+    qs = backend.filter(Book,{'author' : 'a1'})
+    assert sorted(book.pk for book in qs) == ['1','4','7']
+    assert 'ix_book_author_year_desc' in get_query_plan(backend, qs)
+
+    qs = backend.filter(Book,{'year' : {'$gt' : 2005},'status' : 'available'})
+    assert sorted(book.pk for book in qs) == ['6','8']
+    assert 'ix_book_available' in get_query_plan(backend, qs)
+
+
+def test_create_index(backend):
+
+    table = backend.get_collection_table('movie')
+
+    backend.create_index(Movie,fields = {'year' : -1,'title' : 1},opts = {'name' : 'ix_movie_recent'},
+                         where = {'year' : {'$gte' : 2000}})
+    backend.create_index('movie',fields = ['budget.amount'])
+    indexes = get_indexes(backend, table)
+    assert 'WHERE' in indexes['ix_movie_recent']
+    assert 'json_extract' in indexes['ix_movie_budget_amount']
+
+    #creating the same index again does nothing
+    backend.create_index(Movie,fields = ['budget.amount'])
+    assert len(table.indexes) == len(set(index.name for index in table.indexes))
+
+    with backend.transaction():
+        backend.save_multiple([Movie({'pk' : str(i),'title' : 'Movie %d' % i,'year' : 1995+i,
+                                      'budget' : {'amount' : i*1000}}) for i in range(10)])
+
+    qs = backend.filter(Movie,{'year' : {'$gte' : 2002}})
+    assert sorted(movie.pk for movie in qs) == ['7','8','9']
+
+    qs = backend.filter(Movie,{'budget.amount' : {'$lt' : 2000}})
+    assert sorted(movie.pk for movie in qs) == ['0','1']
+    assert 'ix_movie_budget_amount' in get_query_plan(backend, qs)
+
+    #the indexes are part of the schema from now on
+    backend.init_schema()
+    backend.create_schema()
+    index_names = set(index.name for index in backend.get_collection_table('movie').indexes)
+    assert set(['ix_movie_recent','ix_movie_budget_amount']) <= index_names
+
+
+def test_index_names(backend, monkeypatch):
+
+    table = backend.get_collection_table('movie')
+
+    #partial index conditions are compiled without running a query
+    def fail(*args, **kwargs):
+        raise AssertionError("no query set is needed for a partial index")
+    monkeypatch.setattr(backend, 'filter', fail)
+
+    backend.create_index(Movie,fields = ['budget.amount'])
+    backend.create_index(Movie,fields = ['budget.amount'],unique = True)
+    backend.create_index(Movie,fields = ['budget.amount'],where = {'year' : {'$gte' : 2000}})
+    backend.create_index(Movie,fields = ['budget.amount'],where = {'$or' : [{'year' : {'$lt' : 1950}},
+                                                                            {'budget.currency' : {'$in' : ['EUR','USD']}}]})
+
+    #the options are part of the default names, so the indexes don't collide
+    indexes = get_indexes(backend, table)
+    names = [name for name in indexes if name.startswith('ix_movie_budget_amount')]
+    assert len(names) == 4
+    assert 'ix_movie_budget_amount_unique' in names
+    assert len([name for name in names if 'WHERE' in indexes[name]]) == 2
+
+    #an index with the same name but a different definition can't be created
+    with pytest.raises(AttributeError):
+        backend.create_index(Movie,fields = ['year'],name = 'ix_movie_budget_amount')
+
+    #an index over an indexed field is the index of that field
+    number_of_indexes = len(table.indexes)
+    backend.create_index(Movie,fields = ['title'])
+    assert len(table.indexes) == number_of_indexes
+
+
+def test_invalid_indexes(backend):
+
+    with pytest.raises(AttributeError):
+        backend.create_index(Movie)
+
+    with pytest.raises(AttributeError):
+        backend.create_index(Movie,fields = ['year'],name = 'ix_movie_director_year',
+                             where = {'director.name' : 'Stanley Kubrick'})
+
+    with pytest.raises(AttributeError):
+        backend.create_index(Movie,fields = ['year'],where = {'title' : {'$regex' : '^A'}})
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+import pytest
+
+from blitzdb import Document
+
+from ..conftest import _sql_backend, get_sql_engine
+from ..helpers.movie_data import Actor
+
+
+@pytest.fixture
+def actors(backend):
+    actors = [
+        Actor({'pk' : 'pacino','name' : 'Al Pacino','nickname' : 'Al',
+               'awards' : {'oscar' : 1,'rating' : 9.5},'active' : True}),
+        Actor({'pk' : 'de-niro','name' : 'Robert de Niro','nickname' : 'Bobby',
+               'awards' : {'oscar' : 2,'rating' : 9.0},'active' : True}),
+        Actor({'pk' : 'brando','name' : 'Marlon Brando','nickname' : u'Bud ☺',
+               'awards' : {'oscar' : 2},'active' : False}),
+        Actor({'pk' : 'dewes','name' : 'Andreas Dewes'}),
+    ]
+    with backend.transaction():
+        backend.save_multiple(actors)
+    return actors
+
+
+def pks(qs):
+    return sorted(actor.pk for actor in qs)
+
+
+def test_json_queries(backend, actors):
+
+    assert pks(backend.filter(Actor,{'nickname' : 'Al'})) == ['pacino']
+    assert pks(backend.filter(Actor,{'nickname' : u'Bud ☺'})) == ['brando']
+    assert pks(backend.filter(Actor,{'awards.oscar' : 2})) == ['brando','de-niro']
+    assert pks(backend.filter(Actor,{'awards.oscar' : {'$gte' : 1},'awards.rating' : {'$lt' : 9.2}})) == ['de-niro']
+    assert pks(backend.filter(Actor,{'active' : True})) == ['de-niro','pacino']
+    assert pks(backend.filter(Actor,{'active' : False})) == ['brando']
+    assert pks(backend.filter(Actor,{'awards.rating' : {'$exists' : False}})) == ['brando','dewes']
+    assert pks(backend.filter(Actor,{'nickname' : None})) == ['dewes']
+    assert pks(backend.filter(Actor,{'nickname' : {'$in' : ['Al','Bobby']}})) == ['de-niro','pacino']
+    assert pks(backend.filter(Actor,{'nickname' : {'$nin' : ['Al','Bobby']}})) == ['brando']
+    assert pks(backend.filter(Actor,{'nickname' : {'$like' : 'B%'}})) == ['brando','de-niro']
+    assert pks(backend.filter(Actor,{'$or' : [{'nickname' : 'Al'},{'awards.oscar' : 2}]})) == ['brando','de-niro','pacino']
+    assert pks(backend.filter(Actor,{'awards.oscar' : {'$not' : {'$gt' : 1}}})) == ['pacino']
+
+    #values of different types do not match
+    assert pks(backend.filter(Actor,{'awards.oscar' : '2'})) == []
+
+
+def test_json_queries_with_different_values(backend, actors):
+
+    #the compiled queries get cached, so we make sure that the values are used correctly
+    for nickname,pk in [('Al','pacino'),('Bobby','de-niro'),(u'Bud ☺','brando')]:
+        assert pks(backend.filter(Actor,{'nickname' : nickname})) == [pk]
+    for oscars,expected_pks in [(1,['pacino']),(2,['brando','de-niro']),(3,[])]:
+        assert pks(backend.filter(Actor,{'awards.oscar' : oscars})) == expected_pks
+
+
+def test_invalid_json_queries(backend, actors):
+
+    with pytest.raises(AttributeError):
+        backend.filter(Actor,{'awards' : {'oscar' : 1}})
+
+    with pytest.raises(AttributeError):
+        backend.filter(Actor,{'nickname' : ['Al']})
+
+
+class Product(Document):
+
+    class Meta(Document.Meta):
+        autoregister = False
+        indexes = [{'fields' : {'price' : 1}},{'fields' : {'category' : 1,'details.color' : 1}}]
+
+
+def test_json_index(request):
+
+    backend = _sql_backend(request, get_sql_engine(), autodiscover_classes = False)
+    backend.register(Product)
+    backend.init_schema()
+    backend.create_schema()
+
+    with backend.transaction():
+        backend.save_multiple([Product({'pk' : str(i),'price' : i,'category' : 'c%d' % (i % 3),
+                                        'details' : {'color' : 'red' if i % 2 else 'blue'}})
+                               for i in range(20)])
+
+    qs = backend.filter(Product,{'price' : {'$lt' : 3}})
+    assert sorted(product.pk for product in qs) == ['0','1','2']
+
+    s = qs.get_bare_select(columns = [qs.table.c.pk])
+    with backend.transaction():
+        plan = backend.connection.execute('EXPLAIN QUERY PLAN %s' % s.compile(compile_kwargs = {'literal_binds' : True}))
+        plan = ' '.join(str(row[-1]) for row in plan)
+    assert 'ix_product_price' in plan
+
+    qs = backend.filter(Product,{'category' : 'c1','details.color' : 'red'})
+    assert sorted(product.pk for product in qs) == ['1','13','19','7']
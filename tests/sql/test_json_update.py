@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from ..helpers.movie_data import Actor, Director
+
+
+@pytest.fixture
+def actor(backend):
+    actor = Actor({'pk' : 'actor','name' : 'Al Pacino','nickname' : 'Al',
+                   'awards' : {'oscar' : 1},'quotes' : ['Say hello to my little friend!']})
+    with backend.transaction():
+        backend.save(actor)
+    return actor
+
+
+def test_update_within_database(backend, actor, statements):
+
+    with backend.transaction():
+        backend.update(actor,{'nickname' : u'Sonny ☺','awards' : {'oscar' : 1,'golden_globe' : 4},
+                              'name' : 'Alfredo James Pacino'},unset_fields = ['quotes'])
+
+    #the JSON data and the indexed fields are updated with a single statement
+    assert len(statements) == 1
+    assert statements[0].startswith('UPDATE')
+
+    db_actor = backend.get(Actor,{'pk' : 'actor'})
+    assert db_actor.nickname == u'Sonny ☺'
+    assert db_actor.awards == {'oscar' : 1,'golden_globe' : 4}
+    assert db_actor.name == 'Alfredo James Pacino'
+    assert 'quotes' not in db_actor
+
+
+def test_update_with_document(backend, actor):
+
+    director = Director({'pk' : 'coppola','name' : 'Francis Ford Coppola'})
+    with backend.transaction():
+        backend.save(director)
+        backend.update(actor,{'mentor' : director})
+
+    db_actor = backend.get(Actor,{'pk' : 'actor'})
+    assert db_actor.mentor.pk == 'coppola'
+
+
+def test_update_nested_keys(backend, actor, statements):
+
+    with backend.transaction():
+        backend.update(actor,{'awards.bafta' : 2,'salary.bonus.amount' : 100},unset_fields = ['awards.oscar'])
+
+    assert len(statements) == 1
+
+    db_actor = backend.get(Actor,{'pk' : 'actor'})
+    assert db_actor.awards == {'bafta' : 2}
+    assert db_actor.salary['bonus'] == {'amount' : 100}
+
+
+def test_update_without_json_support(backend, actor, monkeypatch):
+
+    monkeypatch.setattr(backend, 'get_json_update_expression', lambda table, set_values, unset_keys: None)
+
+    with backend.transaction():
+        backend.update(actor,{'nickname' : 'Sonny'},unset_fields = ['quotes'])
+
+    db_actor = backend.get(Actor,{'pk' : 'actor'})
+    assert db_actor.nickname == 'Sonny'
+    assert 'quotes' not in db_actor
+
+
+def test_update_missing_document(backend):
+
+    with pytest.raises(Actor.DoesNotExist):
+        with backend.transaction():
+            backend.update(Actor({'pk' : 'missing'}),{'nickname' : 'Nobody'})
+
+
+def test_update_nested_keys_through_other_values(backend):
+
+    actor = Actor({'pk' : 'actor','name' : 'Al Pacino','awards' : 5,'quotes' : [1,2],'nickname' : None})
+    with backend.transaction():
+        backend.save(actor)
+        backend.update(actor,{'awards.oscar' : 1,'name' : 'Alfredo James Pacino'})
+        backend.update(actor,{'quotes.0' : 9})
+        backend.update(actor,{'nickname.short' : 'Al'})
+
+    #the values that are not objects get replaced, in the database as well as in the document
+    db_actor = backend.get(Actor,{'pk' : 'actor'})
+    assert db_actor.awards == actor.awards == {'oscar' : 1}
+    assert db_actor.quotes == actor.quotes == {'0' : 9}
+    assert db_actor.nickname == actor.nickname == {'short' : 'Al'}
+    assert db_actor.name == 'Alfredo James Pacino'
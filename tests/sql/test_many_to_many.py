@@ -106,3 +106,80 @@ def test_self_reference(backend):
     backend.init_schema()
     backend.register(MovieMovie)
     backend.create_schema()
+
+
+def test_diff_based_updates(backend, statements):
+
+    movies = [Movie({'pk' : 'movie-%d' % i,'title' : 'Movie %d' % i}) for i in range(1000)]
+    actor = Actor({'pk' : 'actor','name' : 'Robert de Niro','movies' : movies})
+
+    with backend.transaction():
+        backend.save_multiple(movies)
+
+    del statements[:]
+    with backend.transaction():
+        backend.save(actor)
+    #the actor, the existing relationship rows and one insert for all movies
+    assert len(statements) == 3
+
+    del statements[:]
+    actor.movies = movies[500:] + [movies[0]]
+    with backend.transaction():
+        backend.save(actor)
+    #only the removed rows get deleted, no rows get inserted
+    assert len(statements) == 3
+    assert 'INSERT' not in statements[-1]
+
+    db_actor = backend.get(Actor,{'pk' : 'actor'})
+    assert db_actor.movies.get_queryset().distinct_pks() == set(movie.pk for movie in actor.movies)
+
+
+def test_proxy_extend_and_remove(backend):
+
+    movies = [Movie({'title' : 'Movie %d' % i}) for i in range(10)]
+    actor = Actor({'name' : 'Al Pacino','movies' : movies[:2]})
+
+    with backend.transaction():
+        backend.save(actor)
+
+    db_actor = backend.get(Actor,{'pk' : actor.pk})
+
+    with backend.transaction():
+        #unsaved movies get saved, existing and duplicate ones get ignored
+        db_actor.movies.extend(movies + movies[:3])
+    assert len(db_actor.movies) == 10
+
+    with backend.transaction():
+        db_actor.movies.remove(*movies[5:])
+        db_actor.movies.remove(movies[0])
+    assert set(movie.pk for movie in db_actor.movies) == set(movie.pk for movie in movies[1:5])
+
+    with backend.transaction():
+        db_actor.movies.append(movies[0])
+        db_actor.movies.append(movies[0])
+    assert len(db_actor.movies) == 5
+
+
+def test_diff_based_updates_with_other_pk_types(backend, statements):
+
+    #the primary keys are stored as strings
+    movies = [Movie({'pk' : i,'title' : 'Movie %d' % i}) for i in range(10)]
+    actor = Actor({'pk' : 1,'name' : 'Robert de Niro','movies' : movies})
+
+    with backend.transaction():
+        backend.save_multiple(movies)
+        backend.save(actor)
+
+    del statements[:]
+    with backend.transaction():
+        backend.save(actor)
+    #the unchanged rows are neither deleted nor inserted again
+    assert not any(statement.startswith(('DELETE','INSERT INTO actor_movie')) for statement in statements)
+
+    del statements[:]
+    db_actor = backend.get(Actor,{'pk' : '1'})
+    with backend.transaction():
+        db_actor.movies.extend(movies[:5])
+    assert not any(statement.startswith('INSERT') for statement in statements)
+
+    assert len(db_actor.movies) == 10
@@ -0,0 +1,94 @@
+import pytest
+
+from ..helpers.movie_data import Actor, Director, Movie
+
+
+def generate_documents(n):
+    directors = [Director({'pk' : 'director-%d' % i,'name' : 'Director %d' % i}) for i in range(3)]
+    movies = [Movie({'pk' : 'movie-%d' % i,'title' : 'Movie %d' % i,'year' : 1980 + i,
+                     'director' : directors[i % 3]}) for i in range(n)]
+    actors = [Actor({'pk' : 'actor-%d' % i,'name' : 'Actor %d' % i,
+                     'movies' : movies[i:i+3]}) for i in range(n)]
+    return directors, movies, actors
+
+
+def check_documents(backend, movies, actors):
+    assert len(backend.filter(Movie,{})) == len(movies)
+    assert len(backend.filter(Actor,{})) == len(actors)
+    for actor in actors:
+        db_actor = backend.get(Actor,{'pk' : actor.pk})
+        assert db_actor.name == actor.name
+        assert sorted(movie.pk for movie in db_actor.movies) == sorted(movie.pk for movie in actor.movies)
+    for movie in movies:
+        db_movie = backend.get(Movie,{'pk' : movie.pk})
+        assert db_movie.title == movie.title
+        assert db_movie.director.pk == movie.director.pk
+
+
+def test_save_multiple(backend, statements):
+
+    directors, movies, actors = generate_documents(50)
+
+    with backend.transaction():
+        backend.save_multiple(directors + movies + actors)
+
+    #one upsert per collection, plus the deletes and inserts of the relationship table
+    assert len(statements) == 5
+
+    check_documents(backend, movies, actors)
+
+    #saving the documents again updates them
+    for actor in actors:
+        actor.name = actor.name.upper()
+        actor.movies = actor.movies[:1]
+
+    with backend.transaction():
+        backend.save_multiple(actors)
+
+    check_documents(backend, movies, actors)
+
+
+def test_save_multiple_without_upsert(backend, monkeypatch):
+
+    monkeypatch.setattr(backend, 'get_upsert_statement', lambda table, columns: None)
+
+    directors, movies, actors = generate_documents(10)
+
+    with backend.transaction():
+        backend.save_multiple(directors + movies + actors[:5])
+
+    for actor in actors:
+        actor.name = actor.name.upper()
+
+    with backend.transaction():
+        backend.save_multiple(actors)
+
+    check_documents(backend, movies, actors)
+
+
+def test_save_multiple_autogenerates_pks(backend):
+
+    director = Director({'name' : 'Stanley Kubrick'})
+    movie = Movie({'title' : 'A Clockwork Orange','director' : director})
+
+    with backend.transaction():
+        backend.save_multiple([movie, movie])
+
+    assert movie.pk is not None and director.pk is not None
+    assert backend.get(Movie,{'pk' : movie.pk}).director.name == 'Stanley Kubrick'
+
+
+def test_save_with_pk_uses_upsert(backend, statements):
+
+    director = Director({'pk' : 'kubrick','name' : 'Stanley Kubrick'})
+
+    with backend.transaction():
+        backend.save(director)
+    assert len(statements) == 1
+
+    director.name = 'Stanley Kubrick (director)'
+    with backend.transaction():
+        backend.save(director)
+    assert len(statements) == 2
+
+    assert backend.get(Director,{'pk' : 'kubrick'}).name == 'Stanley Kubrick (director)'
@@ -0,0 +1,83 @@
+import pytest
+
+from ..conftest import _sql_backend, get_sql_engine
+from ..helpers.movie_data import Actor, Director, Movie
+
+
+@pytest.fixture
+def movies(backend):
+    director = Director({'pk' : 'kubrick','name' : 'Stanley Kubrick'})
+    movies = [Movie({'pk' : 'movie-%d' % i,'title' : 'Movie %d' % i,'year' : 1980 + i,
+                     'director' : director}) for i in range(10)]
+    actors = [Actor({'pk' : 'actor-%d' % i,'name' : 'Actor %d' % i,
+                     'movies' : movies[i:i+2]}) for i in range(10)]
+    with backend.transaction():
+        backend.save_multiple([director] + movies + actors)
+    return movies
+
+
+def test_filter_with_different_values(backend, movies):
+
+    for movie in movies:
+        result = backend.filter(Movie,{'year' : movie.year})
+        assert len(result) == 1
+        assert result[0].pk == movie.pk
+        assert backend.filter(Movie,{'year' : {'$gte' : movie.year}}).distinct_pks() == \
+            set(m.pk for m in movies if m.year >= movie.year)
+
+    stats = backend.get_statement_cache_stats()
+    assert stats['hits'] > stats['misses']
+    assert stats['hit_rate'] > 0.5
+
+
+def test_filter_with_in_lists_of_different_lengths(backend, movies):
+
+    for n in range(1,5):
+        pks = [movie.pk for movie in movies[:n]]
+        assert backend.filter(Movie,{'pk' : {'$in' : pks}}).distinct_pks() == set(pks)
+        assert len(backend.filter(Movie,{'pk' : {'$nin' : pks}})) == len(movies) - n
+
+    assert len(backend.filter(Movie,{'pk' : {'$in' : []}})) == 0
+
+
+def test_combined_querysets_with_different_values(backend, movies):
+
+    qs_1 = backend.filter(Movie,{'year' : {'$gte' : 1983}})
+    qs_2 = backend.filter(Movie,{'year' : {'$lte' : 1985}})
+    qs_3 = backend.filter(Movie,{'year' : {'$gte' : 1985}})
+
+    assert set(movie.pk for movie in qs_1.intersect(qs_2)) == set(['movie-3','movie-4','movie-5'])
+    assert set(movie.pk for movie in qs_1.intersect(qs_3)) == set(m.pk for m in movies[5:])
+
+    #queries on related documents use subqueries with their own parameters
+    actors = backend.filter(Actor,{'movies' : {'$all' : backend.filter(Movie,{'year' : 1983})}})
+    assert set(actor.pk for actor in actors) == set(['actor-2','actor-3'])
+
+
+def test_delete_and_sort_with_cached_queries(backend, movies):
+
+    result = backend.filter(Movie,{'year' : {'$gt' : 1985}}).sort('year',-1)
+    assert [movie.year for movie in result] == list(range(1989,1985,-1))
+
+    backend.filter(Movie,{'year' : {'$lt' : 1982}}).delete()
+    backend.filter(Movie,{'year' : {'$lt' : 1983}}).delete()
+    assert len(backend.filter(Movie,{})) == len(movies) - 3
+
+
+def test_uncacheable_queries(backend, movies):
+
+    director = backend.get(Director,{'pk' : 'kubrick'})
+    assert len(backend.filter(Movie,{'director' : director})) == len(movies)
+    assert len(backend.filter(Movie,{'director' : director,'year' : 1981})) == 1
+
+
+def test_disabled_statement_cache(request):
+
+    backend = _sql_backend(request, get_sql_engine(), statement_cache_size = 0)
+
+    with backend.transaction():
+        backend.save_multiple([Movie({'title' : 'Movie %d' % i,'year' : 1980 + i}) for i in range(3)])
+
+    assert len(backend.filter(Movie,{'year' : 1981})) == 1
+    assert len(backend.filter(Movie,{'year' : 1982})) == 1
+    assert backend.get_statement_cache_stats()['entries'] == 0
@@ -0,0 +1,63 @@
+import pytest
+
+from ..helpers.movie_data import Actor, Director, Movie
+
+
+@pytest.fixture
+def movies(backend):
+    directors = [Director({'pk' : 'director-%d' % i,'name' : 'Director %d' % i}) for i in range(3)]
+    movies = [Movie({'pk' : 'movie-%03d' % i,'title' : 'Movie %d' % (i % 7),'year' : 1980 + i % 10,
+                     'director' : directors[i % 3]}) for i in range(100)]
+    actors = [Actor({'pk' : 'actor-%d' % i,'name' : 'Actor %d' % i,
+                     'movies' : movies[i:i+5]}) for i in range(100)]
+    with backend.transaction():
+        backend.save_multiple(directors + movies + actors)
+    return movies
+
+
+def test_stream(backend, movies):
+
+    qs = backend.filter(Movie,{'year' : {'$gte' : 1985}})
+    assert [movie.pk for movie in qs.stream(batch_size = 7)] == [movie.pk for movie in qs]
+    assert qs.objects is not None
+
+    qs = backend.filter(Movie,{'year' : {'$gte' : 1985}})
+    streamed_movies = list(qs.stream(batch_size = 7))
+    assert qs.objects is None
+    assert len(streamed_movies) == 50
+    assert all(isinstance(movie, Movie) for movie in streamed_movies)
+
+
+def test_stream_with_includes(backend, movies):
+
+    qs = backend.filter(Actor,{},include = (('movies',('director',)),))
+    actors = list(qs.stream(batch_size = 3))
+    assert len(actors) == 100
+    for actor in actors:
+        i = int(actor.pk.split('-')[1])
+        assert sorted(movie.pk for movie in actor.movies) == [movie.pk for movie in movies[i:i+5]]
+        for movie in actor.movies:
+            assert movie.director.name == 'Director %d' % (int(movie.pk.split('-')[1]) % 3)
+
+
+def test_stream_sorted(backend, movies):
+
+    qs = backend.filter(Movie,{}).sort([('year',-1),('title',1)])
+    streamed_movies = list(qs.stream(batch_size = 10))
+    assert [(movie.year,movie.title) for movie in streamed_movies] == \
+        sorted([(movie.year,movie.title) for movie in movies],key = lambda v: (-v[0],v[1]))
+
+    qs = backend.filter(Actor,{},include = ('movies',)).sort('movies.title',1)
+    with pytest.raises(AttributeError):
+        next(qs.stream())
+
+
+def test_stop_stream(backend, movies):
+
+    with backend.transaction():
+        stream = backend.filter(Movie,{}).stream(batch_size = 10)
+        assert next(stream).pk == 'movie-000'
+        stream.close()
+        backend.save(Movie({'pk' : 'new-movie','title' : 'New Movie'}))
+
+    assert backend.get(Movie,{'pk' : 'new-movie'}).title == 'New Movie'
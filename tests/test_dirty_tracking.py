@@ -0,0 +1,89 @@
+from __future__ import absolute_import
+
+from .helpers.movie_data import Actor
+
+
+def test_get_changes():
+
+    actor = Actor({'name' : 'Robert de Niro','movies' : []})
+
+    #changes of documents that were never saved are unknown
+    assert actor.get_changes() is None
+
+    actor.mark_clean()
+    assert actor.get_changes() == (set(),set())
+
+    actor.name = 'Al Pacino'
+    actor['age'] = 70
+    del actor.movies
+    assert actor.get_changes() == (set(['name','age']),set(['movies']))
+
+    actor.mark_clean(['age'])
+    assert actor.get_changes() == (set(['name']),set(['movies']))
+
+    actor.movies = []
+    assert actor.get_changes() == (set(['name','movies']),set())
+
+    actor.mark_clean()
+    #mutable values can be modified in place after reading them
+    actor.movies.append('The Godfather')
+    assert actor.get_changes() == (set(['movies']),set())
+
+    actor.mark_clean()
+    actor.attributes['name'] = 'Robert de Niro'
+    assert actor.get_changes() is None
+
+
+def test_changes_after_loading(backend):
+
+    actor = Actor({'name' : 'Robert de Niro','age' : 70})
+    backend.save(actor)
+    backend.commit()
+
+    assert actor.get_changes() == (set(),set())
+
+    actor = backend.get(Actor,{'pk' : actor.pk})
+    assert actor.get_changes() == (set(),set())
+
+    lazy_actor = Actor({'pk' : actor.pk},lazy = True,backend = backend)
+    lazy_actor.age = 71
+    assert lazy_actor.name == 'Robert de Niro'
+    assert lazy_actor.get_changes() == (set(['age']),set())
+
+
+def test_save_only_dirty(backend, monkeypatch):
+
+    actor = Actor({'name' : 'Robert de Niro','age' : 70,'nickname' : 'Bobby'})
+    backend.save(actor)
+    backend.commit()
+
+    first_copy = backend.get(Actor,{'pk' : actor.pk})
+    second_copy = backend.get(Actor,{'pk' : actor.pk})
+    assert first_copy is not second_copy
+
+    #both ways of saving return the same result
+    full_result = first_copy.save(backend)
+    first_copy.name = 'Al Pacino'
+    partial_result = first_copy.save(backend,only_dirty = True)
+    backend.commit()
+    assert partial_result is full_result
+
+    #a full save of the second copy would overwrite the name
+    second_copy.age = 71
+    del second_copy.nickname
+    second_copy.save(backend,only_dirty = True)
+    backend.commit()
+
+    actor = backend.get(Actor,{'pk' : actor.pk})
+    assert actor.name == 'Al Pacino'
+    assert actor.age == 71
+    assert 'nickname' not in actor
+
+    assert second_copy.get_changes() == (set(),set())
+
+    def fail(*args,**kwargs):
+        raise AssertionError("nothing to save")
+
+    monkeypatch.setattr(backend,'update',fail)
+    monkeypatch.setattr(backend,'save',fail)
+    assert second_copy.save(backend,only_dirty = True) is second_copy
@@ -19,6 +19,9 @@ def mockup_backend():
             doc.pk = query['pk']
             return doc
 
+        def get_by_pk(self, DocumentClass, pk):
+            return self.get(DocumentClass, {'pk': pk})
+
     return Backend()
 
 def test_unicode():
@@ -237,3 +240,92 @@ def test_delete():
 
     with pytest.raises(KeyError):
         doc['foo']
+
+
+def test_copy_on_write():
+
+    doc = Document({'pk' : 1,'foo' : 'bar','l' : [1,2]})
+    doc_copy = copy.copy(doc)
+
+    assert doc_copy.foo == 'bar'
+    assert doc_copy.lazy_attributes is doc.lazy_attributes
+
+    doc_copy.foo = 'baz'
+    assert doc.foo == 'bar'
+    assert doc_copy.foo == 'baz'
+
+    doc.pk = 2
+    assert doc_copy.pk == 1
+
+    #like a shallow copy, nested values are shared
+    assert doc_copy.l is doc.l
+
+
+def test_deepcopy(mockup_backend):
+
+    doc = Document({'pk' : 1,'foo' : {'bar' : 'baz'}})
+    doc.self = doc
+    doc.lazy_doc = Document({'pk' : 'lazy'},lazy = True,backend = mockup_backend)
+
+    doc_copy = copy.deepcopy(doc)
+
+    assert doc_copy.foo == {'bar' : 'baz'}
+    assert doc_copy.foo is not doc.foo
+    assert doc_copy.self is doc_copy
+    #copying does not load lazy documents
+    assert doc_copy.lazy_doc.lazy
+    assert doc.lazy_doc.lazy
+    assert doc_copy.lazy_doc.foo == 'bar'
+
+
+def test_field_descriptors(mockup_backend):
+
+    from blitzdb.document import FieldDescriptor
+    from blitzdb.fields import CharField
+
+    class FieldDocument(Document):
+
+        name = CharField()
+        keys = CharField()
+        amount = CharField(key = 'salary.amount')
+        foo = CharField()
+
+        class Meta(Document.Meta):
+            autoregister = False
+
+    assert isinstance(FieldDocument.name,FieldDescriptor)
+    #fields that would shadow methods or use a different key get no descriptor
+    assert not isinstance(FieldDocument.keys,FieldDescriptor)
+    assert 'amount' not in FieldDocument.__dict__
+
+    #writes and deletions of declared fields go through the descriptor
+    class RecordingDescriptor(FieldDescriptor):
+
+        calls = []
+
+        def __set__(self, obj, value):
+            self.calls.append(('set',self.key))
+            super(RecordingDescriptor,self).__set__(obj,value)
+
+        def __delete__(self, obj):
+            self.calls.append(('delete',self.key))
+            super(RecordingDescriptor,self).__delete__(obj)
+
+    FieldDocument.name = RecordingDescriptor('name',FieldDocument.fields['name'])
+
+    doc = FieldDocument({'name' : 'bar'})
+    assert doc.name == 'bar'
+    doc.name = 'baz'
+    assert doc.attributes['name'] == 'baz'
+    del doc.name
+    assert RecordingDescriptor.calls == [('set','name'),('delete','name')]
+    with pytest.raises(AttributeError):
+        doc.name
+
+    doc.properties['name'] = 'from properties'
+    assert doc.name == 'from properties'
+
+    #declared fields of lazy documents get loaded on access
+    lazy_doc = FieldDocument({'pk' : 1},lazy = True,backend = mockup_backend)
+    assert lazy_doc.foo == 'bar'
+    assert not lazy_doc.lazy
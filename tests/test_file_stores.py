@@ -1,3 +1,4 @@
+import os
 import subprocess
 import tempfile
 
@@ -49,3 +50,35 @@ def test_transactional_store_save(transactional_store):
     store.delete_blob("key2")
 
     assert store.get_blob("key3") == blob3
+
+
+def test_transactional_store_spill(transactional_store):
+    store = transactional_store
+    store._properties['memory_limit'] = 10
+
+    blob1 = b"0123456789"
+    blob2 = b"abcdefghij"
+    blob3 = b"klmnopqrst"
+
+    store.store_blob(blob1, "key1")
+    store.store_blob(blob2, "key2")
+    store.store_blob(blob3, "key3")
+
+    assert store.get_blob("key1") == blob1
+    assert store.get_blob("key2") == blob2
+    assert store.has_blob("key3")
+
+    store.delete_blob("key3")
+    assert not store.has_blob("key3")
+
+    store.rollback()
+    assert not store.has_blob("key2")
+
+    store.store_blob(blob1, "key1")
+    store.store_blob(blob2, "key2")
+    store.commit()
+    store.begin()
+
+    assert store.get_blob("key1") == blob1
+    assert store.get_blob("key2") == blob2
+    assert sorted(os.listdir(store._properties['path'])) == ['key1', 'key2']
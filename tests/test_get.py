@@ -22,3 +22,34 @@ def test_delete(backend):
 
     with pytest.raises(Actor.MultipleDocumentsReturned):
         actor = backend.get(Actor,{})
+
+
+def test_get_by_pk(backend):
+
+    stallone = Actor({'name' : 'Silvester Stallone'})
+    arnie = Actor({'name' : 'Arnold Schwarzenegger'})
+
+    backend.save(stallone)
+    backend.save(arnie)
+    backend.commit()
+
+    assert backend.get_by_pk(Actor,stallone.pk) == stallone
+    assert backend.get_by_pk(Actor,arnie.pk).name == 'Arnold Schwarzenegger'
+
+    with pytest.raises(Actor.DoesNotExist):
+        backend.get_by_pk(Actor,'foo')
+
+    actors = backend.get_many_by_pk(Actor,[arnie.pk,'foo',stallone.pk,arnie.pk])
+    assert [actor.pk for actor in actors] == [arnie.pk,stallone.pk]
+
+    assert backend.get_many_by_pk(Actor,[]) == []
+
+
+def test_lazy_load_by_pk(backend):
+
+    stallone = Actor({'name' : 'Silvester Stallone'})
+    backend.save(stallone)
+    backend.commit()
+
+    lazy_stallone = Actor({'pk' : stallone.pk},lazy = True,backend = backend)
+    assert lazy_stallone.name == 'Silvester Stallone'
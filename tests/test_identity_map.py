@@ -0,0 +1,98 @@
+from __future__ import absolute_import
+
+from blitzdb import Document
+
+from .helpers.movie_data import Director, Movie
+
+
+class LoadRecordingDocument(Document):
+
+    loaded = []
+
+    def after_load(self):
+        self.loaded.append(self)
+
+
+def _save_movies(backend):
+
+    directors = [Director({'name' : 'Director %d' % i}) for i in range(2)]
+    for director in directors:
+        backend.save(director)
+    backend.commit()
+
+    for i in range(6):
+        backend.save(Movie({'title' : 'Movie %d' % i,'year' : 1980+i,'director' : directors[i % 2]}))
+    backend.commit()
+
+    return directors
+
+
+def test_session_shares_instances(backend):
+
+    directors = _save_movies(backend)
+
+    with backend.session():
+        movies = list(backend.filter(Movie,{}))
+        director_instances = set(id(movie.lazy_attributes['director']) for movie in movies)
+        assert len(director_instances) == 2
+
+        movie = movies[0]
+        assert movie.director.name.startswith('Director')
+
+        #loading the director once updates all references to it
+        other_movies = [m for m in movies if m.lazy_attributes['director'] is movie.lazy_attributes['director']]
+        assert len(other_movies) == 3
+        assert all(not m.lazy_attributes['director'].lazy for m in other_movies)
+
+        director = backend.get_by_pk(Director,movie.director.pk)
+        assert director is movie.director
+
+    movies = list(backend.filter(Movie,{}))
+    assert len(set(id(movie.lazy_attributes['director']) for movie in movies)) == 6
+
+
+def test_transaction_session(backend):
+
+    directors = _save_movies(backend)
+
+    with backend.transaction(session = True):
+        assert backend.get_by_pk(Director,directors[0].pk) is backend.get_by_pk(Director,directors[0].pk)
+
+    assert backend.get_by_pk(Director,directors[0].pk) is not backend.get_by_pk(Director,directors[0].pk)
+
+
+def test_session_keeps_unsaved_changes(backend):
+
+    directors = _save_movies(backend)
+
+    with backend.session():
+        director = backend.get_by_pk(Director,directors[0].pk)
+        director.name = 'Unsaved name'
+
+        #loading the document again returns the same instance, without discarding its changes
+        assert backend.get_by_pk(Director,directors[0].pk) is director
+        assert director in list(backend.filter(Director,{}))
+        assert director.name == 'Unsaved name'
+
+        #reverting the document discards them
+        director.revert()
+        assert director.name == 'Director 0'
+
+
+def test_session_calls_after_load_hook(backend):
+
+    document = LoadRecordingDocument({'name' : 'Stanley Kubrick'})
+    backend.save(document)
+    backend.commit()
+
+    with backend.session():
+        db_document = backend.get_by_pk(LoadRecordingDocument,document.pk)
+        del LoadRecordingDocument.loaded[:]
+
+        #the hook is called for the existing instance as well
+        assert backend.get_by_pk(LoadRecordingDocument,document.pk) is db_document
+        assert LoadRecordingDocument.loaded == [db_document]
+
+        db_document.name = 'Unsaved name'
+        assert backend.get_by_pk(LoadRecordingDocument,document.pk) is db_document
+        assert LoadRecordingDocument.loaded == [db_document,db_document]
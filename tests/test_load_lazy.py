@@ -0,0 +1,109 @@
+from __future__ import absolute_import
+
+import pytest
+
+from .helpers.movie_data import Director, Movie
+
+
+@pytest.fixture
+def movies_with_directors(backend):
+
+    directors = [Director({'name' : 'Director %d' % i}) for i in range(3)]
+    for director in directors:
+        backend.save(director)
+    backend.commit()
+
+    movies = [Movie({'title' : 'Movie %d' % i,'year' : 1980+i,'director' : directors[i % 3]})
+              for i in range(9)]
+    for movie in movies:
+        backend.save(movie)
+    backend.commit()
+
+    return directors, movies
+
+
+def count_calls(monkeypatch, backend):
+    calls = {'get_by_pk' : 0, 'get_many_by_pk' : 0}
+
+    def wrap(name):
+        f = getattr(backend, name)
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return f(*args, **kwargs)
+        monkeypatch.setattr(backend, name, wrapper)
+
+    wrap('get_by_pk')
+    wrap('get_many_by_pk')
+    return calls
+
+
+def test_load_lazy(backend, movies_with_directors, monkeypatch):
+
+    movies = list(backend.filter(Movie,{}))
+    assert len(movies) == 9
+    assert all(movie.lazy_attributes['director'].lazy for movie in movies)
+
+    calls = count_calls(monkeypatch, backend)
+
+    assert backend.load_lazy(movies,paths = ['director']) == movies
+
+    assert calls == {'get_by_pk' : 0, 'get_many_by_pk' : 1}
+    assert sorted(set(movie.director.name for movie in movies)) == \
+        ['Director 0','Director 1','Director 2']
+    assert calls['get_by_pk'] == 0
+
+
+def test_load_lazy_nested_path(backend, movies_with_directors, monkeypatch):
+
+    movies = list(backend.filter(Movie,{}))
+    for movie in movies:
+        movie.director.load_if_lazy()
+        movie.director.favorite_movie = movie
+    directors = [movie.director for movie in movies]
+    for director in directors:
+        backend.save(director)
+    backend.commit()
+
+    movies = list(backend.filter(Movie,{}))
+
+    calls = count_calls(monkeypatch, backend)
+
+    backend.load_lazy(movies,paths = ['director.favorite_movie'])
+
+    assert calls['get_many_by_pk'] == 2
+    for movie in movies:
+        assert movie.director.favorite_movie.title.startswith('Movie')
+    assert calls['get_by_pk'] == 0
+
+
+def test_queryset_load_lazy(backend, movies_with_directors, monkeypatch):
+
+    calls = count_calls(monkeypatch, backend)
+
+    movies = backend.filter(Movie,{}).load_lazy(paths = ['director'],batch_size = 4)
+
+    names = [movie.director.name for movie in movies]
+
+    assert len(names) == 9
+    assert calls['get_by_pk'] == 0
+    assert calls['get_many_by_pk'] == 3
+
+
+def test_load_lazy_copies_attributes(backend, movies_with_directors):
+
+    directors, movies = movies_with_directors
+    directors[0].awards = {'oscar' : ['Best Director']}
+    backend.save(directors[0])
+    backend.commit()
+
+    movies = list(backend.filter(Movie,{'director' : directors[0]}))
+    assert len(movies) == 3
+    assert movies[0].lazy_attributes['director'] is not movies[1].lazy_attributes['director']
+
+    backend.load_lazy(movies,paths = ['director'])
+
+    #modifying the nested values of one director does not change the others
+    movies[0].director.awards['oscar'].append('Best Picture')
+    movies[0].director.awards['golden_globe'] = 1
+    assert movies[1].director.awards == {'oscar' : ['Best Director']}
+    assert movies[2].director.awards == {'oscar' : ['Best Director']}
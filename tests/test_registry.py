@@ -0,0 +1,101 @@
+from __future__ import absolute_import
+
+import subprocess
+import sys
+
+import pytest
+
+from blitzdb import Document
+from blitzdb.backends.file import Backend as FileBackend
+
+
+class Book(Document):
+
+    class Meta(Document.Meta):
+        autoregister = False
+        collection = 'books'
+
+
+class Novel(Book):
+
+    class Meta(Book.Meta):
+        autoregister = False
+
+    def before_save(self):
+        self.saved = True
+
+
+@pytest.fixture
+def registry_backend(tmpdir):
+    return FileBackend(str(tmpdir),autodiscover_classes = False)
+
+
+def test_register_and_unregister(registry_backend):
+
+    backend = registry_backend
+
+    backend.register(Book)
+    assert backend.get_cls_for_collection('books') is Book
+    assert backend.get_collection_for_cls_name('Book') == 'books'
+
+    #a subclass replaces its base class for the same collection
+    backend.register(Novel)
+    assert backend.get_cls_for_collection('books') is Novel
+    assert backend.get_collection_for_cls_name('Novel') == 'books'
+    with pytest.raises(AttributeError):
+        backend.get_collection_for_cls_name('Book')
+
+    backend.unregister(Novel)
+    with pytest.raises(AttributeError):
+        backend.get_cls_for_collection('books')
+    with pytest.raises(AttributeError):
+        backend.get_collection_for_cls_name('Novel')
+
+    backend.register(Novel,{'collection' : 'novels'})
+    backend.register(Novel,{'collection' : 'fiction'})
+    assert backend.get_cls_for_collection('fiction') is Novel
+    with pytest.raises(AttributeError):
+        backend.get_cls_for_collection('novels')
+
+
+def test_meta_attributes(registry_backend):
+
+    meta_attributes = registry_backend.get_meta_attributes(Book)
+    assert meta_attributes['collection'] == 'books'
+    assert meta_attributes['autoregister'] is False
+
+    #the cached attributes can't be modified through the returned dictionary
+    meta_attributes['collection'] = 'foo'
+    assert registry_backend.get_meta_attributes(Book)['collection'] == 'books'
+
+
+def test_call_hook(registry_backend):
+
+    book = Book({'title' : 'Faust'})
+    novel = Novel({'title' : 'Ulysses'})
+
+    assert registry_backend.call_hook('before_save',book) is None
+    registry_backend.call_hook('before_save',novel)
+    assert novel.saved
+
+
+def test_deferred_autodiscovery(tmpdir):
+
+    backend = FileBackend(str(tmpdir))
+
+    class Magazine(Document):
+        pass
+
+    #classes defined before the first use of the backend get discovered as well
+    assert backend.get_cls_for_collection('magazine') is Magazine
+
+
+@pytest.mark.skipif(sys.version_info < (3,7),reason = "requires module-level __getattr__")
+def test_lazy_backend_imports():
+
+    code = ("import sys, blitzdb; "
+            "assert 'sqlalchemy' not in sys.modules; "
+            "assert 'blitzdb.backends.sql' not in sys.modules; "
+            "blitzdb.SqlBackend; "
+            "assert 'sqlalchemy' in sys.modules")
+    subprocess.check_call([sys.executable,'-c',code])
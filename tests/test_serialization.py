@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+from blitzdb import Document
+
 from .helpers.movie_data import Movie
 
 
@@ -14,3 +16,66 @@ def test_basic_storage(backend):
     recovered_movie = backend.get(Movie,{})
 
     assert 'foo.bar.baz' in recovered_movie and recovered_movie['foo.bar.baz'] == 'bar'
+
+
+class NoopEncoder(object):
+
+    @classmethod
+    def encode(cls,obj,path):
+        return obj
+
+    @classmethod
+    def decode(cls,obj):
+        return obj
+
+
+def test_compiled_serializer(backend):
+
+    movie = Movie({'title' : 'The Godfather'})
+    backend.save(movie)
+    backend.commit()
+
+    data = {'title' : u'Der Pate','year' : 1972,'rating' : 9.2,'flag' : True,'none' : None,
+            'complex' : 1+2j,'tags' : ('a',['b',{'c' : 1}]),'nested' : {'movie' : movie,'movies' : [movie]}}
+
+    #passing a path forces the generic (uncompiled) serialization
+    serialized = backend.serialize(data)
+    assert serialized == backend.serialize(data,path = [])
+    assert serialized['nested']['movie']['pk'] == movie.pk
+    assert serialized['tags'] == ['a',['b',{'c' : 1}]]
+
+    deserialized = backend.deserialize(serialized)
+    assert deserialized == backend.deserialize(serialized,encoders = [NoopEncoder])
+    assert deserialized['complex'] == 1+2j
+    assert isinstance(deserialized['nested']['movie'],Movie)
+    assert deserialized['nested']['movie'].lazy
+    assert deserialized['nested']['movies'][0] == movie
+
+
+def test_serializer_fallback_for_path_encoders(backend):
+
+    assert backend.get_serializer() is not None
+    #encoders need paths unless they declare otherwise
+    assert backend.get_serializer(encoders = [NoopEncoder]) is None
+    assert backend.serialize({'a' : [1,2]},encoders = [NoopEncoder]) == {'a' : [1,2]}
+
+
+def test_compiled_codecs_are_cached(backend):
+
+    serializer = backend.get_serializer()
+    deserializer = backend.get_deserializer()
+    assert backend.get_serializer() is serializer
+    assert backend.get_deserializer() is deserializer
+
+    class Magazine(Document):
+
+        class Meta(Document.Meta):
+            autoregister = False
+
+    #registering a class clears the compiled codecs
+    backend.register(Magazine,{'collection' : 'compiled_codecs_magazine'})
+    try:
+        assert backend.get_serializer() is not serializer
+        assert backend.get_deserializer() is not deserializer
+    finally:
+        backend.unregister(Magazine)
@@ -107,9 +107,6 @@ def test_update_on_deleted_document_fails(backend):
 
 def test_update_with_dict(backend):
 
-    if isinstance(backend,FileBackend):
-        return
-
     actor = Actor({'name': 'Robert de Niro', 'age': 54})
 
     backend.save(actor)
@@ -136,9 +133,6 @@ def test_update_with_dict(backend):
 
 def test_update_unset(backend):
 
-    if isinstance(backend,FileBackend):
-        return
-
     actor = Actor({'name': 'Robert de Niro', 'age': 54})
 
     backend.save(actor)
@@ -159,9 +153,6 @@ def test_update_unset(backend):
 
 def test_update_set_then_unset(backend):
 
-    if isinstance(backend,FileBackend):
-        return
-
     actor = Actor({'name': 'Robert de Niro', 'age': 54})
 
     backend.save(actor)
@@ -183,9 +174,6 @@ def test_update_set_then_unset(backend):
 
 def test_update_unset_then_set(backend):
 
-    if isinstance(backend,FileBackend):
-        return
-
     actor = Actor({'name': 'Robert de Niro', 'age': 54})
 
     backend.save(actor)